@@ -0,0 +1,4 @@
+"""
+Benchmarks for price_scraper. Run from the repository root, e.g.
+    python -m benchmarks.bench_parser_memory
+"""
@@ -0,0 +1,194 @@
+"""
+Logging cost and volume.
+
+volume: records and bytes one scrape cycle writes at INFO and at DEBUG,
+using the real Scrape/Parser/Alerter code on synthetic pages.
+
+contention: time the scraping threads spend inside logging calls when
+they write straight to a RotatingFileHandler versus handing records to
+the queue used by price_scraper.logs.
+
+disabled: cost of a disabled debug call with an f-string versus lazy
+%-style arguments.
+"""
+import argparse
+from collections import Counter
+import io
+import logging
+from logging.handlers import QueueListener, RotatingFileHandler
+import os
+import queue
+import tempfile
+import threading
+import time
+import timeit
+
+from benchmarks.common import standard_page
+from price_scraper.data.datamanager import DataManager
+from price_scraper.logs import JsonFormatter, RecordQueueHandler
+from price_scraper.notifications.alerter import Alerter
+from price_scraper.notifications.changes import ChangeFeed, diff
+from price_scraper.scrapers.detect import PageClassifier
+from price_scraper.scrapers.parser import StandardParser
+from price_scraper.scrapers.requester import Page, Requester
+from price_scraper.scrapers.scrape import StandardScrape
+
+
+class PageRequester(Requester):
+    """
+    Serves a fixed page instead of going to the network.
+    """
+
+    def __init__(self, content: bytes):
+        super().__init__(notifier=None)
+        self.content = content
+
+    def get_html(self, name, url, headers=None):
+        return self.content.decode()
+
+    def get_page(self, name, url, headers=None, exclude=None,
+                 deadline=None):
+        return Page(url, self.content, "utf-8", status=200, elapsed=0.05)
+
+
+class SilentNotifier:
+    def discord_message(self, message):
+        pass
+
+
+class CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JsonFormatter())
+        self.levels = Counter()
+        self.bytes = 0
+
+    def emit(self, record):
+        self.levels[record.levelname] += 1
+        self.bytes += len(self.format(record)) + 1
+
+
+def run_cycle(targets: int, data_dir: str):
+    notifier = SilentNotifier()
+    alerter = Alerter(notifier, max_discord_string=35)
+    data_manager = DataManager(notifier,
+                               data_file=os.path.join(data_dir, "data.csv"),
+                               last_scrape_file=None)
+    feed = ChangeFeed()
+    page = standard_page()
+    last = None
+    for n in range(targets):
+        name = f"target {n}"
+        scrape = StandardScrape(
+            name, notifier, PageRequester(page), StandardParser(notifier),
+            alerter, data_manager, f"https://www.example.com/{n}",
+            min_retry_time=0, max_retry_time=0, max_tries=3,
+            discord_log=False,
+            classifier=PageClassifier([], min_size=512, window=1024))
+        items = scrape.scrape_items()
+        alerter.price_stock_alert(name, items, threshold=1020,
+                                  in_stock=True)
+        feed.publish(name, list(diff(name, items, last or items[1:])))
+        last = items
+
+
+def volume(targets: int):
+    root = logging.getLogger()
+    handler = CountingHandler()
+    root.addHandler(handler)
+    print(f"{'level':<8} {'records':>8} {'KB':>8} {'per target':>11}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        for level in (logging.INFO, logging.DEBUG):
+            handler.levels.clear()
+            handler.bytes = 0
+            root.setLevel(level)
+            run_cycle(targets, data_dir)
+            records = sum(handler.levels.values())
+            print(f"{logging.getLevelName(level):<8} {records:>8} "
+                  f"{handler.bytes / 1024:>8.1f} {records / targets:>11.1f}")
+    root.removeHandler(handler)
+
+
+def contention(threads: int, records: int):
+    print(f"{'handler':<10} {'us/call':>8} {'total s':>8}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for mode in ("direct", "queue"):
+            logger = logging.getLogger(f"bench.{mode}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            file_handler = RotatingFileHandler(
+                os.path.join(log_dir, f"{mode}.log"),
+                maxBytes=1024 * 1024, backupCount=3)
+            file_handler.setFormatter(JsonFormatter())
+            listener = None
+            if mode == "queue":
+                log_queue = queue.SimpleQueue()
+                logger.addHandler(RecordQueueHandler(log_queue))
+                listener = QueueListener(log_queue, file_handler)
+                listener.start()
+            else:
+                logger.addHandler(file_handler)
+
+            spent = []
+
+            def work(worker):
+                start = time.perf_counter()
+                for n in range(records):
+                    logger.info("[%s] Scrape attempt: %d/%d successful!",
+                                f"target {worker}", 1, 3,
+                                extra={"target": f"target {worker}",
+                                       "attempt": 1, "stage": "success"})
+                spent.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            workers = [threading.Thread(target=work, args=(n,))
+                       for n in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            if listener:
+                listener.stop()
+            total = time.perf_counter() - start
+            file_handler.close()
+            print(f"{mode:<10} "
+                  f"{sum(spent) * 1e6 / (threads * records):>8.1f} "
+                  f"{total:>8.2f}")
+
+
+def disabled(calls: int):
+    logger = logging.getLogger("bench.disabled")
+    logger.setLevel(logging.INFO)
+    name, items = "target", list(range(60))
+    eager = timeit.timeit(
+        lambda: logger.debug(f"[{name}] {len(items)} items saved, {items!r}"),
+        number=calls)
+    lazy = timeit.timeit(
+        lambda: logger.debug("[%s] %d items saved, %r", name, len(items),
+                             items),
+        number=calls)
+    print(f"{'style':<10} {'ns/call':>8}")
+    print(f"{'f-string':<10} {eager * 1e9 / calls:>8.0f}")
+    print(f"{'%-style':<10} {lazy * 1e9 / calls:>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    print("# log volume per cycle")
+    volume(args.targets)
+    print("\n# caller time, threads logging at once")
+    contention(args.threads, args.records)
+    print("\n# disabled debug call")
+    disabled(args.calls)
+
+
+if __name__ == "__main__":
+    # Keep the benchmark's own output off stderr
+    logging.lastResort = logging.StreamHandler(io.StringIO())
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-card cost of price and title normalization. Compares the old ad hoc
+price parsing of StandardParser and SeleniumParser with normalize, cold
+(cache cleared every pass) and warm (repeated strings served from the
+LRU cache, as on a re-scrape of the same listings).
+"""
+import argparse
+import timeit
+
+from price_scraper.scrapers import normalize
+
+PRICES = [f"${n // 10},{n % 10}99.{n % 100:02d} (2 Offers) – "
+          for n in range(10, 70)]
+TITLES = [f"  Example Graphics Card {n}\n   16GB GDDR7 PCI Express 5.0 "
+          for n in range(60)]
+
+
+def old_standard(text: str) -> int:
+    # int(text.replace(",", "")) on the <strong> part
+    return int(text.split("$", 1)[1].split(".", 1)[0].replace(",", ""))
+
+
+def old_selenium(text: str) -> int:
+    text = text.split(" ", 1)[0]
+    return round(float("".join(
+        letter for letter in text if letter not in ["$", ","])))
+
+
+def new_cold(text: str) -> int:
+    return normalize.parse_price.__wrapped__(text).major
+
+
+def new_warm(text: str) -> int:
+    return normalize.parse_price(text).major
+
+
+def title_cold(text: str) -> str:
+    return normalize.normalize_title.__wrapped__(text)
+
+
+def title_warm(text: str) -> str:
+    return normalize.normalize_title(text)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--passes", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [
+        ("price: old standard", old_standard, PRICES),
+        ("price: old selenium", old_selenium, PRICES),
+        ("price: normalize cold", new_cold, PRICES),
+        ("price: normalize warm", new_warm, PRICES),
+        ("title: str.split join", lambda text: " ".join(text.split()), TITLES),
+        ("title: normalize cold", title_cold, TITLES),
+        ("title: normalize warm", title_warm, TITLES),
+    ]
+
+    normalize.clear_caches()
+    print(f"{'case':<24} {'ns/card':>8}")
+    for label, function, texts in cases:
+        seconds = timeit.timeit(
+            lambda: [function(text) for text in texts], number=args.passes)
+        print(f"{label:<24} {seconds * 1e9 / (args.passes * len(texts)):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Parses the same page thousands of times with one shared parser and prints
+RSS as it goes. RSS should level off after warm up, since every call
+returns a fresh list and frees its soup.
+"""
+import argparse
+import gc
+import time
+
+from benchmarks.common import rss_bytes, standard_page
+from price_scraper.scrapers.parser import StandardParser
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--cards", type=int, default=60)
+    parser.add_argument("--every", type=int, default=500)
+    args = parser.parse_args()
+
+    html = standard_page(args.cards)
+    item_parser = StandardParser(notifier=None)
+
+    print(f"{'calls':>8} {'rss MB':>8} {'items':>6} {'ms/call':>8}")
+    start = time.perf_counter()
+    for call in range(1, args.calls + 1):
+        items = item_parser.get_items("bench", html, "utf-8")
+        if call % args.every == 0:
+            gc.collect()
+            elapsed = (time.perf_counter() - start) * 1000 / call
+            print(f"{call:>8} {rss_bytes() / 2 ** 20:>8.1f} "
+                  f"{len(items):>6} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Last scrape file formats: pickle of Item objects versus the columnar
+snapshot format in price_scraper.data.snapshot_file.
+
+For a synthetic snapshot of --targets targets with --items items each:
+encode and decode time, file size, and the cost of summing every
+target's prices, by decoding all Items from pickle versus reading the
+memory-mapped price column of the snapshot file.
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import timeit
+
+from price_scraper.data.item import Item
+from price_scraper.data.snapshot_file import (SnapshotFile, encode_snapshot,
+                                              write_snapshot)
+
+
+def build_snapshot(targets: int, items: int) -> dict[str, list[Item]]:
+    return {
+        f"target {t}": [
+            Item(f"target {t}", "2026-10-19T08:00:00",
+                 f"Example Graphics Card {n} 16GB GDDR7 PCI Express 5.0",
+                 1000 + n, n % 3 != 0, f"https://www.example.com/p/{t}/{n}")
+            for n in range(items)
+        ]
+        for t in range(targets)
+    }
+
+
+def best(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--targets", type=int, default=200)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot = build_snapshot(args.targets, args.items)
+    with tempfile.TemporaryDirectory() as folder:
+        pickle_file = os.path.join(folder, "last_scrape.pkl")
+        snapshot_file = os.path.join(folder, "last_scrape.snap")
+        with open(pickle_file, "wb") as file:
+            pickle.dump(snapshot, file)
+        write_snapshot(snapshot_file, snapshot)
+
+        def pickle_load():
+            with open(pickle_file, "rb") as file:
+                return pickle.load(file)
+
+        def snapshot_load():
+            with SnapshotFile(snapshot_file) as snap:
+                return snap.to_dict()
+
+        def pickle_prices():
+            return sum(item.price for items in pickle_load().values()
+                       for item in items)
+
+        def snapshot_prices():
+            total = 0
+            with SnapshotFile(snapshot_file) as snap:
+                for name in snap.targets:
+                    with snap.prices(name) as prices:
+                        total += sum(prices)
+            return total
+
+        assert pickle_prices() == snapshot_prices()
+        rows = [
+            ("encode", best(lambda: pickle.dumps(snapshot), args.number),
+             best(lambda: encode_snapshot(snapshot), args.number)),
+            ("decode", best(pickle_load, args.number),
+             best(snapshot_load, args.number)),
+            ("prices", best(pickle_prices, args.number),
+             best(snapshot_prices, args.number)),
+        ]
+        sizes = (os.path.getsize(pickle_file), os.path.getsize(snapshot_file))
+
+    print(f"{args.targets} targets x {args.items} items")
+    print(f"{'':<8} {'pickle ms':>10} {'snapshot ms':>12}")
+    for name, old, new in rows:
+        print(f"{name:<8} {old * 1000:>10.2f} {new * 1000:>12.2f}")
+    print(f"{'KB':<8} {sizes[0] / 1024:>10.1f} {sizes[1] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
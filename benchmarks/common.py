@@ -0,0 +1,34 @@
+import os
+import resource
+
+
+def rss_bytes() -> int:
+    """
+    Current resident set size. Reads /proc on Linux, falls back to the
+    peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def standard_page(cards: int = 60) -> bytes:
+    """
+    Synthetic category page in the layout StandardParser expects.
+    """
+    card = (
+        '<div class="item-cell">'
+        '<a href="https://www.example.com/p/{n}" class="item-title">'
+        'Example Graphics Card {n} 16GB GDDR7 PCI Express 5.0</a>'
+        '<ul><li class="price-current">$<strong>1,{n:03d}</strong>'
+        '<sup>.99</sup></li></ul>{promo}</div>'
+    )
+    body = "".join(
+        card.format(n=n, promo='<p class="item-promo">OUT OF STOCK</p>'
+                    if n % 3 == 0 else "")
+        for n in range(cards)
+    )
+    return (f"<html><head><title>Example</title></head><body>{body}"
+            f"</body></html>").encode()
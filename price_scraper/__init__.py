@@ -1,16 +1,22 @@
 from .data.datamanager import DataManager
 from .data.item import Item
+from .data.history import PriceHistory
 from .notifications.alerter import Alerter
 from .notifications.notifier import Notifier
+from .notifications.rules import Rule, Rules
 from .scrapers.scrape import Scrape, Scrapers
-from .scrapers.parser import Parser, StandardParser, SeleniumParser, Parsers
+from .scrapers.parser import (Parser, StandardParser, SeleniumParser,
+                              JsonParser, Parsers)
 from .scrapers.requester import (Requester, StandardRequester,
-                                 SeleniumRequester, Requesters)
+                                 SeleniumRequester, JsonRequester,
+                                 Requesters)
 from .scrape_manager import ScrapeManager
 from price_scraper import config
 from price_scraper import targets
 
-__all__ = ["DataManager", "Item", "Alerter", "Notifier", "Scrape", "Scrapers",
-           "Parser", "StandardParser", "SeleniumParser", "Parsers",
-           "Requester", "StandardRequester", "SeleniumRequester", "Requesters",
-           "ScrapeManager", "config", "targets"]
+__all__ = ["DataManager", "Item", "PriceHistory", "Alerter", "Notifier",
+           "Rule", "Rules", "Scrape", "Scrapers",
+           "Parser", "StandardParser", "SeleniumParser", "JsonParser",
+           "Parsers", "Requester", "StandardRequester", "SeleniumRequester",
+           "JsonRequester", "Requesters", "ScrapeManager", "config",
+           "targets"]
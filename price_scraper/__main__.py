@@ -1,43 +1,228 @@
-import logging
-from logging.handlers import RotatingFileHandler
+import argparse
+import copy
+import os
 
 from price_scraper import config
 from price_scraper import ScrapeManager
+from price_scraper.data.archive import PageArchive
+from price_scraper.data.export import Exporters, export, plot
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.snapshot_file import convert_pickle
+from price_scraper.distributed import Coordinator, Worker, WorkQueues
+from price_scraper.logs import config_logger
+from price_scraper.profiling import Profiler
+from price_scraper.target_config import TargetWatcher, load_targets
 from price_scraper.targets import targets
+from price_scraper.web import WebServer
 
 
-def config_logger():
-    logger = logging.getLogger()
-    logger.setLevel(config.LOG_LEVEL)
+def parse_args():
+    parser = argparse.ArgumentParser(prog="price_scraper")
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="stay resident, scrape every --interval seconds and serve the "
+             "web dashboard")
+    parser.add_argument(
+        "--targets", default=config.TARGETS_FILE,
+        help="JSON/TOML/YAML target file, reloaded on change with --serve")
+    parser.add_argument("--interval", type=int, default=config.RUN_INTERVAL)
+    parser.add_argument("--host", default=config.WEB_HOST)
+    parser.add_argument("--port", type=int, default=config.WEB_PORT)
+    parser.add_argument(
+        "--profile", nargs="?", const=config.PROFILE_DIR, default=None,
+        metavar="DIR",
+        help="profile each target's scrape and alert stages with cProfile "
+             "and tracemalloc, writing .pstats, flamegraph .folded stacks "
+             f"and a summary per cycle to DIR (default {config.PROFILE_DIR})")
 
-    console_logger = logging.StreamHandler()
-    console_logger.setLevel(logging.DEBUG)
+    commands = parser.add_subparsers(dest="command")
+    replay_parser = commands.add_parser(
+        "replay", help="re-parse archived pages offline")
+    replay_parser.add_argument(
+        "--archive", default=config.ARCHIVE_DIR,
+        required=not config.ARCHIVE_DIR)
+    replay_parser.add_argument(
+        "--run", action="append", dest="runs",
+        help="run id to replay, can be repeated. Defaults to every run")
+    replay_parser.add_argument("--workers", type=int, default=None)
+    replay_parser.add_argument(
+        "--history", default=None,
+        help="record replayed items into this history database, use a "
+             "fresh file to rebuild history after a parser fix")
 
-    rfh = RotatingFileHandler(
-        filename=config.LOG_FILE,
-        maxBytes=config.MAX_LOG_SIZE,
-        backupCount=config.MAX_BACKUP_LOGS,
-        )
+    export_parser = commands.add_parser(
+        "export", help="write a history extract as CSV, JSON lines or "
+                       "Parquet")
+    export_parser.add_argument("output", help="file to write, the format "
+                                              "comes from the extension")
+    export_parser.add_argument("--format", dest="fmt", default=None,
+                               choices=list(Exporters.lookup))
+    plot_parser = commands.add_parser(
+        "plot", help="render a price chart per item")
+    plot_parser.add_argument("--output", default=config.PLOT_DIR,
+                             help="directory the charts are written to")
+    plot_parser.add_argument("--workers", type=int, default=None)
+    for command_parser in (export_parser, plot_parser):
+        command_parser.add_argument("--history", default=config.HISTORY_FILE)
+        command_parser.add_argument("--search", help="target id")
+        command_parser.add_argument("--item", help="item title")
+        command_parser.add_argument("--start", help="ISO date or datetime")
+        command_parser.add_argument("--end", help="ISO date or datetime")
+        command_parser.add_argument(
+            "--chunksize", type=int, default=config.EXPORT_CHUNK_SIZE,
+            help="history rows read at a time")
+    export_parser.add_argument(
+        "--resample", default=None,
+        help="downsample to OHLC rows per item, a pandas offset like 1h, "
+             "1D or 1W. Raw rows by default")
+    plot_parser.add_argument(
+        "--resample", default=config.PLOT_RESAMPLE,
+        help="pandas offset each chart point covers")
 
-    formatter = logging.Formatter(
-        fmt=config.LOG_FORMAT,
-        datefmt=config.LOG_DATE_FORMAT
-        )
+    convert_parser = commands.add_parser(
+        "convert", help="convert a last scrape pickle to the snapshot format")
+    convert_parser.add_argument("pickle_file")
+    convert_parser.add_argument(
+        "snapshot_file", nargs="?", default=None,
+        help="defaults to the pickle's name with a .snap extension")
 
-    rfh.setFormatter(formatter)
-    console_logger.setFormatter(formatter)
+    coordinator_parser = commands.add_parser(
+        "coordinator",
+        help="queue each cycle's pages for workers and merge their results, "
+             "runs every --interval seconds with --serve")
+    worker_parser = commands.add_parser(
+        "worker", help="lease pages from the queue and scrape them")
+    for command_parser in (coordinator_parser, worker_parser):
+        command_parser.add_argument(
+            "--backend", default=config.QUEUE_BACKEND,
+            choices=[name for name, queue in WorkQueues.lookup.items()
+                     if queue.shared])
+        command_parser.add_argument("--queue", default=config.QUEUE_FILE)
+    worker_parser.add_argument("--id", dest="worker_id", default=None)
+    return parser.parse_args()
 
-    # logger.addHandler(console_logger)
-    logger.addHandler(rfh)
 
-    return logger
+def replay(args):
+    """
+    Re-parses archived pages without any network traffic and optionally
+    rebuilds a history database from them.
+    """
+    archive = PageArchive(args.archive)
+    results = archive.replay(run_ids=args.runs, workers=args.workers)
+    history = PriceHistory(args.history) if args.history else None
+
+    for entry, items in results:
+        print(f"{entry['time']} [{entry['name']}] {entry['sha256'][:12]} "
+              f"{len(items)} item(s)")
+        if history is None:
+            continue
+        for target in entry["targets"]:
+            tagged = [copy.copy(item) for item in items]
+            for item in tagged:
+                item.search = target
+            history.record(target, tagged)
+
+
+def export_history(args):
+    """
+    Runs the export and plot commands. They read the history through their
+    own connection, in a separate process from any scraper.
+    """
+    filters = {"search": args.search, "item": args.item,
+               "start": args.start, "end": args.end,
+               "chunksize": args.chunksize}
+    if args.command == "export":
+        rows = export(args.history, args.output, fmt=args.fmt,
+                      resample=args.resample, **filters)
+        print(f"{rows} row(s) written to {args.output}")
+    else:
+        paths = plot(args.history, args.output, resample=args.resample,
+                     workers=args.workers, **filters)
+        print(f"{len(paths)} chart(s) written to {args.output}")
+
+
+def build_queue(args):
+    options = {"lease_time": config.LEASE_TIME,
+               "max_attempts": config.TASK_MAX_ATTEMPTS}
+    if args.backend == "sqlite":
+        options["queue_file"] = args.queue
+    return WorkQueues.lookup[args.backend](**options)
 
 
 def main():
+    args = parse_args()
     config_logger()
 
-    scrape_manager = ScrapeManager(targets)
-    scrape_manager.run()
+    if args.command == "replay":
+        replay(args)
+        return
+
+    if args.command in ("export", "plot"):
+        export_history(args)
+        return
+
+    if args.command == "convert":
+        output = (args.snapshot_file or
+                  os.path.splitext(args.pickle_file)[0] + ".snap")
+        targets = convert_pickle(args.pickle_file, output)
+        print(f"{targets} target(s) written to {output}")
+        return
+
+    if args.targets:
+        scrape_manager = ScrapeManager(load_targets(args.targets))
+    else:
+        scrape_manager = ScrapeManager(targets)
+    if args.profile:
+        scrape_manager.profiler = Profiler(args.profile,
+                                           top=config.PROFILE_TOP)
+
+    if args.command == "worker":
+        worker = Worker(
+            scrape_manager,
+            build_queue(args),
+            worker_id=args.worker_id,
+            poll_interval=config.QUEUE_POLL_INTERVAL
+            )
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            worker.stop()
+        return
+
+    if args.command == "coordinator":
+        coordinator = Coordinator(
+            scrape_manager,
+            build_queue(args),
+            poll_interval=config.QUEUE_POLL_INTERVAL,
+            cycle_timeout=config.CYCLE_TIMEOUT
+            )
+        run, run_forever = coordinator.run, coordinator.run_forever
+    else:
+        run, run_forever = scrape_manager.run, scrape_manager.run_forever
+
+    if args.serve:
+        if args.targets:
+            TargetWatcher(
+                args.targets,
+                scrape_manager,
+                poll_interval=config.TARGETS_POLL_INTERVAL
+                ).start()
+
+        web_server = WebServer(
+            scrape_manager,
+            host=args.host,
+            port=args.port,
+            page_size=config.WEB_PAGE_SIZE
+            )
+        web_server.start()
+        try:
+            run_forever(args.interval)
+        except KeyboardInterrupt:
+            scrape_manager.stop()
+        finally:
+            web_server.stop()
+    else:
+        run()
 
 
 if __name__ == '__main__':
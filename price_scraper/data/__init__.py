@@ -1,4 +1,5 @@
 from .datamanager import DataManager
+from .history import PriceHistory
 from .item import Item
 
-__all__ = ["DataManager", "Item"]
+__all__ = ["DataManager", "Item", "PriceHistory"]
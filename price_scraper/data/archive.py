@@ -0,0 +1,186 @@
+import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+try:
+    import zstandard
+except ImportError:  # Falls back to gzip when zstandard isn't installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class PageArchive:
+    """
+    Content-addressed archive of raw fetched pages for debugging and
+    offline replay.
+
+    Pages are stored once per distinct body under objects/ab/<sha256>,
+    compressed with zstd (gzip if zstandard isn't installed). Every fetch
+    appends a line to the run's index, index/<run_id>.jsonl, pointing at
+    the page it returned.
+
+    Attributes:
+    archive_dir = root directory of the archive
+    run_id = id of the current run, set by start_run()
+
+    Methods:
+    start_run() = starts a new run index
+    store() = archives a Page and indexes it under the current run
+    load() = returns the raw bytes of an archived page
+    runs() = list of archived run ids, oldest first
+    entries() = index entries of a run
+    replay() = re-parses archived pages in parallel without any requests
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self.run_id = None
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(archive_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(archive_dir, "index"), exist_ok=True)
+
+    def __repr__(self):
+        return f"PageArchive(archive_dir={self.archive_dir!r})"
+
+    def start_run(self, run_id: str | None = None) -> str:
+        self.run_id = run_id or dt.datetime.now().strftime("%Y%m%dT%H%M%S")
+        return self.run_id
+
+    def _object_path(self, digest: str, extension: str) -> str:
+        return os.path.join(
+            self.archive_dir, "objects", digest[:2], digest + extension
+            )
+
+    def store(self,
+              name: str,
+              parser: str,
+              page,
+              targets: list[str] | None = None) -> str:
+        """
+        Archives a Page fetched for the named scrape. parser is the name of
+        the Parser class used so replay can pick the same one, targets are
+        the target ids the page's items belong to. Returns the page's
+        sha256.
+        """
+        if self.run_id is None:
+            self.start_run()
+
+        content = page.content
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+
+        try:
+            if self._find(digest) is None:
+                if zstandard is not None:
+                    path = self._object_path(digest, ".zst")
+                    data = zstandard.ZstdCompressor().compress(content)
+                else:
+                    path = self._object_path(digest, ".gz")
+                    data = gzip.compress(content)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = (f"{path}.{os.getpid()}."
+                             f"{threading.get_ident()}.tmp")
+                with open(temp_path, "wb") as file:
+                    file.write(data)
+                os.replace(temp_path, path)
+
+            entry = {
+                "name": name,
+                "parser": parser,
+                "targets": targets or [name],
+                "url": page.url,
+                "time": dt.datetime.now().isoformat(timespec="seconds"),
+                "sha256": digest,
+                "encoding": page.encoding,
+                "status": page.status,
+                "size": len(content),
+            }
+            index_path = os.path.join(
+                self.archive_dir, "index", f"{self.run_id}.jsonl"
+                )
+            with self.lock, open(index_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry) + "\n")
+            logger.debug("[%s] page archived as %.12s", name, digest,
+                         extra={"target": name, "stage": "archive"})
+        except Exception as e:
+            logger.exception("[%s] Unable to archive page: %s", name, e,
+                             extra={"target": name, "stage": "archive"})
+
+        return digest
+
+    def _find(self, digest: str) -> str | None:
+        for extension in (".zst", ".gz"):
+            path = self._object_path(digest, extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def load(self, digest: str) -> bytes:
+        path = self._find(digest)
+        if path is None:
+            raise FileNotFoundError(f"Page {digest} is not archived")
+        with open(path, "rb") as file:
+            data = file.read()
+        if path.endswith(".gz"):
+            return gzip.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    def runs(self) -> list[str]:
+        index_dir = os.path.join(self.archive_dir, "index")
+        return sorted(file_name.removesuffix(".jsonl")
+                      for file_name in os.listdir(index_dir)
+                      if file_name.endswith(".jsonl"))
+
+    def entries(self, run_id: str) -> list[dict]:
+        index_path = os.path.join(
+            self.archive_dir, "index", f"{run_id}.jsonl"
+            )
+        with open(index_path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def replay(self,
+               run_ids: list[str] | None = None,
+               workers: int | None = None) -> list[tuple[dict, list]]:
+        """
+        Re-runs Parser.get_items over archived pages in a process pool.
+        Items are stamped with the time the page was fetched. Returns a
+        list of (index entry, items) in index order.
+        """
+        entries = [entry for run_id in (run_ids or self.runs())
+                   for entry in self.entries(run_id)]
+        logger.info("Replaying %d archived page(s)", len(entries))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _replay_entry,
+                [self.archive_dir] * len(entries),
+                entries,
+                chunksize=8
+                )
+            return list(zip(entries, results))
+
+
+def _replay_entry(archive_dir: str, entry: dict) -> list:
+    """
+    Parses one archived page. Module level so process pools can pickle it.
+    """
+    from price_scraper.scrapers.parser import Parsers
+
+    parsers = {parser.__name__: parser for parser in Parsers.lookup.values()}
+    parser = parsers[entry["parser"]](notifier=None)
+    html = PageArchive(archive_dir).load(entry["sha256"])
+    items = parser.get_items(
+        name=entry["name"], html=html, encoding=entry["encoding"]
+        ) or []
+    for item in items:
+        item.time = entry["time"]
+    return items
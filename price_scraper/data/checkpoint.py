@@ -0,0 +1,184 @@
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(file_name: str, data: bytes):
+    """
+    Writes data to a temp file next to file_name then renames it over
+    file_name, so readers see either the old or the new file, never a
+    partial one.
+    """
+    temp_name = f"{file_name}.{os.getpid()}.tmp"
+    with open(temp_name, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_name, file_name)
+
+
+class CycleCheckpoint:
+    """
+    Per-target checkpoints of the running scrape cycle, so a run that dies
+    partway through can be resumed instead of starting over.
+
+    Layout under checkpoint_dir:
+        cycle.json = id and start time of the unfinished cycle
+        <hash>.json = one finished target: id, name, Item list and metrics
+
+    Targets are keyed by target_id(), names aren't unique.
+
+    Both are JSON, so loading a checkpoint never runs code from the file,
+    and written atomically. finish() removes them once the cycle's
+    snapshot is committed, so a cycle.json on startup means the last run
+    didn't finish. A cycle started more than max_age seconds ago is not
+    resumed, its targets' items would be too old to commit.
+
+    Attributes:
+    checkpoint_dir = directory holding the checkpoint files
+    max_age = seconds after its start a cycle is still resumed, None for
+              no limit
+    cycle = id of the running cycle
+
+    Methods:
+    begin() = resumes the unfinished cycle or starts a new one
+    save() = checkpoints a finished target
+    finish() = clears the checkpoints of the committed cycle
+    """
+
+    def __init__(self, checkpoint_dir: str, max_age: float | None = None):
+        self.checkpoint_dir = checkpoint_dir
+        self.max_age = max_age
+        self.cycle = None
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def __repr__(self):
+        return f"CycleCheckpoint(checkpoint_dir={self.checkpoint_dir!r})"
+
+    @property
+    def cycle_file(self) -> str:
+        return os.path.join(self.checkpoint_dir, "cycle.json")
+
+    def _target_file(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.checkpoint_dir, f"{digest}.json")
+
+    def begin(self, keys: set[str] | None = None) -> tuple[str, dict[str, dict]]:
+        """
+        Returns the cycle id and a dict of target id: checkpoint for
+        targets already done this cycle. Empty when a new cycle starts.
+        keys limits the checkpoints to the targets still configured.
+        """
+        try:
+            with open(self.cycle_file, "rb") as file:
+                cycle = json.load(file)
+        except FileNotFoundError:
+            cycle = None
+        except Exception as e:
+            logger.exception(f"Unreadable {self.cycle_file}, starting a "
+                             f"new cycle: {e}")
+            cycle = None
+
+        if cycle is not None and self.max_age is not None:
+            age = (dt.datetime.now() -
+                   dt.datetime.fromisoformat(cycle["start"])).total_seconds()
+            if age > self.max_age:
+                logger.info(f"Not resuming cycle {cycle['cycle']} started "
+                            f"{cycle['start']}, starting a new cycle")
+                cycle = None
+
+        if cycle is None:
+            self._clear_targets()
+            self.cycle = uuid.uuid4().hex
+            atomic_write(self.cycle_file, json.dumps({
+                "cycle": self.cycle,
+                "start": dt.datetime.now().isoformat(timespec="seconds"),
+            }).encode())
+            return self.cycle, {}
+
+        self.cycle = cycle["cycle"]
+        done = {}
+        for file_name in self._target_files():
+            try:
+                checkpoint = self._load(file_name)
+            except Exception as e:
+                logger.exception(f"Skipping checkpoint {file_name}: {e}")
+                continue
+            key = checkpoint["id"]
+            if checkpoint["cycle"] == self.cycle and (keys is None
+                                                      or key in keys):
+                done[key] = checkpoint
+        logger.info(f"Resuming cycle {self.cycle} started {cycle['start']}, "
+                    f"{len(done)} target(s) already done")
+        return self.cycle, done
+
+    def save(self, key: str, name: str, items, metrics: dict):
+        """
+        Checkpoints a finished target under its target_id() key.
+        """
+        checkpoint = {
+            "cycle": self.cycle, "id": key, "name": name,
+            "items": (None if items is None else
+                      [dict(item.as_dict(), search=item.search)
+                       for item in items]),
+            "metrics": metrics,
+        }
+        try:
+            atomic_write(self._target_file(key),
+                         json.dumps(checkpoint, default=str).encode())
+        except Exception as e:
+            logger.exception(f"[{name}] Unable to save checkpoint: {e}")
+
+    def finish(self):
+        """
+        Ends the cycle. The cycle file goes first so a crash while clearing
+        can't resume a cycle that was already committed.
+        """
+        try:
+            os.remove(self.cycle_file)
+        except FileNotFoundError:
+            pass
+        self._clear_targets()
+        self.cycle = None
+
+    @staticmethod
+    def _load(file_name: str) -> dict:
+        """
+        Reads a target checkpoint, raising ValueError when the file isn't
+        one.
+        """
+        with open(file_name, "rb") as file:
+            checkpoint = json.load(file)
+        if not (isinstance(checkpoint, dict)
+                and isinstance(checkpoint.get("cycle"), str)
+                and isinstance(checkpoint.get("id"), str)
+                and isinstance(checkpoint.get("metrics"), dict)
+                and isinstance(checkpoint.get("items"), (list, type(None)))):
+            raise ValueError("not a target checkpoint")
+        if checkpoint["items"] is not None:
+            try:
+                checkpoint["items"] = [Item.from_dict(item)
+                                       for item in checkpoint["items"]]
+            except (AttributeError, KeyError, TypeError) as e:
+                raise ValueError(f"bad item in checkpoint: {e!r}") from e
+        return checkpoint
+
+    def _target_files(self) -> list[str]:
+        return [os.path.join(self.checkpoint_dir, file_name)
+                for file_name in os.listdir(self.checkpoint_dir)
+                if file_name.endswith(".json")
+                and file_name != "cycle.json"]
+
+    def _clear_targets(self):
+        for file_name in self._target_files():
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
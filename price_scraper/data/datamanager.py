@@ -1,9 +1,17 @@
 import logging
 import os
 import pickle
+import threading
 
 import pandas as pd
 
+from price_scraper.data.archive import PageArchive
+from price_scraper.data.checkpoint import CycleCheckpoint, atomic_write
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.item import Item
+from price_scraper.data.snapshot_cache import SnapshotCache
+from price_scraper.data.snapshot_file import (convert_pickle, read_snapshot,
+                                              write_snapshot)
 from price_scraper.notifications.notifier import Notifier
 
 logger = logging.getLogger(__name__)
@@ -16,20 +24,47 @@ class DataManager:
     Attributes:
     self.notifier = self.notifierLogger object class for notifications/logging
     data_file = name/location of data.csv
-    last_scrape_file = pickle file storing the results of the last scrape
+    last_scrape_file = snapshot file storing the results of the last scrape,
+                       a legacy pickle if it ends in .pkl
+    history = PriceHistory for indexed history queries, None to disable
+    archive = PageArchive for raw fetched pages, None to disable
+    checkpoint = CycleCheckpoint for crash-resume of a cycle, None to disable
+    snapshots = SnapshotCache of recent scrapes per target, None to disable
 
     Methods:
     save_to_csv(): converts data into a dataframe then saves as a CSV
-    save_to_pickle(): saves input into a pickle file
+    save_to_history(): records items and updates the history rollups
+    archive_page(): stores a fetched page in the page archive
+    save_changes(): appends Change events to the history change log
+    last_items(): a target's items from the last scrape, cache first
+    snapshot_items(): a target's items from an older scrape, cache first
+    save_snapshot(): atomically saves a snapshot to the last scrape file
+    load_snapshot(): loads a snapshot, converting a legacy pickle once
+    save_to_pickle(): atomically saves input into a pickle file
     """
     def __init__(self,
                  notifier: Notifier,
                  data_file: str,
-                 last_scrape_file):
+                 last_scrape_file,
+                 history_file: str | None = None,
+                 archive_dir: str | None = None,
+                 checkpoint_dir: str | None = None,
+                 checkpoint_max_age: float | None = None,
+                 snapshot_cache_bytes: int | None = None,
+                 snapshot_depth: int = 3):
 
         self.notifier = notifier
         self.data_file = data_file
         self.last_scrape_file = last_scrape_file
+        self.history = PriceHistory(history_file) if history_file else None
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+        self.checkpoint = (CycleCheckpoint(checkpoint_dir, checkpoint_max_age)
+                           if checkpoint_dir else None)
+        self.snapshots = (SnapshotCache(snapshot_cache_bytes, snapshot_depth)
+                          if snapshot_cache_bytes else None)
+        self.last_scrape = None
+        # Pages scraped in the worker pools append to the CSV concurrently
+        self.csv_lock = threading.Lock()
 
     def __repr__(self):
         return (f"DataManager(self.notifier: {self.notifier!r},\n"
@@ -43,28 +78,130 @@ class DataManager:
         """
         df = pd.DataFrame(data)
         try:
-            if os.path.isfile(self.data_file):
-                df.to_csv(self.data_file, mode='a', header=False)
-                logger.debug(
-                    f"[{name}] {self.data_file} appended"
-                    )
-            else:
-                df.to_csv(self.data_file)
-                logger.debug(
-                    f"[{name}] {self.data_file} created"
-                    )
+            with self.csv_lock:
+                if os.path.isfile(self.data_file):
+                    df.to_csv(self.data_file, mode='a', header=False)
+                    logger.debug(
+                        f"[{name}] {self.data_file} appended"
+                        )
+                else:
+                    df.to_csv(self.data_file)
+                    logger.debug(
+                        f"[{name}] {self.data_file} created"
+                        )
         except Exception as e:
             logger.exception(
                 f"Error saving [{name}] {self.data_file}: {e}"
                 )
 
-    def save_to_pickle(self, items, file_name):
+    def save_to_history(self, key: str, items: list[Item]):
+        """
+        Records items in the price history under a target_id() if one is
+        configured.
+        """
+        if self.history is not None:
+            self.history.record(key, items)
+
+    def save_changes(self, changes: list):
+        """
+        Appends Change events to the history change log if one is
+        configured. Subscribed to the ChangeFeed.
+        """
+        if self.history is not None:
+            self.history.record_changes(changes)
+
+    def archive_page(self, name: str, parser: str, page, targets=None):
+        """
+        Stores a fetched page in the page archive if one is configured.
+        """
+        if self.archive is not None:
+            self.archive.store(name, parser, page, targets)
+
+    def last_items(self, key: str, name: str | None = None
+                   ) -> list[Item] | None:
+        """
+        Returns a target's items from the last scrape by its target_id().
+        Reads the snapshot cache first and only loads the last scrape file
+        on a miss, once per cycle. Misses are added to the cache. name is
+        looked up in last scrape files saved before they were keyed by id.
+        """
+        if self.snapshots is not None:
+            try:
+                return self.snapshots.get(key)
+            except KeyError:
+                pass
+
+        if self.last_scrape is None:
+            self.last_scrape = self.load_snapshot(
+                file_name=self.last_scrape_file) or {}
+        found = next((k for k in (key, name) if k in self.last_scrape), None)
+        items = self.last_scrape.get(found)
+        if self.snapshots is not None and found is not None:
+            self.snapshots.put(key, items)
+        return items
+
+    def snapshot_items(self, key: str, back: int = 0) -> list[Item] | None:
+        """
+        Returns a target's items from back scrapes ago by its target_id(),
+        from the snapshot cache or else rebuilt from the price history.
+        """
+        if self.snapshots is not None:
+            try:
+                return self.snapshots.get(key, back)
+            except KeyError:
+                pass
+        if self.history is not None:
+            return self.history.snapshot(key, back)
+        return None
+
+    def save_snapshot(self, items: dict, file_name: str) -> bool:
+        """
+        Saves a dict of target id: Item list in the snapshot format, or
+        as a pickle if file_name ends in .pkl. Returns False on failure.
+        """
+        if file_name.endswith(".pkl"):
+            return self.save_to_pickle(items, file_name)
+        try:
+            write_snapshot(file_name, items)
+        except Exception as e:
+            logger.exception(f"ERROR: Unable to save {file_name}: {e}")
+            return False
+        logger.debug(f"DEBUG: Saved {file_name}")
+        return True
+
+    def load_snapshot(self, file_name: str) -> dict | None:
+        """
+        Loads a snapshot file. When it doesn't exist yet but a pickle of
+        the same name does (last_scrape.pkl for last_scrape.snap), the
+        pickle is converted first.
+        """
+        if file_name.endswith(".pkl"):
+            return self.load_from_pickle(file_name)
+        legacy = os.path.splitext(file_name)[0] + ".pkl"
+        if not os.path.exists(file_name) and os.path.exists(legacy):
+            try:
+                convert_pickle(legacy, file_name)
+            except Exception as e:
+                logger.exception(f"Unable to convert {legacy}: {e}")
+        try:
+            snapshot = read_snapshot(file_name)
+        except FileNotFoundError:
+            logger.info(f"No {file_name} yet, nothing to compare against")
+            return None
+        except Exception as e:
+            logger.exception(f"Unable to load {file_name} {e}")
+            return None
+        logger.debug(f"Loaded {file_name}")
+        return snapshot
+
+    def save_to_pickle(self, items, file_name) -> bool:
         try:
-            with open(file_name, 'wb') as file:
-                pickle.dump(items, file)
+            atomic_write(file_name, pickle.dumps(items))
         except Exception as e:
             logger.exception(f"ERROR: Unable to save {file_name}: {e}")
+            return False
         logger.debug(f"DEBUG: Saved {file_name}")
+        return True
 
     def load_from_pickle(self, file_name):
         try:
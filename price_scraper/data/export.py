@@ -0,0 +1,320 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sqlite3
+from typing import Iterator
+
+import pandas as pd
+
+from price_scraper.data.history import end_bound
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+
+def read_history(
+        history_file: str,
+        search: str | None = None,
+        item: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        chunksize: int = 50000
+        ) -> Iterator[pd.DataFrame]:
+    """
+    Streams raw price history as DataFrames of at most chunksize rows,
+    ordered by search, item and time so every item's rows are contiguous.
+    Opens its own read-only connection, so a running scraper isn't held up.
+    start/end are inclusive ISO date or datetime bounds.
+    """
+    query = "SELECT search, item, time, price, stock, link FROM prices"
+    clauses, params = [], []
+    end_operator, end = end_bound(end) if end else ("<=", None)
+    for column, operator, value in (("search", "=", search),
+                                    ("item", "=", item),
+                                    ("time", ">=", start),
+                                    ("time", end_operator, end)):
+        if value:
+            clauses.append(f"{column} {operator} ?")
+            params.append(value)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY search, item, time"
+
+    conn = sqlite3.connect(f"file:{history_file}?mode=ro", uri=True)
+    try:
+        for chunk in pd.read_sql_query(query, conn, params=params,
+                                       chunksize=chunksize):
+            chunk["time"] = pd.to_datetime(chunk["time"])
+            chunk["stock"] = chunk["stock"].astype(bool)
+            yield chunk
+    finally:
+        conn.close()
+
+
+def read_whole_items(history_file: str,
+                     **filters) -> Iterator[pd.DataFrame]:
+    """
+    Same as read_history() but chunks never split an item's rows: the item
+    running over a chunk boundary is held back for the next chunk. Memory
+    stays bounded by the chunk size plus the longest single item history.
+    """
+    carry = None
+    for chunk in read_history(history_file, **filters):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        last = chunk.iloc[-1]
+        tail = (chunk["search"] == last["search"]) & (
+            chunk["item"] == last["item"])
+        carry = chunk[tail]
+        if not tail.all():
+            yield chunk[~tail]
+    if carry is not None and not carry.empty:
+        yield carry
+
+
+def read_items(history_file: str, **filters) -> Iterator[pd.DataFrame]:
+    """
+    Streams the history as one DataFrame per (search, item).
+    """
+    for chunk in read_whole_items(history_file, **filters):
+        for _, frame in chunk.groupby(["search", "item"], sort=False):
+            yield frame
+
+
+def downsample(frame: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Resamples raw rows to one row per item per rule (a pandas offset
+    alias: "1h", "1D", "1W"...) with open/high/low/close/avg price, whether
+    the item was in stock at any point and the number of scrapes. Empty
+    bins are dropped.
+    """
+    grouped = frame.groupby(
+        ["search", "item", pd.Grouper(key="time", freq=rule)], sort=False)
+    prices = grouped["price"]
+    sampled = pd.DataFrame({
+        "open": prices.first(),
+        "high": prices.max(),
+        "low": prices.min(),
+        "close": prices.last(),
+        "avg": prices.mean().round(2),
+        "in_stock": grouped["stock"].max(),
+        "count": prices.count(),
+    })
+    return sampled[sampled["count"] > 0].reset_index()
+
+
+class CsvWriter:
+    def __init__(self, output: str):
+        self.output = output
+        self.header = True
+
+    def write(self, frame: pd.DataFrame):
+        frame.to_csv(self.output, mode="w" if self.header else "a",
+                     header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            pd.DataFrame().to_csv(self.output, index=False)
+
+
+class JsonWriter:
+    """
+    Writes JSON lines, one record per row, so the file can be streamed.
+    """
+
+    def __init__(self, output: str):
+        self.file = open(output, "w", encoding="utf-8")
+
+    def write(self, frame: pd.DataFrame):
+        if frame.empty:
+            return
+        text = frame.to_json(orient="records", lines=True, date_format="iso")
+        self.file.write(text if text.endswith("\n") else text + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Appends each chunk as a row group. Needs pyarrow.
+    """
+
+    def __init__(self, output: str):
+        if pyarrow is None:
+            raise ValueError(f"pyarrow is required to export {output}")
+        self.output = output
+        self.writer = None
+
+    def write(self, frame: pd.DataFrame):
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            # A column that is all None in the first chunk (links) has no
+            # type yet, store it as text
+            schema = pyarrow.schema([
+                field.with_type(pyarrow.string())
+                if pyarrow.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            self.writer = pyarrow.parquet.ParquetWriter(self.output, schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Exporters:
+    """
+    Export writer lookup table, by format name.
+    """
+
+    lookup = {
+        "csv": CsvWriter,
+        "json": JsonWriter,
+        "jsonl": JsonWriter,
+        "parquet": ParquetWriter,
+    }
+
+
+def export(
+        history_file: str,
+        output: str,
+        fmt: str | None = None,
+        resample: str | None = None,
+        chunksize: int = 50000,
+        **filters
+        ) -> int:
+    """
+    Writes a history extract to output as CSV, JSON lines or Parquet, by
+    default picked from the file extension. Raw rows are streamed through
+    chunk by chunk. With resample, whole items are downsampled a chunk at
+    a time (see downsample()). filters are search, item, start and end as
+    for read_history(). Returns the number of rows written.
+    """
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower()
+    if fmt not in Exporters.lookup:
+        raise ValueError(f"Unsupported export format {fmt!r}, use one of "
+                         f"{', '.join(Exporters.lookup)}")
+
+    if resample:
+        frames = (downsample(chunk, resample) for chunk
+                  in read_whole_items(history_file, chunksize=chunksize,
+                                      **filters))
+    else:
+        frames = read_history(history_file, chunksize=chunksize, **filters)
+
+    writer = Exporters.lookup[fmt](output)
+    rows = 0
+    try:
+        for frame in frames:
+            writer.write(frame)
+            rows += len(frame)
+    finally:
+        writer.close()
+    logger.info(f"Exported {rows} row(s) from {history_file} to {output}")
+    return rows
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", text).strip("_")[:80] or "item"
+
+
+def _chart_name(search: str, item: str) -> str:
+    """
+    File name of an item's chart. Slugs are cut to 80 characters, so a
+    hash of the full search and item keeps long titles sharing a prefix
+    from overwriting each other.
+    """
+    digest = hashlib.sha1(f"{search}\0{item}".encode()).hexdigest()[:8]
+    return f"{_slug(search)}__{_slug(item)}__{digest}.png"
+
+
+def plot_item(path: str, search: str, item: str, data: dict) -> str:
+    """
+    Renders one item's downsampled series to a PNG. Module level so
+    process pools can pickle it; matplotlib is imported in the worker.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    frame = pd.DataFrame(data)
+    figure, axes = plt.subplots(figsize=(10, 4))
+    try:
+        axes.fill_between(frame["time"], frame["low"], frame["high"],
+                          step="post", alpha=0.2, label="low/high")
+        axes.step(frame["time"], frame["close"], where="post",
+                  label="close")
+        out = frame[~frame["in_stock"]]
+        axes.scatter(out["time"], out["close"], marker="x", color="red",
+                     zorder=3, label="out of stock")
+        axes.set_title(f"[{search}] {item}", fontsize=10)
+        axes.set_ylabel("Price")
+        axes.grid(alpha=0.3)
+        axes.legend(loc="best", fontsize=8)
+        figure.autofmt_xdate()
+        figure.tight_layout()
+        figure.savefig(path, dpi=100)
+    finally:
+        plt.close(figure)
+    return path
+
+
+def plot(
+        history_file: str,
+        output_dir: str,
+        resample: str = "1D",
+        workers: int | None = None,
+        chunksize: int = 50000,
+        **filters
+        ) -> list[str]:
+    """
+    Renders a price chart per item, <search>__<item>__<hash>.png in
+    output_dir (see _chart_name()).
+    Items are streamed and downsampled in this process and rendered in a
+    process pool, with at most two charts per worker in flight. Needs
+    matplotlib. Returns the chart paths.
+    """
+    if importlib.util.find_spec("matplotlib") is None:
+        raise ValueError("matplotlib is required to plot price history")
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    paths = []
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for frame in read_items(history_file, chunksize=chunksize,
+                                **filters):
+            sampled = downsample(frame, resample)
+            search, item = sampled["search"].iat[0], sampled["item"].iat[0]
+            path = os.path.join(output_dir, _chart_name(search, item))
+            columns = sampled[["time", "low", "high", "close", "in_stock"]]
+            pending.add(executor.submit(plot_item, path, search, item,
+                                        columns.to_dict("list")))
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                paths += _collect(finished)
+        paths += _collect(wait(pending)[0])
+
+    logger.info(f"Plotted {len(paths)} item(s) to {output_dir}")
+    return sorted(paths)
+
+
+def _collect(futures) -> list[str]:
+    paths = []
+    for future in futures:
+        try:
+            paths.append(future.result())
+        except Exception as e:
+            logger.exception(f"Unable to plot an item: {e}")
+    return paths
@@ -0,0 +1,431 @@
+import datetime as dt
+import logging
+import sqlite3
+from statistics import median
+import threading
+
+import pandas as pd
+
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+
+def end_bound(end: str) -> tuple[str, str]:
+    """
+    Returns the SQL operator and value for an inclusive end bound on ISO
+    time or day columns. A date-only end covers the whole day, so it
+    becomes "< next day", times on the end day compare greater than the
+    bare date.
+    """
+    try:
+        day = dt.date.fromisoformat(end)
+    except ValueError:
+        return "<=", end
+    return "<", (day + dt.timedelta(days=1)).isoformat()
+
+
+class PriceHistory:
+    """
+    Indexed price history backed by SQLite with per-item rollups.
+
+    Every write appends the raw rows and updates two rollup tables in the
+    same transaction, so queries read the small rollups instead of
+    rescanning the raw history:
+        daily = open/high/low/close, sum and count per item per day
+        items = first/last seen, last price/stock, last time in stock and
+                the all time low per item
+    A changes table keeps a log of listing, price and stock changes.
+
+    Items are identified by (search, item), the target_id() and the item
+    title.
+
+    Attributes:
+    history_file = path to the SQLite database
+    conn = sqlite3 connection, shared between threads behind lock
+    medians = cache of median_closes() results, refreshed daily
+
+    Methods:
+    record(): saves a list of Items and updates the rollups
+    price_series(): raw or daily price series for an item
+    window_stats(): min/max/avg price for an item over the last n days
+    median_closes(): median daily close of every item of a search
+    all_time_low(): lowest price ever seen and when
+    days_since_in_stock(): days since an item was last seen in stock
+    change_rate(): share of a search's scrapes that logged a change
+    snapshot(): the Items of one past scrape of a search
+    item_stats(): the rollup row for an item
+    latest(): the last seen row of every item, optionally for one search
+    record_changes(): appends Change events to the change log
+    rename_search(): moves a search's rows over to a new search
+    recent_changes(): newest change log rows
+    import_csv(): backfills history from an existing data.csv
+    """
+
+    def __init__(self, history_file: str):
+        self.history_file = history_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(history_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # Lets exports and other readers run alongside scrapes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.medians = {}
+        self._create_tables()
+
+    def __repr__(self):
+        return f"PriceHistory(history_file={self.history_file!r})"
+
+    def _create_tables(self):
+        with self.lock, self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS prices (
+                    search TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    price INTEGER NOT NULL,
+                    stock INTEGER NOT NULL,
+                    link TEXT
+                );
+                CREATE INDEX IF NOT EXISTS prices_item_time
+                    ON prices (search, item, time);
+
+                CREATE TABLE IF NOT EXISTS daily (
+                    search TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    open INTEGER NOT NULL,
+                    high INTEGER NOT NULL,
+                    low INTEGER NOT NULL,
+                    close INTEGER NOT NULL,
+                    total INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    in_stock INTEGER NOT NULL,
+                    PRIMARY KEY (search, item, day)
+                );
+
+                CREATE TABLE IF NOT EXISTS items (
+                    search TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    last_price INTEGER NOT NULL,
+                    last_stock INTEGER NOT NULL,
+                    last_in_stock TEXT,
+                    all_time_low INTEGER NOT NULL,
+                    all_time_low_time TEXT NOT NULL,
+                    link TEXT,
+                    PRIMARY KEY (search, item)
+                );
+
+                CREATE TABLE IF NOT EXISTS changes (
+                    time TEXT NOT NULL,
+                    search TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    old INTEGER,
+                    new INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS changes_time
+                    ON changes (time);
+                """
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def record(self, name: str, items: list[Item]):
+        """
+        Appends items to the raw history and updates the daily and per-item
+        rollups incrementally.
+        """
+        if not items:
+            return
+
+        rows = [
+            (name, item.item, item.time, item.price, int(bool(item.stock)),
+             item.link)
+            for item in items
+        ]
+
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO prices VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self.conn.executemany(
+                    """
+                    INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (search, item, day) DO UPDATE SET
+                        high = max(high, excluded.high),
+                        low = min(low, excluded.low),
+                        close = excluded.close,
+                        total = total + excluded.total,
+                        count = count + 1,
+                        in_stock = max(in_stock, excluded.in_stock)
+                    """,
+                    [
+                        (search, item, time[:10], price, price, price, price,
+                         price, stock)
+                        for search, item, time, price, stock, _ in rows
+                    ],
+                )
+                self.conn.executemany(
+                    """
+                    INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (search, item) DO UPDATE SET
+                        last_seen = excluded.last_seen,
+                        last_price = excluded.last_price,
+                        last_stock = excluded.last_stock,
+                        last_in_stock = coalesce(excluded.last_in_stock,
+                                                 last_in_stock),
+                        all_time_low_time = CASE
+                            WHEN excluded.all_time_low < all_time_low
+                            THEN excluded.all_time_low_time
+                            ELSE all_time_low_time END,
+                        all_time_low = min(all_time_low,
+                                           excluded.all_time_low),
+                        link = excluded.link
+                    """,
+                    [
+                        (search, item, time, time, price, stock,
+                         time if stock else None, price, time, link)
+                        for search, item, time, price, stock, link in rows
+                    ],
+                )
+            logger.debug("[%s] %d items saved to history", name, len(rows),
+                         extra={"target": name, "stage": "history"})
+        except Exception as e:
+            logger.exception(
+                f"Error saving [{name}] to {self.history_file}: {e}"
+                )
+
+    def record_changes(self, changes: list):
+        """
+        Appends Change events to the change log.
+        """
+        rows = [change.as_dict() for change in changes]
+        try:
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO changes VALUES "
+                    "(:time, :search, :item, :kind, :old, :new)", rows
+                )
+        except Exception as e:
+            logger.exception(
+                f"Error saving changes to {self.history_file}: {e}"
+                )
+
+    def rename_search(self, old: str, new: str) -> bool:
+        """
+        Moves every row of search old over to search new, unless new
+        already has history. Returns whether anything was moved.
+        """
+        with self.lock, self.conn:
+            if self.conn.execute(
+                    "SELECT 1 FROM items WHERE search = ? LIMIT 1", (new,)
+                    ).fetchone():
+                return False
+            moved = 0
+            for table in ("prices", "daily", "items", "changes"):
+                moved += self.conn.execute(
+                    f"UPDATE {table} SET search = ? WHERE search = ?",
+                    (new, old)
+                    ).rowcount
+        if moved:
+            self.medians.clear()
+            logger.info(f"Moved history of [{old}] to [{new}]")
+        return bool(moved)
+
+    def recent_changes(self,
+                       limit: int = 100,
+                       search: str | None = None) -> list[dict]:
+        """
+        Returns the newest change log rows, newest first.
+        """
+        query = "SELECT * FROM changes"
+        params = []
+        if search is not None:
+            query += " WHERE search = ?"
+            params.append(search)
+        query += " ORDER BY time DESC, rowid DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(query, params)]
+
+    def price_series(
+            self,
+            search: str,
+            item: str,
+            start: str | None = None,
+            end: str | None = None,
+            resolution: str = "raw"
+            ) -> list[dict]:
+        """
+        Returns the price series for an item, oldest first.
+
+        resolution = "raw" for every scrape as dicts of time, price, stock
+                     "daily" for daily rollups as dicts of day, open, high,
+                     low, close, avg, in_stock
+        start/end = optional ISO date or datetime bounds (inclusive)
+        """
+        if resolution == "daily":
+            query = ("SELECT day, open, high, low, close, "
+                     "1.0 * total / count AS avg, in_stock "
+                     "FROM daily WHERE search = ? AND item = ?")
+            column = "day"
+        else:
+            query = ("SELECT time, price, stock FROM prices "
+                     "WHERE search = ? AND item = ?")
+            column = "time"
+
+        params = [search, item]
+        if start:
+            query += f" AND {column} >= ?"
+            params.append(start)
+        if end:
+            operator, end = end_bound(end)
+            query += f" AND {column} {operator} ?"
+            params.append(end)
+        query += f" ORDER BY {column}"
+
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(query, params)]
+
+    def window_stats(self, search: str, item: str, days: int) -> dict | None:
+        """
+        Returns min, max and avg price for an item over the last n days
+        from the daily rollups, or None if there is no data in the window.
+        """
+        start = (dt.date.today() - dt.timedelta(days=days)).isoformat()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT min(low) AS min, max(high) AS max, "
+                "1.0 * sum(total) / sum(count) AS avg, sum(count) AS count "
+                "FROM daily WHERE search = ? AND item = ? AND day >= ?",
+                (search, item, start)
+            ).fetchone()
+        return dict(row) if row["count"] else None
+
+    def median_closes(self, search: str, days: int) -> dict[str, float]:
+        """
+        Returns item: median daily closing price over the last n full days
+        for every item of a search, from the daily rollups. Today is left
+        out while its close still moves, so the result is read once per
+        search and day and cached.
+        """
+        today = dt.date.today()
+        cached = self.medians.get((search, days))
+        if cached and cached[0] == today:
+            return cached[1]
+        start = (today - dt.timedelta(days=days)).isoformat()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT item, close FROM daily WHERE search = ? "
+                "AND day >= ? AND day < ?",
+                (search, start, today.isoformat())
+            ).fetchall()
+        closes = {}
+        for row in rows:
+            closes.setdefault(row["item"], []).append(row["close"])
+        medians = {item: median(values) for item, values in closes.items()}
+        self.medians[(search, days)] = (today, medians)
+        return medians
+
+    def item_stats(self, search: str, item: str) -> dict | None:
+        """
+        Returns the rollup row of an item or None if it has never been seen.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM items WHERE search = ? AND item = ?",
+                (search, item)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def all_time_low(self, search: str, item: str) -> tuple[int, str] | None:
+        """
+        Returns (price, time) of the lowest price ever recorded for an item.
+        """
+        if stats := self.item_stats(search, item):
+            return stats["all_time_low"], stats["all_time_low_time"]
+        return None
+
+    def days_since_in_stock(self, search: str, item: str) -> int | None:
+        """
+        Returns the number of days since the item was last seen in stock,
+        or None if it has never been in stock.
+        """
+        stats = self.item_stats(search, item)
+        if not stats or not stats["last_in_stock"]:
+            return None
+        last_in_stock = dt.datetime.fromisoformat(stats["last_in_stock"])
+        return (dt.datetime.now() - last_in_stock).days
+
+    def change_rate(self, search: str, days: int,
+                    min_scrapes: int = 5) -> float | None:
+        """
+        Returns the share of scrapes of a search over the last n days that
+        logged at least one change, or None with fewer than min_scrapes
+        scrapes. Scrapes are told apart by their time, which every item
+        and change of one scrape shares.
+        """
+        start = (dt.datetime.now() - dt.timedelta(days=days)).isoformat()
+        with self.lock:
+            scrapes = self.conn.execute(
+                "SELECT count(DISTINCT time) FROM prices "
+                "WHERE search = ? AND time >= ?", (search, start)
+            ).fetchone()[0]
+            changed = self.conn.execute(
+                "SELECT count(DISTINCT time) FROM changes "
+                "WHERE search = ? AND time >= ?", (search, start)
+            ).fetchone()[0]
+        if scrapes < max(min_scrapes, 1):
+            return None
+        return min(changed / scrapes, 1.0)
+
+    def snapshot(self, search: str, back: int = 0) -> list[Item] | None:
+        """
+        Returns the Items recorded by a search's scrape from back scrapes
+        ago (0 is the newest), or None if there are not that many.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM prices WHERE search = ? AND time = ("
+                "SELECT DISTINCT time FROM prices WHERE search = ? "
+                "ORDER BY time DESC LIMIT 1 OFFSET ?) ORDER BY rowid",
+                (search, search, back)
+            ).fetchall()
+        if not rows:
+            return None
+        return [Item(search, row["time"], row["item"], row["price"],
+                     bool(row["stock"]), row["link"]) for row in rows]
+
+    def latest(self, search: str | None = None) -> list[dict]:
+        """
+        Returns the rollup row of every item, optionally for one search.
+        """
+        query = "SELECT * FROM items"
+        params = []
+        if search is not None:
+            query += " WHERE search = ?"
+            params.append(search)
+        query += " ORDER BY search, item"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(query, params)]
+
+    def import_csv(self, data_file: str, search: str = "",
+                   chunksize: int = 10000):
+        """
+        Backfills history from a data.csv written by DataManager.save_to_csv.
+        The CSV doesn't store the search name so all rows are recorded under
+        the given search.
+        """
+        for chunk in pd.read_csv(data_file, index_col=0, chunksize=chunksize):
+            self.record(search, [
+                Item(search, row.time, row.item, int(row.price),
+                     bool(row.stock), row.link)
+                for row in chunk.itertuples(index=False)
+            ])
+        logger.info(f"Imported {data_file} into {self.history_file}")
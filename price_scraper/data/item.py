@@ -12,6 +12,7 @@ class Item():
 
     Methods:
     as_dict(): returns attributes in dict format
+    from_dict(): builds an Item from as_dict() output
     """
     def __init__(
         self,
@@ -72,6 +73,21 @@ class Item():
             "link": self.link
         }
 
+    @classmethod
+    def from_dict(cls, data: dict, search: str = "") -> "Item":
+        """
+        Builds an Item from as_dict() output. search is used when the
+        dict doesn't carry one.
+        """
+        return cls(
+            search=data.get("search", search),
+            time=data["time"],
+            item=data["item"],
+            price=data["price"],
+            stock=data["stock"],
+            link=data["link"]
+        )
+
     @property
     def mdlink(self) -> str:
         """
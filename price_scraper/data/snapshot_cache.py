@@ -0,0 +1,116 @@
+from collections import OrderedDict, deque
+import logging
+import sys
+import threading
+
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+
+def items_size(items: tuple[Item, ...] | None) -> int:
+    """
+    Rough size in bytes of a snapshot: the Item objects, their attribute
+    dicts and strings, and the dict holding them. Shared strings are
+    counted once per item, so this errs on the high side.
+    """
+    if not items:
+        return 0
+    size = sys.getsizeof(items)
+    for item in items:
+        size += sys.getsizeof(item) + sys.getsizeof(vars(item))
+        size += sum(sys.getsizeof(value) for value in vars(item).values())
+    return size
+
+
+class SnapshotCache:
+    """
+    Bounded in-memory cache of the last few scrapes of every target, so a
+    resident process compares, checks rules and answers API reads from
+    memory. Callers fall back to the persistent store on a miss.
+
+    Targets are keyed by target_id(), names aren't unique. Each target
+    keeps up to depth snapshots, newest first. A snapshot is a
+    tuple of the scraped Items in page order, listings that share a title
+    are all kept. When
+    the estimated size passes max_bytes the oldest snapshot of the least
+    recently used target is evicted first.
+
+    Attributes:
+    max_bytes = size budget for all snapshots
+    depth = snapshots kept per target
+    size = current estimated size in bytes
+
+    Methods:
+    put() = adds a target's newest snapshot
+    get() = a target's Item list, back snapshots ago, KeyError on a miss
+    stats() = hit/miss/eviction counters and size
+    """
+
+    def __init__(self, max_bytes: int, depth: int = 3):
+        self.max_bytes = max_bytes
+        self.depth = depth
+        self.size = 0
+        self.targets = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return (f"SnapshotCache(max_bytes={self.max_bytes!r}, "
+                f"depth={self.depth!r}, size={self.size!r})")
+
+    def __len__(self):
+        return len(self.targets)
+
+    def put(self, key: str, items: list[Item] | None):
+        """
+        Adds a target's newest snapshot. None records a failed scrape,
+        the same as the last scrape file does.
+        """
+        snapshot = None if items is None else tuple(items)
+        size = items_size(snapshot)
+        with self.lock:
+            snapshots = self.targets.setdefault(key, deque())
+            self.targets.move_to_end(key)
+            snapshots.appendleft((snapshot, size))
+            self.size += size
+            while len(snapshots) > self.depth:
+                self.size -= snapshots.pop()[1]
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and self.targets:
+            key, snapshots = next(iter(self.targets.items()))
+            self.size -= snapshots.pop()[1]
+            self.evictions += 1
+            if not snapshots:
+                del self.targets[key]
+
+    def get(self, key: str, back: int = 0) -> list[Item] | None:
+        """
+        Returns a target's Item list from back snapshots ago (0 is the
+        newest). Raises KeyError when it isn't cached.
+        """
+        with self.lock:
+            snapshots = self.targets.get(key)
+            if snapshots is None or back >= len(snapshots):
+                self.misses += 1
+                raise KeyError(key)
+            self.targets.move_to_end(key)
+            self.hits += 1
+            snapshot = snapshots[back][0]
+        return None if snapshot is None else list(snapshot)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "targets": len(self.targets),
+                "snapshots": sum(map(len, self.targets.values())),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
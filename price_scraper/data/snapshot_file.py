@@ -0,0 +1,258 @@
+from array import array
+from itertools import accumulate
+import json
+import logging
+import mmap
+import pickle
+import struct
+import sys
+
+from price_scraper.data.checkpoint import atomic_write
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PSNP"
+VERSION = 1
+# magic, format version, header length
+PREAMBLE = struct.Struct("<4sHI")
+ALIGN = 8
+
+# Column name: array typecode. Strings are stored as uint32 end offsets into
+# a UTF-8 blob, plus a byte per row marking None values
+COLUMNS = {
+    "price": "q",
+    "stock": "B",
+    "time": "str",
+    "item": "str",
+    "link": "str",
+}
+
+
+def _pad(size: int) -> int:
+    return -size % ALIGN
+
+
+def encode_snapshot(snapshot: dict[str, list[Item] | None]) -> bytes:
+    """
+    Encodes a snapshot (target key: Item list, None for a failed scrape)
+    in the columnar snapshot format:
+
+        PREAMBLE   magic, version, header length
+        header     JSON: rows, byte order, targets as [name, first row,
+                   rows] (rows None for a failed scrape) and every
+                   column's type, offset and length
+        columns    8 byte aligned: price int64, stock uint8, and for
+                   time/item/link uint32 end offsets, a UTF-8 blob and a
+                   None mask
+
+    Item.search isn't stored, items are tagged with their target's key.
+    """
+    targets, rows = [], []
+    for name, items in snapshot.items():
+        targets.append([name, len(rows), None if items is None
+                        else len(items)])
+        rows.extend(items or ())
+
+    buffers = {
+        "price": array("q", [item.price for item in rows]).tobytes(),
+        "stock": bytes(bool(item.stock) for item in rows),
+    }
+    for column in ("time", "item", "link"):
+        values = [getattr(item, column) for item in rows]
+        encoded = [b"" if value is None else str(value).encode()
+                   for value in values]
+        buffers[f"{column}.offsets"] = array(
+            "I", accumulate(map(len, encoded))).tobytes()
+        buffers[f"{column}.data"] = b"".join(encoded)
+        buffers[f"{column}.nulls"] = bytes(value is None for value in values)
+
+    layout, offset = {}, 0
+    for key, data in buffers.items():
+        layout[key] = [offset, len(data)]
+        offset += len(data) + _pad(len(data))
+
+    header = json.dumps({
+        "rows": len(rows),
+        "byteorder": sys.byteorder,
+        "targets": targets,
+        "columns": COLUMNS,
+        "layout": layout,
+    }).encode()
+    header += b" " * _pad(PREAMBLE.size + len(header))
+
+    parts = [PREAMBLE.pack(MAGIC, VERSION, len(header)), header]
+    for data in buffers.values():
+        parts.append(data)
+        parts.append(b"\0" * _pad(len(data)))
+    return b"".join(parts)
+
+
+class SnapshotFile:
+    """
+    Reads a snapshot in the columnar format, by default through a read
+    only memory map. Nothing is decoded until asked for: prices() and
+    stock() are zero-copy views over the mapped file, items() builds Item
+    objects for one target, to_dict() for all of them.
+
+    Files from a newer format version raise ValueError. Columns a version
+    adds are ignored by older readers. Views from prices() and stock()
+    have to be released before close().
+
+    Attributes:
+    file_name = path of the snapshot file
+    rows = number of items across all targets
+    targets = dict of target key: (first row, rows), rows None when the
+              target's scrape failed
+
+    Methods:
+    prices() = memoryview of a target's int64 prices
+    stock() = memoryview of a target's in stock flags
+    items() = a target's Item list
+    to_dict() = the whole snapshot as target key: Item list
+    close() = releases the map
+    """
+
+    def __init__(self, file_name: str | None = None, use_mmap: bool = True,
+                 data: bytes | None = None):
+        self.file_name = file_name
+        self.map = None
+        if data is None:
+            with open(file_name, "rb") as file:
+                if use_mmap:
+                    self.map = mmap.mmap(file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+                    data = self.map
+                else:
+                    data = file.read()
+        self.buffer = memoryview(data)
+        self._read_header()
+
+    def __repr__(self):
+        return (f"SnapshotFile(file_name={self.file_name!r}, "
+                f"rows={self.rows!r})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_header(self):
+        if len(self.buffer) < PREAMBLE.size:
+            raise ValueError(f"{self.file_name} is not a snapshot file")
+        magic, version, header_size = PREAMBLE.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{self.file_name} is not a snapshot file")
+        if version > VERSION:
+            raise ValueError(f"{self.file_name} is snapshot format version "
+                             f"{version}, this reader supports {VERSION}")
+        start = PREAMBLE.size
+        header = json.loads(bytes(self.buffer[start:start + header_size]))
+        self.data_start = start + header_size
+        self.rows = header["rows"]
+        self.layout = header["layout"]
+        self.swap = header["byteorder"] != sys.byteorder
+        self.targets = {name: (first, rows)
+                        for name, first, rows in header["targets"]}
+
+    def _column(self, key: str, typecode: str):
+        offset, length = self.layout[key]
+        start = self.data_start + offset
+        view = self.buffer[start:start + length]
+        if typecode == "B":
+            return view
+        if self.swap:
+            values = array(typecode, view)
+            values.byteswap()
+            return memoryview(values)
+        return view.cast(typecode)
+
+    def _range(self, name: str) -> tuple[int, int]:
+        first, rows = self.targets[name]
+        return first, first + (rows or 0)
+
+    def prices(self, name: str) -> memoryview:
+        start, end = self._range(name)
+        return self._column("price", "q")[start:end]
+
+    def stock(self, name: str) -> memoryview:
+        start, end = self._range(name)
+        return self._column("stock", "B")[start:end]
+
+    def _strings(self, column: str, start: int, end: int) -> list:
+        offsets = self._column(f"{column}.offsets", "I")
+        base = offsets[start - 1] if start else 0
+        ends = [offset - base for offset in offsets[start:end].tolist()]
+        starts = [0] + ends[:-1]
+        data = bytes(self._column(f"{column}.data", "B")[
+            base:base + (ends[-1] if ends else 0)])
+        # ASCII text has the same offsets as its bytes, so it is decoded in
+        # one go and sliced
+        if data.isascii():
+            text = data.decode()
+            values = [text[a:b] for a, b in zip(starts, ends)]
+        else:
+            values = [data[a:b].decode() for a, b in zip(starts, ends)]
+        nulls = self._column(f"{column}.nulls", "B")[start:end]
+        if any(nulls):
+            values = [None if null else value
+                      for value, null in zip(values, nulls)]
+        return values
+
+    def items(self, name: str) -> list[Item] | None:
+        """
+        Returns a target's Item list, None if its scrape failed. Raises
+        KeyError for a target that isn't in the snapshot.
+        """
+        if self.targets[name][1] is None:
+            return None
+        start, end = self._range(name)
+        return [
+            Item(name, time, item, price, bool(stock), link)
+            for time, item, price, stock, link in zip(
+                self._strings("time", start, end),
+                self._strings("item", start, end),
+                self.prices(name).tolist(),
+                self.stock(name).tolist(),
+                self._strings("link", start, end))
+        ]
+
+    def to_dict(self) -> dict[str, list[Item] | None]:
+        return {name: self.items(name) for name in self.targets}
+
+    def close(self):
+        self.buffer.release()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+def write_snapshot(file_name: str, snapshot: dict[str, list[Item] | None]):
+    """
+    Atomically writes a snapshot file.
+    """
+    atomic_write(file_name, encode_snapshot(snapshot))
+
+
+def read_snapshot(file_name: str) -> dict[str, list[Item] | None]:
+    """
+    Reads a whole snapshot file into a dict of target key: Item list.
+    """
+    with SnapshotFile(file_name) as snapshot:
+        return snapshot.to_dict()
+
+
+def convert_pickle(pickle_file: str, snapshot_file: str) -> int:
+    """
+    Converts a last scrape pickle to the snapshot format and returns the
+    number of targets. Only convert pickles you trust, loading one can run
+    arbitrary code.
+    """
+    with open(pickle_file, "rb") as file:
+        snapshot = pickle.load(file)
+    if not isinstance(snapshot, dict):
+        raise ValueError(f"{pickle_file} doesn't hold a snapshot dict")
+    write_snapshot(snapshot_file, snapshot)
+    logger.info(f"Converted {pickle_file} to {snapshot_file}")
+    return len(snapshot)
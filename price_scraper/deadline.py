@@ -0,0 +1,64 @@
+import math
+import time
+
+
+class Deadline:
+    """
+    A point in time work has to finish by, passed down from the cycle to
+    each target and on to its requests, dwell waits and retry sleeps so no
+    single step can outlast the budget it was given.
+
+    Attributes:
+    budget = seconds the deadline was created with, None for no limit
+    expires = time.monotonic() value it expires at, inf for no limit
+
+    Methods:
+    remaining() = seconds left, never below zero
+    expired() = True once no time is left
+    limit() = a timeout capped to the time left
+    sleep() = sleeps, cut short by the deadline
+    child() = a deadline for a sub task, never later than this one
+    """
+
+    def __init__(self, budget: float | None = None):
+        self.budget = budget
+        self.expires = (math.inf if budget is None
+                        else time.monotonic() + budget)
+
+    def __repr__(self):
+        return (f"Deadline(budget={self.budget!r}, "
+                f"remaining={self.remaining():.1f})")
+
+    def remaining(self) -> float:
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def limit(self, timeout: float | None) -> float | None:
+        """
+        Caps a timeout to the time left. None (no timeout) only stays None
+        without a deadline.
+        """
+        if math.isinf(self.expires):
+            return timeout
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        Sleeps for seconds or until the deadline, whichever comes first.
+        Returns False if the deadline cut the sleep short.
+        """
+        wait = min(seconds, self.remaining())
+        if wait > 0:
+            time.sleep(wait)
+        return wait >= seconds
+
+    def child(self, budget: float | None) -> "Deadline":
+        """
+        Returns a deadline budget seconds from now, capped to this one.
+        """
+        child = Deadline(budget)
+        child.expires = min(child.expires, self.expires)
+        return child
@@ -0,0 +1,553 @@
+from abc import abstractmethod
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """
+    Interface of the shared queue between a Coordinator and its Workers.
+    A task is one page to scrape: a group of targets sharing a url and
+    scrape type, as grouped by ScrapeManager.group_targets.
+
+    Workers lease a task for lease_time seconds and must complete, fail or
+    extend it before the lease runs out. An expired lease means the worker
+    died, so the task goes back on the queue until it has been tried
+    max_attempts times.
+
+    Other backends (e.g. Redis) implement these methods and are added to
+    WorkQueues.lookup.
+
+    Attributes:
+    shared = True when separate processes can use the queue, only shared
+             backends are offered on the command line
+
+    Only one cycle is queued at a time: put() drops the tasks of any other
+    cycle, which a crashed coordinator left behind and will never merge,
+    so workers don't keep scraping them ahead of the current cycle.
+
+    Methods:
+    put() = enqueues a cycle's tasks, dropping other cycles' tasks
+    lease() = hands the next queued task to a worker
+    extend() = renews a worker's lease on a task
+    complete() = stores a task's result
+    fail() = gives a task back to the queue, or fails it for good
+    pending() = number of unfinished tasks in a cycle
+    results() = dict of task key: result for a cycle, None for failed tasks
+    clear() = deletes a merged cycle's tasks
+    """
+
+    shared = True
+
+    def __init__(self, lease_time: float, max_attempts: int):
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    def put(self, cycle: str, tasks: dict[str, dict]):
+        pass
+
+    @abstractmethod
+    def lease(self, worker: str) -> tuple[int, dict] | None:
+        pass
+
+    @abstractmethod
+    def extend(self, task_id: int, worker: str) -> bool:
+        pass
+
+    @abstractmethod
+    def complete(self, task_id: int, worker: str, result: dict) -> bool:
+        pass
+
+    @abstractmethod
+    def fail(self, task_id: int, worker: str, error: str):
+        pass
+
+    @abstractmethod
+    def pending(self, cycle: str) -> int:
+        pass
+
+    @abstractmethod
+    def results(self, cycle: str) -> dict[str, dict | None]:
+        pass
+
+    @abstractmethod
+    def clear(self, cycle: str):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue in a SQLite file, shared by processes on one host. Leasing
+    runs in an IMMEDIATE transaction so the database lock guarantees a task
+    is only ever handed to one worker. WAL mode needs shared memory, so
+    the file can't live on a network filesystem.
+
+    Attributes:
+    queue_file = path to the SQLite database
+    """
+
+    def __init__(self,
+                 queue_file: str,
+                 lease_time: float = 120,
+                 max_attempts: int = 3):
+        super().__init__(lease_time, max_attempts)
+        self.queue_file = queue_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(queue_file, timeout=30,
+                                    isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                cycle TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                UNIQUE (cycle, key)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, id);
+            """
+        )
+
+    def __repr__(self):
+        return f"SQLiteWorkQueue(queue_file={self.queue_file!r})"
+
+    def _transaction(self, query: str, params: tuple = ()):
+        """
+        Runs a write in an IMMEDIATE transaction and returns the cursor.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self.conn.execute(query, params)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return cursor
+
+    def put(self, cycle: str, tasks: dict[str, dict]):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM tasks WHERE cycle != ?",
+                                  (cycle,))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tasks (cycle, key, payload, state) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(cycle, key, json.dumps(payload), QUEUED)
+                     for key, payload in tasks.items()]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def lease(self, worker: str) -> tuple[int, dict] | None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases belong to dead workers
+                self.conn.execute(
+                    "UPDATE tasks SET state = CASE WHEN attempts >= ? "
+                    "THEN ? ELSE ? END, worker = NULL, "
+                    "error = 'lease expired' "
+                    "WHERE state = ? AND lease_expires < ?",
+                    (self.max_attempts, FAILED, QUEUED, LEASED, now)
+                )
+                row = self.conn.execute(
+                    "SELECT id, payload FROM tasks WHERE state = ? "
+                    "ORDER BY id LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE tasks SET state = ?, worker = ?, "
+                        "lease_expires = ?, attempts = attempts + 1 "
+                        "WHERE id = ?",
+                        (LEASED, worker, now + self.lease_time, row["id"])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row["id"], json.loads(row["payload"])
+
+    def extend(self, task_id: int, worker: str) -> bool:
+        cursor = self._transaction(
+            "UPDATE tasks SET lease_expires = ? "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            (time.time() + self.lease_time, task_id, worker, LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker: str, result: dict) -> bool:
+        cursor = self._transaction(
+            "UPDATE tasks SET state = ?, result = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            (DONE, json.dumps(result), task_id, worker, LEASED)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker: str, error: str):
+        self._transaction(
+            "UPDATE tasks SET state = CASE WHEN attempts >= ? "
+            "THEN ? ELSE ? END, worker = NULL, lease_expires = NULL, "
+            "error = ? WHERE id = ? AND worker = ? AND state = ?",
+            (self.max_attempts, FAILED, QUEUED, error, task_id, worker,
+             LEASED)
+        )
+
+    def pending(self, cycle: str) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT count(*) FROM tasks WHERE cycle = ? "
+                "AND state IN (?, ?)", (cycle, QUEUED, LEASED)
+            ).fetchone()[0]
+
+    def results(self, cycle: str) -> dict[str, dict | None]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, state, result FROM tasks WHERE cycle = ?",
+                (cycle,)
+            ).fetchall()
+        return {row["key"]: json.loads(row["result"])
+                if row["state"] == DONE else None for row in rows}
+
+    def clear(self, cycle: str):
+        self._transaction("DELETE FROM tasks WHERE cycle = ?", (cycle,))
+
+
+class MemoryWorkQueue(WorkQueue):
+    """
+    In-process WorkQueue with the same lease semantics as the shared
+    backends. Stands in for a Redis-like queue when coordinator and
+    workers run as threads of one process, so it isn't offered on the
+    command line.
+    """
+
+    shared = False
+
+    def __init__(self, lease_time: float = 120, max_attempts: int = 3):
+        super().__init__(lease_time, max_attempts)
+        self.tasks = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"MemoryWorkQueue(tasks={len(self.tasks)!r})"
+
+    def put(self, cycle: str, tasks: dict[str, dict]):
+        with self.lock:
+            self.tasks = {task_id: task
+                          for task_id, task in self.tasks.items()
+                          if task["cycle"] == cycle}
+            known = {task["key"] for task in self.tasks.values()}
+            for key, payload in tasks.items():
+                if key in known:
+                    continue
+                self.tasks[self.next_id] = {
+                    "cycle": cycle, "key": key, "payload": payload,
+                    "state": QUEUED, "worker": None, "lease_expires": None,
+                    "attempts": 0, "result": None, "error": None,
+                }
+                self.next_id += 1
+
+    def _requeue(self, task: dict, error: str):
+        task["state"] = (FAILED if task["attempts"] >= self.max_attempts
+                         else QUEUED)
+        task["worker"] = None
+        task["lease_expires"] = None
+        task["error"] = error
+
+    def _owned(self, task_id: int, worker: str) -> dict | None:
+        task = self.tasks.get(task_id)
+        if task and task["state"] == LEASED and task["worker"] == worker:
+            return task
+        return None
+
+    def lease(self, worker: str) -> tuple[int, dict] | None:
+        now = time.time()
+        with self.lock:
+            for task in self.tasks.values():
+                if task["state"] == LEASED and task["lease_expires"] < now:
+                    self._requeue(task, "lease expired")
+            for task_id, task in self.tasks.items():
+                if task["state"] == QUEUED:
+                    task.update(state=LEASED, worker=worker,
+                                lease_expires=now + self.lease_time,
+                                attempts=task["attempts"] + 1)
+                    return task_id, task["payload"]
+        return None
+
+    def extend(self, task_id: int, worker: str) -> bool:
+        with self.lock:
+            if task := self._owned(task_id, worker):
+                task["lease_expires"] = time.time() + self.lease_time
+                return True
+        return False
+
+    def complete(self, task_id: int, worker: str, result: dict) -> bool:
+        with self.lock:
+            if task := self._owned(task_id, worker):
+                task.update(state=DONE, result=result, lease_expires=None)
+                return True
+        return False
+
+    def fail(self, task_id: int, worker: str, error: str):
+        with self.lock:
+            if task := self._owned(task_id, worker):
+                self._requeue(task, error)
+
+    def pending(self, cycle: str) -> int:
+        with self.lock:
+            return sum(task["cycle"] == cycle
+                       and task["state"] in (QUEUED, LEASED)
+                       for task in self.tasks.values())
+
+    def results(self, cycle: str) -> dict[str, dict | None]:
+        with self.lock:
+            return {task["key"]: task["result"]
+                    if task["state"] == DONE else None
+                    for task in self.tasks.values() if task["cycle"] == cycle}
+
+    def clear(self, cycle: str):
+        with self.lock:
+            self.tasks = {task_id: task
+                          for task_id, task in self.tasks.items()
+                          if task["cycle"] != cycle}
+
+
+class WorkQueues:
+    """
+    Dictionary lookup table to get WorkQueue class by backend name
+    """
+    lookup = {
+        "sqlite": SQLiteWorkQueue,
+        "memory": MemoryWorkQueue,
+    }
+
+
+def task_key(url: str, scrape_type: str) -> str:
+    return f"{scrape_type}|{url}"
+
+
+class Coordinator:
+    """
+    Runs scrape cycles by handing pages to Workers through a WorkQueue
+    instead of scraping them itself. Everything after the fetch (data.csv,
+    rules, history, alerts, change events and the snapshot) still runs here
+    through the ScrapeManager, so results from every worker are merged
+    into one snapshot and one last scrape.
+
+    Attributes:
+    scrape_manager = ScrapeManager holding targets and the data pipeline
+    queue = WorkQueue shared with the workers
+    poll_interval = seconds between checks for finished tasks
+    cycle_timeout = seconds to wait for workers before giving up on the
+                    unfinished tasks of a cycle
+
+    Methods:
+    run() = runs one distributed scrape cycle
+    run_forever() = runs a cycle every interval seconds
+    """
+
+    def __init__(self,
+                 scrape_manager,
+                 queue: WorkQueue,
+                 poll_interval: float = 2,
+                 cycle_timeout: float = 3600):
+        self.scrape_manager = scrape_manager
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.cycle_timeout = cycle_timeout
+
+    def __repr__(self):
+        return f"Coordinator(queue={self.queue!r})"
+
+    def run(self):
+        manager = self.scrape_manager
+        targets = manager.begin_cycle()
+        # A resumed cycle keeps its id, so finished tasks are reused
+        cycle = manager.cycle_id
+        # Slowest pages first by historical cost, so workers lease them
+        # before the quick ones and the cycle finishes sooner
+        groups = {
+            task_key(url, scrape_type): group
+            for (url, scrape_type), group in sorted(
+                manager.group_targets(targets).items(),
+                key=lambda page: manager.costs.estimate(
+                    page[1], manager.resource(page[0][1])),
+                reverse=True)
+        }
+        self.queue.put(cycle, {
+            key: {"url": group[0]["url"],
+                  "scrape_type": group[0]["scrape_type"],
+                  "targets": group}
+            for key, group in groups.items()
+        })
+        logger.info(f"Cycle {cycle} queued {len(groups)} page(s)")
+
+        deadline = manager.cycle_deadline.child(self.cycle_timeout)
+        while (pending := self.queue.pending(cycle)):
+            if deadline.expired() or manager.stop_event.is_set():
+                logger.warning(f"Cycle {cycle} gave up on {pending} "
+                               "unfinished page(s)")
+                break
+            manager.stop_event.wait(self.poll_interval)
+
+        # Pages still unfinished, or out of time, leave their targets stale
+        results = self.queue.results(cycle)
+        for key, group in groups.items():
+            result = results.get(key)
+            if result is None or result.get("stale"):
+                manager.finish_group(group, None,
+                                     result["fetch"] if result else None,
+                                     stale=True)
+                continue
+            items = (None if result["items"] is None else
+                     [Item.from_dict(item) for item in result["items"]])
+            # Workers leave data.csv to the coordinator
+            if items:
+                names = dict.fromkeys(target["name"] for target in group)
+                manager.data_manager.save_to_csv(
+                    " / ".join(names), [item.as_dict() for item in items])
+            manager.finish_group(group, items, result["fetch"], stale=False)
+
+        manager.finish_cycle()
+        # Merged and committed, the cycle's tasks are no longer needed
+        self.queue.clear(cycle)
+        logger.info(f"Cycle {cycle} finished")
+
+    def run_forever(self, interval: int):
+        while not self.scrape_manager.stop_event.is_set():
+            try:
+                self.run()
+            except Exception as e:
+                logger.exception(f"Distributed scrape cycle failed: {e}")
+            self.scrape_manager.stop_event.wait(
+                self.scrape_manager.next_wait(interval))
+
+
+class Worker:
+    """
+    Leases pages from a WorkQueue, scrapes them and reports the items back.
+    The lease is renewed in the background while a scrape runs so slow
+    pages aren't handed to another worker. If the worker dies the lease
+    expires and the page is retried elsewhere.
+
+    Attributes:
+    scrape_manager = ScrapeManager used to build scrapes
+    queue = WorkQueue shared with the coordinator
+    worker_id = name of this worker in the queue
+    poll_interval = seconds to wait when the queue is empty
+
+    Methods:
+    work() = leases and scrapes one page, returns False if none was queued
+    run_forever() = works until stop() is called
+    """
+
+    def __init__(self,
+                 scrape_manager,
+                 queue: WorkQueue,
+                 worker_id: str | None = None,
+                 poll_interval: float = 2):
+        self.scrape_manager = scrape_manager
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+
+    def __repr__(self):
+        return f"Worker(worker_id={self.worker_id!r})"
+
+    def work(self) -> bool:
+        leased = self.queue.lease(self.worker_id)
+        if leased is None:
+            return False
+        task_id, task = leased
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(task_id, stop_heartbeat),
+            name=f"lease-{task_id}", daemon=True
+            )
+        heartbeat.start()
+        try:
+            result = self._scrape(task)
+        except Exception as e:
+            logger.exception(f"[{self.worker_id}] Task {task_id} failed: {e}")
+            self.queue.fail(task_id, self.worker_id, repr(e))
+            return True
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+
+        if not self.queue.complete(task_id, self.worker_id, result):
+            logger.warning(f"[{self.worker_id}] Lease on task {task_id} "
+                           "was lost before it completed")
+        return True
+
+    def _scrape(self, task: dict) -> dict:
+        manager = self.scrape_manager
+        fetch_start = time.monotonic()
+        scrape = manager.build_scrape(
+            task["targets"], task["url"], task["scrape_type"])
+        scrape.save_csv = False
+        with manager.profile(scrape.name, "scrape"):
+            items = scrape.scrape_items(
+                manager.target_deadline(task["targets"]))
+        fetch = {"duration": round(time.monotonic() - fetch_start, 3),
+                 "worker": self.worker_id}
+        fetch.update(getattr(scrape.requester, "stats", {}).get(
+            scrape.name, {}))
+        return {
+            "items": None if items is None else
+            [dict(item.as_dict(), search=item.search) for item in items],
+            "fetch": fetch,
+            "stale": scrape.stale,
+        }
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        while not stop.wait(self.queue.lease_time / 3):
+            if not self.queue.extend(task_id, self.worker_id):
+                return
+
+    def run_forever(self):
+        logger.info(f"{self!r} started")
+        while not self.scrape_manager.stop_event.is_set():
+            try:
+                if not self.work():
+                    # Queue drained, report what was profiled since
+                    if self.scrape_manager.profiler:
+                        self.scrape_manager.profiler.write()
+                    self.scrape_manager.stop_event.wait(self.poll_interval)
+            except Exception as e:
+                logger.exception(f"[{self.worker_id}] Worker error: {e}")
+                self.scrape_manager.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.scrape_manager.stop_event.set()
@@ -0,0 +1,156 @@
+import heapq
+import json
+import logging
+import time
+
+from price_scraper.data.checkpoint import atomic_write
+from price_scraper.target_config import target_id
+
+logger = logging.getLogger(__name__)
+
+
+def lpt_schedule(jobs: dict, workers: int) -> list[list]:
+    """
+    Longest processing time first: jobs (key: cost) are taken from the
+    most to the least costly and each goes to the worker with the least
+    work so far. Returns one list of keys per worker, in the order they
+    run. The makespan is within 4/3 of the best possible one.
+    """
+    bins = [[] for _ in range(max(workers, 1))]
+    loads = [(0.0, index) for index in range(len(bins))]
+    for key in sorted(jobs, key=jobs.get, reverse=True):
+        load, index = heapq.heappop(loads)
+        bins[index].append(key)
+        heapq.heappush(loads, (load + jobs[key], index))
+    return bins
+
+
+class CostModel:
+    """
+    Learns how long each target's page takes to scrape, and the resource
+    class it needs (see Requester.resource), so a cycle can be spread over
+    worker pools with the slowest pages started first.
+
+    Durations are a moving average of the whole fetch, retries and dwell
+    included. A target without history is assumed to cost the average of
+    its resource class, or defaults[resource] until a page of that class
+    has been scraped.
+
+    State is kept in a JSON file so it survives restarts and cron runs,
+    keyed by target_id() since target names aren't unique.
+
+    Attributes:
+    state_file = path of the JSON state file, None to keep it in memory
+    defaults = dict of resource class: seconds assumed for an unknown page
+    alpha = weight of the newest duration in the average
+    state = dict of target id: dict of duration, resource, samples and
+            last_run
+
+    Methods:
+    record() = records how long a target's page took
+    estimate() = expected seconds to scrape a group of targets' page
+    plan() = splits groups into resource pools, longest first
+    status() = cost of every target
+    save() = writes the state file
+    """
+
+    def __init__(
+        self,
+        state_file: str | None,
+        defaults: dict[str, float] | None = None,
+        alpha: float = 0.3
+    ):
+        self.state_file = state_file
+        self.defaults = defaults or {}
+        self.alpha = alpha
+        self.state = self._load()
+
+    def __repr__(self):
+        return (f"CostModel(state_file={self.state_file!r}, "
+                f"targets={len(self.state)!r})")
+
+    def _load(self) -> dict:
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, "rb") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.exception(f"Unreadable {self.state_file}, starting with "
+                             f"no scrape costs: {e}")
+            return {}
+
+    def save(self):
+        if not self.state_file:
+            return
+        try:
+            atomic_write(self.state_file,
+                         json.dumps(self.state, indent=1).encode())
+        except Exception as e:
+            logger.exception(f"Unable to save {self.state_file}: {e}")
+
+    def record(self, key: str, resource: str, duration: float,
+               now: float | None = None):
+        """
+        Records a page duration for the target with target_id() key.
+        """
+        entry = self.state.get(key)
+        if entry is None or entry["resource"] != resource:
+            entry = {"duration": duration, "resource": resource,
+                     "samples": 0}
+        else:
+            entry["duration"] += self.alpha * (duration - entry["duration"])
+        entry.update(duration=round(entry["duration"], 3),
+                     samples=entry["samples"] + 1,
+                     last_run=time.time() if now is None else now)
+        self.state[key] = entry
+
+    def _default(self, resource: str) -> float:
+        known = [entry["duration"] for entry in self.state.values()
+                 if entry["resource"] == resource]
+        if known:
+            return sum(known) / len(known)
+        return self.defaults.get(resource, 1.0)
+
+    def estimate(self, group: list[dict], resource: str) -> float:
+        """
+        Targets in a group share one page, so the page costs as much as
+        its most costly target.
+        """
+        costs = [entry["duration"] for target in group
+                 if (entry := self.state.get(target_id(target)))
+                 and entry["resource"] == resource]
+        return max(costs) if costs else self._default(resource)
+
+    def plan(self,
+             groups: dict[tuple, list[dict]],
+             resources: dict[tuple, str],
+             pool_sizes: dict[str, int]) -> dict[str, dict]:
+        """
+        Splits groups (key: targets) by resource class. Returns per class
+        the pool's workers, its group keys from the longest to the
+        shortest and the estimated work and makespan in seconds when they
+        are bin-packed onto the workers with lpt_schedule().
+        """
+        pools = {}
+        for key, group in groups.items():
+            resource = resources[key]
+            pools.setdefault(resource, {})[key] = self.estimate(group,
+                                                                resource)
+        plan = {}
+        for resource, jobs in pools.items():
+            workers = max(pool_sizes.get(resource, 1), 1)
+            bins = lpt_schedule(jobs, workers)
+            plan[resource] = {
+                "workers": workers,
+                "keys": sorted(jobs, key=jobs.get, reverse=True),
+                "work": round(sum(jobs.values()), 1),
+                "makespan": round(max(sum(jobs[key] for key in keys)
+                                      for keys in bins), 1),
+            }
+        return plan
+
+    def status(self) -> dict:
+        return {key: dict(entry) for key, entry in self.state.items()}
@@ -0,0 +1,96 @@
+import atexit
+import copy
+import datetime as dt
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+
+from price_scraper import config
+
+# Structured fields passed with extra={...}, copied into JSON records
+FIELDS = ("target", "attempt", "stage", "duration")
+
+_BUILTIN = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line. The structured FIELDS and
+    any other extra={...} keys are kept as fields instead of being folded
+    into the message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": dt.datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in FIELDS:
+            if (value := getattr(record, key, None)) is not None:
+                data[key] = value
+        for key, value in vars(record).items():
+            if key not in _BUILTIN and key not in data and value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that only resolves the message and traceback on the
+    calling thread. Formatting and writing happen on the listener thread,
+    and structured fields survive for the JsonFormatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def config_logger(log_file: str = config.LOG_FILE,
+                  json_format: bool = config.LOG_JSON) -> QueueListener:
+    """
+    Sets up the root logger to hand records to a queue. A QueueListener
+    thread drains it into the rotating log file, so threads scraping
+    targets never wait on the file handler's lock or the disk.
+
+    Returns the started listener, which is also stopped (and flushed) at
+    exit.
+    """
+    logger = logging.getLogger()
+    logger.setLevel(config.LOG_LEVEL)
+
+    rfh = RotatingFileHandler(
+        filename=log_file,
+        maxBytes=config.MAX_LOG_SIZE,
+        backupCount=config.MAX_BACKUP_LOGS,
+        )
+    if json_format:
+        rfh.setFormatter(JsonFormatter())
+    else:
+        rfh.setFormatter(logging.Formatter(
+            fmt=config.LOG_FORMAT,
+            datefmt=config.LOG_DATE_FORMAT
+            ))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, rfh, respect_handler_level=True)
+    logger.addHandler(RecordQueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
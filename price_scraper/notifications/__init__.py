@@ -1,4 +1,12 @@
 from .alerter import Alerter
+from .backends import (Backend, Backends, DiscordBackend, FileBackend,
+                       SmtpBackend, WebhookBackend)
+from .changes import (Change, ChangeFeed, ListingChange, PriceChange,
+                      StockChange)
 from .notifier import Notifier
+from .rules import Rule, Rules
 
-__all__ = ["Alerter", "Notifier"]
+__all__ = ["Alerter", "Backend", "Backends", "Change", "ChangeFeed",
+           "DiscordBackend", "FileBackend", "ListingChange", "PriceChange",
+           "SmtpBackend", "StockChange", "Notifier", "Rule", "Rules",
+           "WebhookBackend"]
@@ -1,7 +1,11 @@
 from collections import defaultdict
 import logging
 
+from .changes import (Change, ListingChange, PriceChange, StockChange,
+                      diff)
 from .notifier import Notifier
+from .rules import Rule
+from ..data.history import PriceHistory
 from ..data.item import Item
 
 logger = logging.getLogger(__name__)
@@ -18,6 +22,8 @@ class Alerter:
     Methods:
     price_stock_alert() = Send discord alerts for items below a set
     price and stock threshold.
+    rule_alert() = Send discord alerts for items matching a target's rules.
+    alert_changes() = Send discord alerts for a list of Change events.
     compare() = compares two scrapes (dict of lists containing Item Objects)
     and returns a dict{dict} where the key=Changed Item and dict=Changes with
     keys 'price' and 'stock'.
@@ -54,8 +60,9 @@ class Alerter:
                 for item in alert_items
             ]
 
-            logger.info(f"[{name}] Price alert: {len(alert_items)} "
-                        f"item(s) below configured price threshold.")
+            logger.info("[%s] Price alert: %d item(s) below configured "
+                        "price threshold.", name, len(alert_items),
+                        extra={"target": name, "stage": "alert"})
 
             self.notifier.discord_message(
                 f"\n⚠️⚠️**PRICE/STOCK ALERT**⚠️⚠️\n"
@@ -67,9 +74,52 @@ class Alerter:
                 self.notifier.discord_message(message)
 
         else:
-            logger.info(f"[{name}] No items below price threshold")
+            logger.info("[%s] No items below price threshold", name,
+                        extra={"target": name, "stage": "alert"})
 
-    def compare(self, 
+    def rule_alert(
+            self,
+            name: str,
+            item_list: list[Item],
+            rules: list[Rule],
+            history: PriceHistory,
+            last_items: list[Item] | None = None
+            ):
+        """
+        Checks items against a target's rules and sends a discord
+        notification for every match. Must run before the items are
+        recorded in the history so the rollups still hold the previous
+        state. The last scrape's items (from memory) let rules rule items
+        out first, and only the rest read their rollup row.
+        """
+        if not rules:
+            return
+
+        last = {item.item: item for item in last_items or []}
+        matches = 0
+        for item in item_list:
+            candidates = [rule for rule in rules
+                          if rule.precheck(item, last.get(item.item))]
+            if not candidates:
+                continue
+            stats = history.item_stats(name, item.item)
+            for rule in candidates:
+                if reason := rule.check(item, stats, history):
+                    matches += 1
+                    self.notifier.discord_message(
+                        "⚠️Rule alert⚠\n"
+                        f"[{item.search}]\n"
+                        f"{item.item[:self.max_discord_string]}...\n"
+                        f"{reason}\n"
+                        f"Stock: {'✅' if item.stock is True else '❌'}\n"
+                        f"${item.price}\n"
+                        f"🔗{item.mdlink}"
+                        )
+
+        logger.info("[%s] Rule alert: %d match(es)", name, matches,
+                    extra={"target": name, "stage": "alert"})
+
+    def compare(self,
                 new_scrape: dict[str, list],
                 last_scrape: dict[str, list]) -> dict:
 
@@ -86,94 +136,80 @@ class Alerter:
         """
 
         alert_items = defaultdict(dict)
-        new_items = {}
-        last_items = {}
-
-        # If new scrape exists in last scrape
-        for scrape_key, item in new_scrape.items():
-            if scrape_key in last_scrape:
-
-                # Make item dicts
-                new_items = {item.item: item for item
-                             in new_scrape[scrape_key]}
-                last_items = {item.item: item for item
-                              in last_scrape[scrape_key]}
-
-                # Use sets to determine if there are new and removed listings
-                new_listings_keys = set(new_items) - set(last_items)
-                removed_listings_keys = set(last_items) - set(new_items)
-
-                # Store listing info
-                new_listings = [new_items[key] for key
-                                in new_listings_keys]
-                removed_listings = [last_items[key] for key
-                                    in removed_listings_keys]
-
-                # Add the listing to alert_items dict to return later
-                for item in new_listings:
-                    alert_items[item]['listing'] = True
-                for item in removed_listings:
-                    alert_items[item]['listing'] = False
-
-            # For each new item
-            for key, new_item in new_items.items():
-                # If there is also a old item
-                if key in last_items:
-                    # Compare the items price
-                    if (price_delta := new_item.price
-                       - last_items[key].price) != 0:
-                        alert_items[new_item]['price'] = price_delta
-                    if (new_item.stock != last_items[key].stock):
-                        alert_items[new_item]['stock'] = new_item.stock
+
+        for scrape_key, items in new_scrape.items():
+            if items is None or not last_scrape.get(scrape_key):
+                continue
+            for change in diff(scrape_key, items, last_scrape[scrape_key]):
+                if isinstance(change, ListingChange):
+                    alert_items[change.item]['listing'] = change.added
+                elif isinstance(change, PriceChange):
+                    alert_items[change.item]['price'] = change.delta
+                elif isinstance(change, StockChange):
+                    alert_items[change.item]['stock'] = change.in_stock
 
         return alert_items
 
+    def alert_changes(self, changes: list[Change]):
+        """
+        Sends a discord alert for each change event. Subscribed to the
+        ChangeFeed so alerts go out as soon as a target is scraped.
+        """
+        for change in changes:
+            item = change.item
+            if isinstance(change, PriceChange):
+                self.notifier.discord_message(
+                    "⚠️Price change⚠\n"
+                    f"[{item.search}]\n"
+                    f"{item.item[:self.max_discord_string]}...\n"
+                    f"Price: {'⬇️' if change.delta < 0 else '⬆️'} "
+                    f"from ${change.old_price} by "
+                    f"${abs(change.delta)} to:\n "
+                    f"--> **${item.price}** <--\n"
+                    f"Stock: {'✅' if item.stock is True else '❌'}\n"
+                    f"🔗{item.mdlink}"
+                    )
+            elif isinstance(change, StockChange):
+                self.notifier.discord_message(
+                    "⚠️Stock changed⚠\n"
+                    f"[{item.search}]\n"
+                    f"{item.item[:self.max_discord_string]}...\n"
+                    f"Stock is now: "
+                    f"--> {'✅' if change.in_stock is True else '❌'} <--\n"
+                    f"${item.price}\n"
+                    f"🔗{item.mdlink}"
+                    )
+            elif isinstance(change, ListingChange):
+                n = change.added
+                self.notifier.discord_message(
+                   "⚠️Listing changed⚠\n"
+                   f"[{item.search}]\n"
+                   f"{item.item[:self.max_discord_string]}...\n"
+                   f"{'**NEW Listing**' if n else '**REMOVED Listing**'}\n"
+                   f"Stock: {'✅' if item.stock is True else '❌'}\n"
+                   f"${item.price}\n"
+                   f"🔗{item.mdlink}"
+                   )
+
     def compare_alert(self,
                       new_scrape: dict[str, list[Item]],
                       last_scrape: dict[str, list[Item]]):
 
         """
-        Grabs the alert_items dict from compare() and reads each item entry.
-        For any changes it finds it sends a discord alert. Takes scrape info
-        for two scrapes (new and last) in the form of a dict where the key is
-        the search name and the values are a list of item objects.
+        Compares two whole scrapes and sends a discord alert for every
+        change. Takes scrape info for two scrapes (new and last) in the form
+        of a dict where the key is the search name and the values are a list
+        of item objects. ScrapeManager streams changes per target through a
+        ChangeFeed instead.
         """
-        alert_items = self.compare(new_scrape, last_scrape)
-
-        if alert_items:
-            for item, changes in alert_items.items():
-                if 'price' in changes:
-                    self.notifier.discord_message(
-                        "⚠️Price change⚠\n"
-                        f"[{item.search}]\n"
-                        f"{item.item[:self.max_discord_string]}...\n"
-                        f"Price: {'⬇️' if changes['price'] < 0 else '⬆️'} "
-                        f"from ${item.price - changes['price']} by "
-                        f"${abs(changes['price'])} to:\n "
-                        f"--> **${item.price}** <--\n"
-                        f"Stock: {'✅' if item.stock is True else '❌'}\n"
-                        f"🔗{item.mdlink}"
-                        )
-                if 'stock' in changes:
-                    self.notifier.discord_message(
-                        "⚠️Stock changed⚠\n"
-                        f"[{item.search}]\n"
-                        f"{item.item[:self.max_discord_string]}...\n"
-                        f"Stock is now: "
-                        f"--> {'✅' if changes['stock'] is True else '❌'} <--\n"
-                        f"${item.price}\n"
-                        f"🔗{item.mdlink}"
-                        )
-                if 'listing' in changes:
-                    n = changes['listing']
-                    self.notifier.discord_message(
-                       "⚠️Listing changed⚠\n"
-                       f"[{item.search}]\n"
-                       f"{item.item[:self.max_discord_string]}...\n"
-                       f"{'**NEW Listing**' if n else '**REMOVED Listing**'}\n"
-                       f"Stock: {'✅' if item.stock is True else '❌'}\n"
-                       f"${item.price}\n"
-                       f"🔗{item.mdlink}"
-                       )
+        changes = [
+            change
+            for scrape_key, items in new_scrape.items()
+            if items is not None and last_scrape.get(scrape_key)
+            for change in diff(scrape_key, items, last_scrape[scrape_key])
+        ]
+
+        if changes:
+            self.alert_changes(changes)
         else:
             logger.debug("No stock/price/listing changes")
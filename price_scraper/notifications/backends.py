@@ -0,0 +1,240 @@
+from abc import abstractmethod
+import asyncio
+import datetime as dt
+from email.message import EmailMessage
+import json
+import logging
+import smtplib
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """
+    A notification channel. send() is a coroutine run on the Notifier's
+    event loop, blocking work belongs in asyncio.to_thread().
+
+    A thread can't be cancelled, so the Notifier never retries a blocking
+    backend while its last attempt is still running. Such backends should
+    bound their own I/O with timeout.
+
+    Attributes:
+    name = name used in logs
+    blocking = True when send() runs its work in a thread
+    timeout = seconds a blocking send may take, the Notifier's timeout
+              when None
+    """
+
+    name = "backend"
+    blocking = False
+    timeout = None
+
+    @abstractmethod
+    async def send(self, message: str):
+        pass
+
+    async def close(self):
+        pass
+
+
+class DiscordBackend(Backend):
+    """
+    Posts messages to a Discord webhook.
+
+    Attributes:
+    webhook_url = Discord webhook url
+    """
+
+    name = "discord"
+
+    def __init__(self, webhook_url: str):
+        self.webhook_url = webhook_url
+        self.session = None
+        self.webhook = None
+
+    def __repr__(self):
+        return "DiscordBackend(webhook_url=...)"
+
+    async def send(self, message: str):
+        # The session has to be created on the loop that uses it
+        if self.webhook is None:
+            self.session = aiohttp.ClientSession()
+            self.webhook = discord.Webhook.from_url(self.webhook_url,
+                                                    session=self.session)
+        await self.webhook.send(message)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+        self.session = self.webhook = None
+
+
+class WebhookBackend(Backend):
+    """
+    POSTs messages as JSON, {field: message, "time": ...}, to any webhook
+    (Slack, ntfy, Home Assistant, a custom service...).
+
+    Attributes:
+    url = webhook url
+    field = JSON key the message is sent under
+    headers = extra request headers, e.g. authorization
+    """
+
+    name = "webhook"
+
+    def __init__(self,
+                 url: str,
+                 field: str = "text",
+                 headers: dict | None = None):
+        self.url = url
+        self.field = field
+        self.headers = headers or {}
+        self.session = None
+
+    def __repr__(self):
+        return f"WebhookBackend(url={self.url!r}, field={self.field!r})"
+
+    async def send(self, message: str):
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        payload = {self.field: message,
+                   "time": dt.datetime.now().isoformat(timespec="seconds")}
+        async with self.session.post(self.url, json=payload,
+                                     headers=self.headers) as response:
+            response.raise_for_status()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+
+
+class SmtpBackend(Backend):
+    """
+    Emails messages through an SMTP server, by default a local relay or
+    test server such as `python -m aiosmtpd -n` on port 8025.
+
+    Attributes:
+    host, port = SMTP server
+    sender = From address
+    recipients = list of To addresses
+    subject = email subject
+    username, password = login, None to send without authenticating
+    starttls = upgrade the connection with STARTTLS before logging in
+    timeout = socket timeout in seconds, the Notifier's timeout when None
+    """
+
+    name = "smtp"
+    blocking = True
+
+    def __init__(self,
+                 recipients: list[str],
+                 host: str = "localhost",
+                 port: int = 8025,
+                 sender: str = "price-scraper@localhost",
+                 subject: str = "Price Scraper alert",
+                 username: str | None = None,
+                 password: str | None = None,
+                 starttls: bool = False,
+                 timeout: float | None = None):
+        self.recipients = recipients
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.subject = subject
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def __repr__(self):
+        return (f"SmtpBackend(host={self.host!r}, port={self.port!r}, "
+                f"recipients={self.recipients!r})")
+
+    async def send(self, message: str):
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email["Subject"] = self.subject
+        email.set_content(message)
+        await asyncio.to_thread(self._send, email)
+
+    def _send(self, email: EmailMessage):
+        with smtplib.SMTP(self.host, self.port,
+                          timeout=self.timeout or 30) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(email)
+
+
+class FileBackend(Backend):
+    """
+    Appends messages to a file as JSON lines of time and message. Useful
+    as an audit log or to test alerts without a real channel.
+
+    Attributes:
+    path = file the messages are appended to
+    """
+
+    name = "file"
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __repr__(self):
+        return f"FileBackend(path={self.path!r})"
+
+    async def send(self, message: str):
+        line = json.dumps({
+            "time": dt.datetime.now().isoformat(timespec="seconds"),
+            "message": message,
+        }, ensure_ascii=False)
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+class Backends:
+    """
+    Lookup table for notification backends declared in config.NOTIFIERS.
+    Format:
+        NOTIFIERS = [
+            {"type": "discord", "webhook_url": WEBHOOK_URL},
+            {"type": "webhook", "url": "https://ntfy.sh/my-topic"},
+            {"type": "smtp", "recipients": ["me@example.com"]},
+            {"type": "file", "path": "notifications.jsonl"}
+        ]
+    """
+
+    lookup = {
+        "discord": DiscordBackend,
+        "webhook": WebhookBackend,
+        "smtp": SmtpBackend,
+        "file": FileBackend,
+    }
+
+    @classmethod
+    def build(cls, backend_configs: list[dict]) -> list[Backend]:
+        """
+        Builds Backend objects from their declarations. A Discord backend
+        without a webhook url is skipped with a warning, so the default
+        config works before a webhook is set.
+        """
+        backends = []
+        for backend_config in backend_configs:
+            params = dict(backend_config)
+            backend_type = params.pop("type")
+            if backend_type == "discord" and not params.get("webhook_url"):
+                logger.warning("No discord webhook url set. "
+                               "Discord notifications will not work.")
+                continue
+            backends.append(cls.lookup[backend_type](**params))
+        return backends
@@ -0,0 +1,163 @@
+import logging
+from typing import Callable, Iterator
+
+from ..data.item import Item
+
+logger = logging.getLogger(__name__)
+
+
+class Change:
+    """
+    Base change event for one item of one target.
+
+    Attributes:
+    search = target_id() of the target
+    item = the Item as it is now (as it was last, for removed listings)
+    kind = "listing", "price" or "stock"
+    """
+
+    kind = ""
+
+    def __init__(self, search: str, item: Item):
+        self.search = search
+        self.item = item
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(search={self.search!r}, "
+                f"item={self.item.item!r})")
+
+    def as_dict(self) -> dict:
+        return {
+            "time": self.item.time,
+            "search": self.search,
+            "item": self.item.item,
+            "kind": self.kind,
+            "old": None,
+            "new": None,
+        }
+
+
+class ListingChange(Change):
+    """
+    A listing appeared (added = True) or disappeared (added = False).
+    """
+
+    kind = "listing"
+
+    def __init__(self, search: str, item: Item, added: bool):
+        super().__init__(search, item)
+        self.added = added
+
+    def __repr__(self):
+        return (f"ListingChange(search={self.search!r}, "
+                f"item={self.item.item!r}, added={self.added!r})")
+
+    def as_dict(self) -> dict:
+        return dict(super().as_dict(), old=int(not self.added),
+                    new=int(self.added))
+
+
+class PriceChange(Change):
+    """
+    The price of a listing changed by delta from old_price.
+    """
+
+    kind = "price"
+
+    def __init__(self, search: str, item: Item, old_price: int):
+        super().__init__(search, item)
+        self.old_price = old_price
+
+    def __repr__(self):
+        return (f"PriceChange(search={self.search!r}, "
+                f"item={self.item.item!r}, old_price={self.old_price!r}, "
+                f"price={self.item.price!r})")
+
+    @property
+    def delta(self) -> int:
+        return self.item.price - self.old_price
+
+    def as_dict(self) -> dict:
+        return dict(super().as_dict(), old=self.old_price,
+                    new=self.item.price)
+
+
+class StockChange(Change):
+    """
+    A listing went in or out of stock.
+    """
+
+    kind = "stock"
+
+    def __init__(self, search: str, item: Item):
+        super().__init__(search, item)
+
+    def __repr__(self):
+        return (f"StockChange(search={self.search!r}, "
+                f"item={self.item.item!r}, stock={self.item.stock!r})")
+
+    @property
+    def in_stock(self) -> bool:
+        return self.item.stock
+
+    def as_dict(self) -> dict:
+        return dict(super().as_dict(), old=int(not self.item.stock),
+                    new=int(bool(self.item.stock)))
+
+
+def diff(name: str,
+         new_items: list[Item],
+         last_items: list[Item]) -> Iterator[Change]:
+    """
+    Yields the changes between the last and new items of one target.
+    Items are matched on their title.
+    """
+    new = {item.item: item for item in new_items}
+    last = {item.item: item for item in last_items}
+
+    for key, new_item in new.items():
+        if (last_item := last.get(key)) is None:
+            yield ListingChange(name, new_item, added=True)
+            continue
+        if new_item.price != last_item.price:
+            yield PriceChange(name, new_item, old_price=last_item.price)
+        if new_item.stock != last_item.stock:
+            yield StockChange(name, new_item)
+
+    for key, last_item in last.items():
+        if key not in new:
+            yield ListingChange(name, last_item, added=False)
+
+
+class ChangeFeed:
+    """
+    Publishes each target's changes to subscribers as soon as that target
+    is scraped. A failing subscriber is logged and doesn't stop the others.
+
+    Methods:
+    subscribe() = registers a callback taking a list of Change events
+    publish() = sends a target's changes to every subscriber
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    def __repr__(self):
+        return f"ChangeFeed(subscribers={len(self.subscribers)!r})"
+
+    def subscribe(self, callback: Callable[[list[Change]], None]):
+        self.subscribers.append(callback)
+
+    def publish(self, name: str, changes: list[Change]):
+        if not changes:
+            logger.debug("[%s] No stock/price/listing changes", name,
+                         extra={"target": name, "stage": "changes"})
+            return
+        logger.info("[%s] %d change(s)", name, len(changes),
+                    extra={"target": name, "stage": "changes"})
+        for callback in self.subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.exception(f"[{name}] Change subscriber {callback!r} "
+                                 f"failed: {e}")
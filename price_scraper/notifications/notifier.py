@@ -1,40 +1,218 @@
+import asyncio
+import atexit
 import logging
+import threading
 
-import discord
+from price_scraper.notifications.backends import Backend, DiscordBackend
 
 logger = logging.getLogger(__name__)
 
 
 class Notifier:
     """
-    Discord notification object.
+    Fans notifications out to one or more backends (Discord, webhooks,
+    email, files, see backends.py) without blocking the caller.
+
+    Every backend gets its own queue and sender task on an event loop in a
+    background thread. Each send is bounded by timeout and retried up to
+    retries times with a doubling delay, so a slow or failing channel only
+    holds up its own queue, never the scrape or the other channels. A
+    blocking backend's send can't be cancelled once it runs in a thread,
+    so after a timeout its attempt is waited for instead of retried over,
+    which would deliver the message twice.
+    Messages still queued are flushed at exit.
 
     Attributes:
-    webhook_url = Discord webhook url
+    webhook_url = Discord webhook url of the default Discord backend
+    backends = list of Backend objects messages are sent to
+    timeout = seconds one send may take
+    retries = extra attempts after a failed send
+    retry_delay = seconds before the first retry, doubled for each next one
+    queue_size = messages queued per backend before new ones are dropped
 
+    Methods:
+    send() = queues a message for every backend and returns straight away
+    discord_message() = same as send(), kept for existing callers
+    flush() = waits until every queued message has been handled
+    close() = flushes and stops the event loop
     """
 
     def __init__(
         self,
-        webhook_url: str | None = None
+        webhook_url: str | None = None,
+        backends: list[Backend] | None = None,
+        timeout: float = 10,
+        retries: int = 3,
+        retry_delay: float = 2,
+        queue_size: int = 1000
     ):
+        self.webhook_url = webhook_url
+        if backends is None:
+            backends = [DiscordBackend(webhook_url)] if webhook_url else []
+        self.backends = backends
+        for backend in self.backends:
+            if backend.blocking and backend.timeout is None:
+                backend.timeout = timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue_size = queue_size
+        self.loop = None
+        self.queues = {}
+        self.tasks = []
+        self.lock = threading.Lock()
 
-        if webhook_url:
-            self.webhook_url = webhook_url
-            self.dn = discord.SyncWebhook.from_url(self.webhook_url)
-        else:
-            logger.warning("No discord webhook url set."
-                           "Discord notifications will not work.")
+        if not self.backends:
+            logger.warning("No notification backends set. "
+                           "Notifications will not be sent.")
 
     def __repr__(self) -> str:
-        return (f"Notifier(webhook_url={self.webhook_url!r})")
+        return f"Notifier(backends={self.backends!r})"
 
     def __str__(self) -> str:
-        return f"Notifier; Discord webhook url: {self.webhook_url}"
+        names = ", ".join(backend.name for backend in self.backends)
+        return f"Notifier; backends: {names or 'none'}"
+
+    def _start(self):
+        """
+        Starts the event loop thread and one sender per backend on first
+        use, so a Notifier that never sends costs nothing.
+        """
+        with self.lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                for backend in self.backends:
+                    queue = asyncio.Queue(maxsize=self.queue_size)
+                    self.queues[backend] = queue
+                    self.tasks.append(
+                        loop.create_task(self._sender(backend, queue)))
+                ready.set()
+                loop.run_forever()
+                loop.close()
+
+            threading.Thread(target=run, name="notifier",
+                             daemon=True).start()
+            ready.wait()
+            self.loop = loop
+            atexit.register(self.close)
+
+    def send(self, message: str):
+        """
+        Queues message for every backend. Returns without waiting for it
+        to be delivered.
+        """
+        if not self.backends:
+            logger.debug("No notification backends, dropped: %.80s", message)
+            return
+        self._start()
+        self.loop.call_soon_threadsafe(self._enqueue, message)
 
-    def discord_message(self, message):
-        if self.webhook_url:
+    def discord_message(self, message: str):
+        self.send(message)
+
+    def _enqueue(self, message: str):
+        for backend, queue in self.queues.items():
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("%s notification queue is full, dropped: "
+                               "%.80s", backend.name, message)
+
+    async def _sender(self, backend: Backend, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
             try:
-                self.dn.send(message)
+                await self._deliver(backend, message)
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, backend: Backend, message: str):
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            sending = asyncio.ensure_future(backend.send(message))
+            try:
+                await asyncio.wait_for(asyncio.shield(sending), self.timeout)
+                return
+            except TimeoutError as e:
+                error = e
+                if not backend.blocking:
+                    sending.cancel()
+                else:
+                    # The thread runs on, let it finish rather than send
+                    # the message a second time
+                    logger.warning("%s message is taking over %s seconds, "
+                                   "waiting for it", backend.name,
+                                   self.timeout)
+                    try:
+                        await sending
+                        return
+                    except Exception as e:
+                        error = e
             except Exception as e:
-                logger.exception(f"Error sending discord message: {e}")
+                error = e
+
+            if attempt == self.retries:
+                logger.error("Error sending %s message after %d attempt(s): "
+                             "%r", backend.name, attempt + 1, error)
+                return
+            logger.warning("%s message failed (%r), retry in %s seconds",
+                           backend.name, error, delay)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Waits until every queued message has been sent or given up on.
+        Returns False if timeout passed first.
+        """
+        if self.loop is None:
+            return True
+
+        async def join():
+            await asyncio.gather(*(queue.join()
+                                   for queue in self.queues.values()))
+
+        future = asyncio.run_coroutine_threadsafe(join(), self.loop)
+        try:
+            future.result(timeout)
+            return True
+        except TimeoutError:
+            future.cancel()
+            logger.warning("Timed out flushing notifications")
+            return False
+
+    def close(self, timeout: float | None = 30):
+        """
+        Flushes queued messages, closes the backends and stops the loop.
+        A later send() starts it again.
+        """
+        if self.loop is None:
+            return
+        self.flush(timeout)
+
+        async def close_backends():
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            for backend in self.backends:
+                try:
+                    await backend.close()
+                except Exception as e:
+                    logger.exception(f"Error closing {backend.name}: {e}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                close_backends(), self.loop).result(timeout)
+        except Exception as e:
+            logger.exception(f"Error closing notification backends: {e}")
+        finally:
+            with self.lock:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.loop = None
+                self.queues = {}
+                self.tasks = []
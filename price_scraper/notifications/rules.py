@@ -0,0 +1,177 @@
+from abc import abstractmethod
+import datetime as dt
+import logging
+
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.item import Item
+
+logger = logging.getLogger(__name__)
+
+
+def positive(name: str, value) -> float:
+    """
+    Returns value if it is a number above zero, raises ValueError
+    otherwise. Used to check rule parameters when targets load.
+    """
+    if (not isinstance(value, (int, float)) or isinstance(value, bool)
+            or not value > 0):
+        raise ValueError(f"{name} must be a positive number, got {value!r}")
+    return value
+
+
+class Rule:
+    """
+    Base alert rule. Rules are checked against the rollups kept by
+    PriceHistory before the new items are recorded, so each check is a
+    lookup on an indexed rollup rather than a scan of the history.
+
+    Methods:
+    precheck() = False if the last scrape already rules the item out
+    check() = returns a reason string if the item should alert, else None
+    """
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+    def precheck(self, item: Item, last: Item | None) -> bool:
+        """
+        Cheap in-memory check against the item from the last scrape (None
+        if it wasn't in it) before the rollups are read.
+        """
+        return True
+
+    @abstractmethod
+    def check(self,
+              item: Item,
+              stats: dict | None,
+              history: PriceHistory) -> str | None:
+        pass
+
+
+class AllTimeLowRule(Rule):
+    """
+    Alerts when an item drops below its lowest recorded price.
+
+    Attributes:
+    in_stock = only alert for items that are in stock
+    """
+
+    def __init__(self, in_stock: bool = False):
+        if not isinstance(in_stock, bool):
+            raise ValueError(f"in_stock must be true or false, got "
+                             f"{in_stock!r}")
+        self.in_stock = in_stock
+
+    def __repr__(self):
+        return f"AllTimeLowRule(in_stock={self.in_stock!r})"
+
+    def precheck(self, item, last):
+        if self.in_stock and not item.stock:
+            return False
+        # The last price is in the rollups, so no drop means no new low
+        return last is None or item.price < last.price
+
+    def check(self, item, stats, history):
+        if not stats or (self.in_stock and not item.stock):
+            return None
+        if item.price < stats["all_time_low"]:
+            return (f"New all time low, was ${stats['all_time_low']} "
+                    f"on {stats['all_time_low_time'][:10]}")
+        return None
+
+
+class BelowMedianRule(Rule):
+    """
+    Alerts when an item drops a percentage below its median daily closing
+    price over a window of days. Only the drop alerts: an item that stays
+    below the median isn't alerted again until it has been back above.
+    Medians come from PriceHistory.median_closes(), read once a day per
+    target.
+
+    Attributes:
+    percent = how far below the median the price has to be
+    days = size of the window in days
+    """
+
+    def __init__(self, percent: float = 10, days: int = 30):
+        self.percent = positive("percent", percent)
+        self.days = positive("days", days)
+
+    def __repr__(self):
+        return (f"BelowMedianRule(percent={self.percent!r}, "
+                f"days={self.days!r})")
+
+    def precheck(self, item, last):
+        # Without a price drop since the last scrape nothing crosses below
+        return last is None or item.price < last.price
+
+    def check(self, item, stats, history):
+        if not stats:
+            return None
+        typical = history.median_closes(stats["search"], self.days).get(
+            stats["item"])
+        if typical is None:
+            return None
+        cut = typical * (1 - self.percent / 100)
+        # The rollups still hold the previous price, alert on the crossing
+        if item.price <= cut < stats["last_price"]:
+            return (f"{round(100 * (1 - item.price / typical))}% below "
+                    f"the {self.days} day median of ${typical:g}")
+        return None
+
+
+class BackInStockRule(Rule):
+    """
+    Alerts when an item comes back in stock after being out of stock for
+    at least a number of days.
+
+    Attributes:
+    days = minimum days out of stock
+    """
+
+    def __init__(self, days: int = 1):
+        self.days = positive("days", days)
+
+    def __repr__(self):
+        return f"BackInStockRule(days={self.days!r})"
+
+    def precheck(self, item, last):
+        return item.stock and not (last is not None and last.stock)
+
+    def check(self, item, stats, history):
+        if not stats or not item.stock or stats["last_stock"]:
+            return None
+        since = stats["last_in_stock"] or stats["first_seen"]
+        days_out = (dt.datetime.now() - dt.datetime.fromisoformat(since)).days
+        if days_out >= self.days:
+            return f"Back in stock after {days_out} day(s)"
+        return None
+
+
+class Rules:
+    """
+    Lookup table for rules declared on targets. Format:
+        "rules": [
+            {"type": "all_time_low"},
+            {"type": "below_median", "percent": 10, "days": 30},
+            {"type": "back_in_stock", "days": 7}
+        ]
+    """
+
+    lookup = {
+        "all_time_low": AllTimeLowRule,
+        "below_median": BelowMedianRule,
+        "back_in_stock": BackInStockRule,
+    }
+
+    @classmethod
+    def build(cls, rule_configs: list[dict]) -> list[Rule]:
+        """
+        Builds Rule objects from a target's rule declarations.
+        """
+        rules = []
+        for rule_config in rule_configs:
+            params = dict(rule_config)
+            rule_type = params.pop("type")
+            rules.append(cls.lookup[rule_type](**params))
+        return rules
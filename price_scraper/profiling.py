@@ -0,0 +1,215 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import cProfile
+import datetime as dt
+import json
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Leave the profiler's own bookkeeping out of the allocation reports
+_OWN_TRACES = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, __file__),
+               tracemalloc.Filter(False, pstats.__file__),
+               tracemalloc.Filter(False, cProfile.__file__)]
+
+
+def _label(func: tuple) -> str:
+    file_name, line, name = func
+    if file_name == "~":
+        return name
+    return f"{os.path.basename(file_name)}:{line}:{name}"
+
+
+def folded_stacks(stats: pstats.Stats, max_depth: int = 64) -> dict[str, int]:
+    """
+    Converts cProfile stats into folded stacks ("a;b;c microseconds" lines)
+    for flamegraph.pl, speedscope or inferno. cProfile only records caller
+    and callee pairs, so each callee's time is split between its callers
+    in proportion to the time spent under each of them.
+    """
+    raw = stats.stats
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees[caller][func] = edge_time
+
+    folded = defaultdict(float)
+
+    def walk(func, path, fraction):
+        _, _, own_time, total_time, _ = raw[func]
+        folded[";".join(map(_label, path))] += own_time * fraction
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in callees[func].items():
+            callee_total = raw[callee][3]
+            if callee in path or not callee_total:
+                continue
+            walk(callee, path + (callee,),
+                 fraction * edge_time / callee_total)
+
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            walk(func, (func,), 1.0)
+
+    return {stack: round(seconds * 1e6) for stack, seconds in folded.items()
+            if seconds * 1e6 >= 1}
+
+
+class Profiler:
+    """
+    Profiles sections of a scrape cycle, one per target and stage, with
+    cProfile for time and tracemalloc for allocations.
+
+    Stages:
+    scrape = Scrape.scrape_items(): requests, retries and parsing
+    alert = ScrapeManager.process_target(): rules, history, price/stock
+            alerts and the compare against the last scrape
+
+    write() saves, per section, a .pstats file (snakeviz, pstats), a
+    .folded file of flamegraph-compatible stacks and a .alloc.txt of the
+    top allocations, plus summary.txt/summary.json ranking the sections by
+    time and by memory. Report files are named
+    "{index}-{target}.{stage}" as target names can repeat.
+
+    Attributes:
+    output_dir = directory the reports are written to, one folder per cycle
+    top = number of allocations and functions listed per section
+    sections = list of profiled sections since the last write
+    """
+
+    def __init__(self, output_dir: str, top: int = 10):
+        self.output_dir = output_dir
+        self.top = top
+        self.sections = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def __repr__(self):
+        return f"Profiler(output_dir={self.output_dir!r})"
+
+    @contextmanager
+    def section(self, name: str, stage: str):
+        """
+        Profiles the body of the with block as one section. Sections
+        must not nest, cProfile allows one active profiler at a time.
+        """
+        profile = cProfile.Profile()
+        before = tracemalloc.take_snapshot().filter_traces(_OWN_TRACES)
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_OWN_TRACES)
+            allocations = [diff for diff in after.compare_to(before, "lineno")
+                           if diff.size_diff > 0]
+            allocations.sort(key=lambda diff: diff.size_diff, reverse=True)
+            self.sections.append({
+                "name": name,
+                "stage": stage,
+                "wall": wall,
+                "cpu": cpu,
+                "net_bytes": current - start_memory,
+                "peak_bytes": peak - start_memory,
+                "profile": profile,
+                "allocations": allocations[:self.top],
+            })
+
+    def write(self) -> str | None:
+        """
+        Writes the reports of the sections profiled so far and clears
+        them. Returns the report directory.
+        """
+        if not self.sections:
+            return None
+        run_dir = os.path.join(
+            self.output_dir, dt.datetime.now().strftime("%Y%m%dT%H%M%S"))
+        os.makedirs(run_dir, exist_ok=True)
+
+        rows = []
+        for index, section in enumerate(self.sections):
+            # Names aren't unique, the index keeps their reports apart
+            slug = re.sub(r"[^\w.-]+", "_", section["name"]).strip("_")
+            file_name = f"{index:03d}-{slug}.{section['stage']}"
+            base = os.path.join(run_dir, file_name)
+            stats = pstats.Stats(section["profile"])
+            stats.dump_stats(f"{base}.pstats")
+
+            with open(f"{base}.folded", "w", encoding="utf-8") as file:
+                for stack, micros in sorted(folded_stacks(stats).items()):
+                    file.write(f"{stack} {micros}\n")
+
+            with open(f"{base}.alloc.txt", "w", encoding="utf-8") as file:
+                for diff in section["allocations"]:
+                    file.write(f"{diff}\n")
+
+            functions = sorted(stats.stats.items(),
+                               key=lambda entry: entry[1][2], reverse=True)
+            rows.append({
+                "name": section["name"],
+                "stage": section["stage"],
+                "file": file_name,
+                "wall": round(section["wall"], 4),
+                "cpu": round(section["cpu"], 4),
+                "net_kb": round(section["net_bytes"] / 1024, 1),
+                "peak_kb": round(section["peak_bytes"] / 1024, 1),
+                "top_functions": [
+                    {"function": _label(func), "own": round(entry[2], 4),
+                     "total": round(entry[3], 4), "calls": entry[1]}
+                    for func, entry in functions[:self.top]
+                ],
+                "top_allocations": [
+                    {"line": str(diff.traceback[0]),
+                     "kb": round(diff.size_diff / 1024, 1),
+                     "count": diff.count_diff}
+                    for diff in section["allocations"]
+                ],
+            })
+
+        by_time = sorted(rows, key=lambda row: row["wall"], reverse=True)
+        by_memory = sorted(rows, key=lambda row: row["peak_kb"], reverse=True)
+        with open(os.path.join(run_dir, "summary.json"), "w",
+                  encoding="utf-8") as file:
+            json.dump({"by_time": by_time, "by_memory": by_memory}, file,
+                      indent=1)
+        with open(os.path.join(run_dir, "summary.txt"), "w",
+                  encoding="utf-8") as file:
+            file.write(self._summary(by_time, by_memory))
+
+        self.sections = []
+        logger.info(f"Profile written to {run_dir}")
+        return run_dir
+
+    def _summary(self, by_time: list[dict], by_memory: list[dict]) -> str:
+        lines = ["Sections by wall time",
+                 f"{'wall s':>8} {'cpu s':>8} {'peak KB':>9}  "
+                 f"{'stage':<6} target / hottest function"]
+        for row in by_time:
+            hottest = (row["top_functions"][0]["function"]
+                       if row["top_functions"] else "")
+            lines.append(f"{row['wall']:>8.3f} {row['cpu']:>8.3f} "
+                         f"{row['peak_kb']:>9.1f}  {row['stage']:<6} "
+                         f"{row['name']} / {hottest}")
+
+        lines += ["", "Sections by peak memory",
+                  f"{'peak KB':>9} {'net KB':>9}  {'stage':<6} "
+                  f"target / top allocation"]
+        for row in by_memory:
+            top = (row["top_allocations"][0]["line"]
+                   if row["top_allocations"] else "")
+            lines.append(f"{row['peak_kb']:>9.1f} {row['net_kb']:>9.1f}  "
+                         f"{row['stage']:<6} {row['name']} / {top}")
+        return "\n".join(lines) + "\n"
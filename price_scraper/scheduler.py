@@ -0,0 +1,175 @@
+import json
+import logging
+import time
+
+from price_scraper.data.checkpoint import atomic_write
+from price_scraper.target_config import target_id
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveScheduler:
+    """
+    Decides which targets are due each cycle from how often they change.
+
+    Every scrape of a target is an observation: did the diff against the
+    last scrape find any change? The share of observations with changes is
+    kept as a moving average (the change rate) and mapped onto an interval
+    between min_interval (always changes) and max_interval (never changes).
+    Intervals shrink straight away on a change but at most double per quiet
+    scrape, and targets with an item within threshold_margin of their price
+    threshold are polled at min_interval. New targets are seeded from the
+    price history when there is one.
+
+    State is kept in a JSON file so it survives restarts and cron runs,
+    keyed by target_id() since target names aren't unique.
+
+    Attributes:
+    state_file = path of the JSON state file, None to keep it in memory
+    min_interval, max_interval = interval bounds in seconds
+    threshold_margin = fraction above the price threshold counted as near
+    alpha = weight of the newest observation in the change rate
+    state = dict of target id: dict of interval, rate, last_run, next_run
+
+    Methods:
+    due() = the targets that should be scraped now
+    observe() = records a scrape of a target and reschedules it
+    next_due() = seconds until the next target is due
+    status() = schedule of every target
+    save() = writes the state file
+    """
+
+    def __init__(
+        self,
+        state_file: str | None,
+        min_interval: float,
+        max_interval: float,
+        threshold_margin: float = 0.1,
+        alpha: float = 0.3,
+        history=None
+    ):
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold_margin = threshold_margin
+        self.alpha = alpha
+        self.history = history
+        self.state = self._load()
+
+    def __repr__(self):
+        return (f"AdaptiveScheduler(min_interval={self.min_interval!r}, "
+                f"max_interval={self.max_interval!r}, "
+                f"targets={len(self.state)!r})")
+
+    def _load(self) -> dict:
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, "rb") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.exception(f"Unreadable {self.state_file}, starting with "
+                             f"an empty schedule: {e}")
+            return {}
+
+    def save(self):
+        if not self.state_file:
+            return
+        try:
+            atomic_write(self.state_file,
+                         json.dumps(self.state, indent=1).encode())
+        except Exception as e:
+            logger.exception(f"Unable to save {self.state_file}: {e}")
+
+    def _is_due(self, target: dict, now: float) -> bool:
+        if (entry := self.state.get(target_id(target))) is None:
+            return True
+        # A little slack so a cron run just before next_run still counts
+        return now >= entry["next_run"] - 0.1 * entry["interval"]
+
+    def due(self, targets: list[dict], now: float | None = None) -> list[dict]:
+        """
+        Returns the targets due now, plus every target sharing a page with
+        a due one since that page is fetched anyway.
+        """
+        now = time.time() if now is None else now
+        pages = {(target["url"], target["scrape_type"])
+                 for target in targets if self._is_due(target, now)}
+        return [target for target in targets
+                if (target["url"], target["scrape_type"]) in pages]
+
+    def next_due(self, targets: list[dict], now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        waits = [0.0 if (entry := self.state.get(target_id(target))) is None
+                 else entry["next_run"] - now for target in targets]
+        return max(min(waits, default=self.max_interval), 0.0)
+
+    def _seed_rate(self, key: str) -> float:
+        if self.history is not None:
+            rate = self.history.change_rate(key, days=14)
+            if rate is not None:
+                return rate
+        return 0.5
+
+    def _interval(self, rate: float) -> float:
+        """
+        Maps a change rate onto the interval range geometrically, so each
+        step in rate scales the interval by the same factor.
+        """
+        ratio = self.max_interval / self.min_interval
+        return self.min_interval * ratio ** (1 - rate)
+
+    def _near_threshold(self, target: dict, items: list) -> bool:
+        threshold = target.get("price_threshold")
+        if not threshold or not items:
+            return False
+        if target.get("in_stock_alert"):
+            items = [item for item in items if item.stock] or items
+        lowest = min(item.price for item in items)
+        return lowest <= threshold * (1 + self.threshold_margin)
+
+    def observe(self,
+                target: dict,
+                items: list | None,
+                changes: list | None,
+                now: float | None = None):
+        """
+        Reschedules a target after a scrape. items is None when the scrape
+        failed, which retries at min_interval without touching the rate.
+        changes is None when there was nothing to compare against.
+        """
+        now = time.time() if now is None else now
+        name = target["name"]
+        key = target_id(target)
+        entry = self.state.get(key) or {
+            "interval": self.min_interval,
+            "rate": self._seed_rate(key),
+        }
+
+        if items is None:
+            interval = self.min_interval
+        else:
+            if changes is not None:
+                entry["rate"] += self.alpha * (float(bool(changes)) -
+                                               entry["rate"])
+            interval = self._interval(entry["rate"])
+            if self._near_threshold(target, items):
+                interval = self.min_interval
+            elif changes:
+                interval = min(interval, entry["interval"])
+            else:
+                interval = min(interval, entry["interval"] * 2)
+            interval = min(max(interval, self.min_interval),
+                           self.max_interval)
+
+        entry.update(interval=round(interval), last_run=now,
+                     next_run=now + interval, rate=round(entry["rate"], 4))
+        self.state[key] = entry
+        logger.debug("[%s] next scrape in %d seconds (change rate %.2f)",
+                     name, interval, entry["rate"],
+                     extra={"target": name, "stage": "schedule"})
+
+    def status(self) -> dict:
+        return {key: dict(entry) for key, entry in self.state.items()}
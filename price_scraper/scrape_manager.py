@@ -1,12 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+import copy
+import datetime as dt
 import logging
+import threading
+import time
+import uuid
 
 from price_scraper import config
 from price_scraper.notifications.alerter import Alerter
+from price_scraper.notifications.backends import Backends
+from price_scraper.notifications.changes import ChangeFeed, diff
 from price_scraper.notifications.notifier import Notifier
+from price_scraper.notifications.rules import Rules
 from price_scraper.data.datamanager import DataManager
+from price_scraper.data.item import Item
+from price_scraper.deadline import Deadline
+from price_scraper.load_balance import CostModel
+from price_scraper.scheduler import AdaptiveScheduler
+from price_scraper.scrapers.detect import PageClassifier
+from price_scraper.scrapers.identity import IdentityPool
 from price_scraper.scrapers.parser import Parsers
 from price_scraper.scrapers.requester import Requesters
 from price_scraper.scrapers.scrape import Scrapers
+from price_scraper.target_config import target_id, validate_targets
 
 logger = logging.getLogger(__name__)
 
@@ -26,20 +43,62 @@ class ScrapeManager:
             "scrape_type": "standard",
             "url": "https://www.example.com/"
             "discord_log": True,
-            "price threshold": 100,
-            "in_stock_alert": True
+            "price_threshold": 100,
+            "in_stock_alert": True,
+            "rules": [{"type": "all_time_low"}]  # Optional, see Rules
         }
+    current_scrape = dict of target id: Item list for the running cycle.
+    Per target state (last scrape, snapshot cache, history, change events
+    and metrics) is keyed by target_id() since target names aren't unique
+    cycle_id = id of the running cycle, kept when a crashed cycle resumes
+    cycle_deadline = Deadline of the running cycle, from CYCLE_BUDGET
+    stale = names of targets that ran out of time this cycle and carry
+            their last items forward
+    snapshot = dict of target id: Item list from the last finished cycle
+    version = counter bumped on every data write, used for cache validation
+    run_metrics = run metrics for the last cycles and each target id,
+                  updated as the cycle runs
+    metrics = read-only copy of run_metrics published on every data write,
+              safe to serialize from other threads
+    change_feed = ChangeFeed that per target changes are published to
+    scheduler = AdaptiveScheduler picking the targets due each cycle, None
+    to scrape every target every cycle
+    profiler = Profiler timing each target's scrape and alert stages, set
+    by --profile, None when not profiling
+    costs = CostModel of each target's scrape duration and resource class,
+    used to spread pages over the worker pools
+    pools = the running cycle's plan per worker pool, see CostModel.plan
     """
 
     def __init__(self,
                  targets: list[dict]):
 
-        self.targets = targets
+        self.targets = validate_targets(targets)
+        self.targets_lock = threading.Lock()
         self.current_scrape = {}
+        self.snapshot = {}
+        self.version = 0
+        self.cycle_start = None
+        self.cycle_id = None
+        self.cycle_deadline = None
+        self.stale = []
+        self.pools = {}
+        self.run_metrics = {"cycles": 0, "last_cycle": None, "targets": {}}
+        self.metrics = copy.deepcopy(self.run_metrics)
+        self.metrics_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.profiler = None
 
         # Init Notifier
         logger.debug("Initializing notifier")
-        self.notifier = Notifier(webhook_url=config.WEBHOOK_URL)
+        self.notifier = Notifier(
+            webhook_url=config.WEBHOOK_URL,
+            backends=Backends.build(config.NOTIFIERS),
+            timeout=config.NOTIFY_TIMEOUT,
+            retries=config.NOTIFY_RETRIES,
+            retry_delay=config.NOTIFY_RETRY_DELAY,
+            queue_size=config.NOTIFY_QUEUE_SIZE
+            )
 
         logger.debug("Initializing alerter")
         # Init alerter
@@ -53,66 +112,577 @@ class ScrapeManager:
         self.data_manager = DataManager(
             notifier=self.notifier,
             data_file=config.DATA_FILE,
-            last_scrape_file=config.LAST_SCRAPE_FILE
+            last_scrape_file=config.LAST_SCRAPE_FILE,
+            history_file=config.HISTORY_FILE,
+            archive_dir=config.ARCHIVE_DIR,
+            checkpoint_dir=config.CHECKPOINT_DIR,
+            checkpoint_max_age=config.CHECKPOINT_MAX_AGE,
+            snapshot_cache_bytes=config.SNAPSHOT_CACHE_BYTES,
+            snapshot_depth=config.SNAPSHOT_CACHE_DEPTH
+            )
+
+        logger.debug("Initializing change feed")
+        # Changes are published per target as soon as it is scraped
+        self.change_feed = ChangeFeed()
+        self.change_feed.subscribe(self.alerter.alert_changes)
+        self.change_feed.subscribe(self.data_manager.save_changes)
+
+        logger.debug("Initializing identity pool")
+        # Shared between requesters so scores and sessions persist
+        self.identity_pool = IdentityPool(
+            proxies=config.PROXIES,
+            header_profiles=config.HEADER_PROFILES,
+            failure_threshold=config.IDENTITY_FAILURE_THRESHOLD,
+            quarantine_time=config.IDENTITY_QUARANTINE_TIME
             )
 
+        # Shared so block/error counters add up per host
+        self.classifier = PageClassifier(
+            markers=config.BLOCK_MARKERS,
+            min_size=config.MIN_PAGE_SIZE,
+            window=config.BLOCK_CHECK_WINDOW,
+            max_block_size=config.BLOCK_PAGE_MAX_SIZE
+            )
+
+        # Learns how often each target changes to skip targets not due
+        self.scheduler = AdaptiveScheduler(
+            state_file=config.SCHEDULE_FILE,
+            min_interval=config.SCHEDULE_MIN_INTERVAL,
+            max_interval=config.SCHEDULE_MAX_INTERVAL,
+            threshold_margin=config.SCHEDULE_THRESHOLD_MARGIN,
+            history=self.data_manager.history
+            ) if config.SCHEDULE_FILE else None
+
+        # Learns how long each page takes to start the slowest ones first
+        self.costs = CostModel(
+            state_file=config.COST_FILE,
+            defaults=config.COST_DEFAULTS
+            )
+
+        self.adopt_history()
         logger.debug("ScrapeManager initialized")
 
     def run(self):
         """
         Begin the scrape loop. Will loop through all targets set in the target
-        list. Uses dict lookup for Scrape, Parser, and Requester objects to
+        list, grouped so targets sharing a url and scrape type are fetched
+        once. Uses dict lookup for Scrape, Parser, and Requester objects to
         build the scrape.
 
-        When the scrape completes it adds the Item list to
+        When the scrape completes it adds the Item list of each target to
         a dict current_scrape, alerts via alerter of any items below the set
-        price threshold.
+        price threshold, and publishes the target's stock, price and listing
+        changes against the last scrape to the change feed. The last scrape
+        is read from the in-memory snapshot cache, falling back to the
+        last_scrape file.
 
-        Once all scrapes are complete if there is a last_scrape file, it will
-        load that and alert to any stock or price changes.
+        Pages are scraped concurrently in a worker pool per resource class,
+        see scrape_groups().
 
-        Finally,
+        Finally, saves the scrape as the last scrape for the next run.
         """
         logger.debug("ScrapeManager started")
+        targets = self.begin_cycle()
+        self.scrape_groups(self.group_targets(targets))
+        self.finish_cycle()
 
-        for target in self.targets:
-            # Select the appropriate scrape class
-            scrape = Scrapers.lookup[target["scrape_type"]](
-                name=target["name"],
-                notifier=self.notifier,
-                requester=(
-                    Requesters.lookup[target["scrape_type"]](notifier=self.notifier)),  # noqa
-                parser=Parsers.lookup[target["scrape_type"]](self.notifier),
-                alerter=self.alerter,
-                data_manager=self.data_manager,
-                url=target["url"],
-                min_retry_time=config.MIN_TRY_TIME,
-                max_retry_time=config.MAX_TRY_TIME,
-                max_tries=config.MAX_TRIES,
-                discord_log=target["discord_log"]
-            )
-            # Scrape! Add items to current scrape list
-            self.current_scrape[scrape.name] = scrape.scrape_items()
-
-            # Price stock alert
-            self.alerter.price_stock_alert(
-                name=target["name"],
-                item_list=scrape.items,
-                threshold=target["price threshold"],
-                in_stock=target["in_stock_alert"]
+    def begin_cycle(self) -> list[dict]:
+        """
+        Resets the running cycle and loads the last scrape for change
+        alerts. If the last cycle didn't finish and isn't older than
+        CHECKPOINT_MAX_AGE, targets it already checkpointed are restored
+        instead of scraped again. Targets the
+        scheduler doesn't have due carry their last items forward so the
+        snapshot and last scrape stay complete.
+
+        Returns the targets still to scrape this cycle.
+        """
+        self.cycle_start = dt.datetime.now()
+        self.cycle_deadline = Deadline(config.CYCLE_BUDGET)
+        self.current_scrape = {}
+        self.stale = []
+        self.pools = {}
+        if self.data_manager.archive:
+            self.data_manager.archive.start_run()
+
+        with self.targets_lock:
+            targets = list(self.targets)
+        if self.data_manager.checkpoint:
+            # Only targets still configured are restored
+            self.cycle_id, done = self.data_manager.checkpoint.begin(
+                {target_id(target) for target in targets})
+        else:
+            self.cycle_id, done = uuid.uuid4().hex, {}
+        for key, checkpoint in done.items():
+            self.current_scrape[key] = checkpoint["items"]
+            self.run_metrics["targets"][key] = checkpoint["metrics"]
+
+        # Last scrape for change alerts, loaded from file on a cache miss
+        self.data_manager.last_scrape = None
+
+        targets = [target for target in targets
+                   if target_id(target) not in done]
+
+        if self.scheduler:
+            due = self.scheduler.due(targets)
+            due_ids = {target_id(target) for target in due}
+            skipped = [target for target in targets
+                       if target_id(target) not in due_ids]
+            for target in skipped:
+                self.current_scrape[target_id(target)] = (
+                    self.data_manager.last_items(target_id(target),
+                                                 target["name"]))
+            if skipped:
+                logger.info("%d target(s) not due this cycle", len(skipped))
+            targets = due
+        return targets
+
+    def scrape_groups(self, groups: dict[tuple, list[dict]]):
+        """
+        Scrapes every group's page in the worker pool of its resource
+        class, POOL_SIZES pages at a time: a few Firefox instances for
+        selenium pages, more threads for plain HTTP ones. Each pool starts
+        its pages longest first by their historical cost, so a slow page
+        never starts last and the pools finish close together (LPT
+        scheduling).
+
+        Only the fetch runs in the pools. Targets are processed on this
+        thread as their page completes, so alerts, history, checkpoints
+        and the scheduler are never run concurrently. When profiling,
+        pages are scraped one at a time on this thread, since profiled
+        sections can't overlap.
+        """
+        resources = {key: self.resource(key[1]) for key in groups}
+        self.pools = self.costs.plan(groups, resources, config.POOL_SIZES)
+        for resource, pool in self.pools.items():
+            logger.info("%s pool: %d page(s) on %d worker(s), about %s "
+                        "seconds", resource, len(pool["keys"]),
+                        pool["workers"], pool["makespan"])
+
+        if self.profiler:
+            for pool in self.pools.values():
+                for url, scrape_type in pool["keys"]:
+                    self.scrape_group(groups[(url, scrape_type)], url,
+                                      scrape_type)
+            return
+
+        executors = [
+            ThreadPoolExecutor(max_workers=pool["workers"],
+                               thread_name_prefix=f"{resource}-pool")
+            for resource, pool in self.pools.items()
+        ]
+        try:
+            # Workers take pages in submission order, longest first
+            futures = {
+                executor.submit(self.fetch_group, groups[key], *key): key
+                for executor, pool in zip(executors, self.pools.values())
+                for key in pool["keys"]
+            }
+            for future in as_completed(futures):
+                group = groups[futures[future]]
+                try:
+                    items, fetch, stale = future.result()
+                except Exception as e:
+                    name = " / ".join(target["name"] for target in group)
+                    logger.exception("[%s] Error scraping %s: %s", name,
+                                     futures[future][0], e,
+                                     extra={"target": name, "stage": "fetch"})
+                    items, fetch, stale = None, None, True
+                self.finish_group(group, items, fetch, stale)
+        finally:
+            for executor in executors:
+                executor.shutdown(cancel_futures=True)
+
+    def scrape_group(self, group: list[dict], url: str, scrape_type: str):
+        """
+        Scrapes a page once, then fans the items out to every target in
+        the group.
+        """
+        self.finish_group(group, *self.fetch_group(group, url, scrape_type))
+
+    def fetch_group(self,
+                    group: list[dict],
+                    url: str,
+                    scrape_type: str
+                    ) -> tuple[list[Item] | None, dict | None, bool]:
+        """
+        Scrapes a group's page. Safe to run from the worker pools. Returns
+        the items, the fetch duration and request stats, and whether the
+        page ran out of its time budget or wasn't started because the
+        cycle's budget is gone.
+        """
+        deadline = self.target_deadline(group)
+        if deadline.expired():
+            return None, None, True
+
+        fetch_start = time.monotonic()
+        scrape = self.build_scrape(group, url, scrape_type)
+
+        with self.profile(scrape.name, "scrape"):
+            items = scrape.scrape_items(deadline)
+        fetch = {"duration": round(time.monotonic() - fetch_start, 3)}
+        fetch.update(getattr(scrape.requester, "stats", {}).get(
+            scrape.name, {}))
+        return items, fetch, scrape.stale
+
+    def finish_group(self,
+                     group: list[dict],
+                     items: list[Item] | None,
+                     fetch: dict | None,
+                     stale: bool):
+        """
+        Fans a fetched page's items out to every target in the group, or
+        marks them stale. A target that fails to process is logged and
+        marked stale so the rest of the cycle still runs.
+        """
+        for target in group:
+            error = None
+            if not stale:
+                try:
+                    self.process_target(target, items, fetch)
+                    continue
+                except Exception as e:
+                    logger.exception("[%s] Error processing target: %s",
+                                     target["name"], e,
+                                     extra={"target": target["name"],
+                                            "stage": "process"})
+                    error = repr(e)
+            try:
+                self.mark_stale(target, fetch, error)
+            except Exception as e:
+                logger.exception("[%s] Error marking target stale: %s",
+                                 target["name"], e,
+                                 extra={"target": target["name"],
+                                        "stage": "stale"})
+
+    def resource(self, scrape_type: str) -> str:
+        """
+        Resource class a scrape type's pages need, from its requester.
+        """
+        return Requesters.lookup[scrape_type].resource
+
+    def record_cost(self, target: dict, fetch: dict | None):
+        """
+        Feeds a target's page duration to the cost model.
+        """
+        if fetch and fetch.get("duration") is not None:
+            self.costs.record(target_id(target),
+                              self.resource(target["scrape_type"]),
+                              fetch["duration"])
+
+    def target_deadline(self, group: list[dict]) -> Deadline:
+        """
+        Deadline for scraping a group's page: the strictest time_budget of
+        its targets, TARGET_BUDGET by default, capped to the cycle's.
+        """
+        budgets = [target["time_budget"] for target in group
+                   if target.get("time_budget")]
+        budget = min(budgets) if budgets else config.TARGET_BUDGET
+        return (self.cycle_deadline or Deadline()).child(budget)
+
+    def mark_stale(self,
+                   target: dict,
+                   fetch: dict | None = None,
+                   error: str | None = None):
+        """
+        Carries a target's last items forward when it ran out of time, or
+        failed to process with error, so the snapshot and last scrape stay
+        complete. Its metrics record the reason, "timeout" or "error".
+        Nothing is alerted or recorded for it, and it isn't checkpointed
+        so a resumed cycle tries it again.
+        """
+        name = target["name"]
+        key = target_id(target)
+        items = self.data_manager.last_items(key, name)
+        self.current_scrape[key] = items
+        self.stale.append(name)
+        self.run_metrics["targets"][key] = {
+            "last_run": dt.datetime.now().isoformat(timespec="seconds"),
+            "items": len(items or []),
+            "ok": False,
+            "stale": True,
+            **(fetch or {}),
+            "reason": "timeout" if error is None else "error",
+        }
+        if error is not None:
+            self.run_metrics["targets"][key]["error"] = error
+        if self.scheduler:
+            self.scheduler.observe(target, None, None)
+        self.record_cost(target, fetch)
+        self.publish_metrics()
+        self.version += 1
+        logger.warning("[%s] %s, keeping the last scrape's items", name,
+                       "out of time" if error is None else "failed",
+                       extra={"target": name, "stage": "stale"})
+
+    def finish_cycle(self):
+        """
+        Saves the scrape as the last scrape for the next run and publishes
+        it as the snapshot. The save is atomic, and the cycle's checkpoints
+        are only cleared once it has succeeded.
+        """
+        saved = self.data_manager.save_snapshot(
+            items=self.current_scrape, file_name=config.LAST_SCRAPE_FILE)
+        if saved and self.data_manager.checkpoint:
+            self.data_manager.checkpoint.finish()
+        if self.scheduler:
+            self.scheduler.save()
+            self.run_metrics["schedule"] = self.scheduler.status()
+        self.costs.save()
+        self.run_metrics["costs"] = self.costs.status()
+        if self.data_manager.snapshots is not None:
+            self.run_metrics["snapshot_cache"] = (
+                self.data_manager.snapshots.stats())
+        if self.profiler:
+            self.profiler.write()
+
+        self.snapshot = self.current_scrape
+        self.run_metrics["cycles"] += 1
+        self.run_metrics["identities"] = self.identity_pool.status()
+        self.run_metrics["hosts"] = self.classifier.report()
+        self.run_metrics["last_cycle"] = {
+            "start": self.cycle_start.isoformat(timespec="seconds"),
+            "duration": (dt.datetime.now() - self.cycle_start).seconds,
+            "targets": len(self.current_scrape),
+            "stale": list(self.stale),
+            "pools": {resource: {key: value for key, value in pool.items()
+                                 if key != "keys"}
+                      for resource, pool in self.pools.items()},
+        }
+        self.publish_metrics()
+        self.version += 1
+        if self.stale:
+            logger.warning("Cycle finished with %d stale target(s): %s",
+                           len(self.stale), ", ".join(self.stale))
+
+    def publish_metrics(self):
+        """
+        Publishes a copy of run_metrics as metrics. The web server reads
+        metrics from its own threads, so the published copy is swapped in
+        whole and never changed afterwards.
+        """
+        with self.metrics_lock:
+            self.metrics = copy.deepcopy(self.run_metrics)
+
+    def profile(self, name: str, stage: str):
+        """
+        Context manager profiling a stage of a target when a profiler is
+        set, otherwise a no-op.
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.section(name, stage)
+
+    def group_targets(self, targets: list[dict]) -> dict[tuple, list[dict]]:
+        """
+        Groups targets by (url, scrape_type) so each page is requested and
+        parsed once per cycle no matter how many targets watch it.
+        """
+        groups = {}
+        for target in targets:
+            groups.setdefault(
+                (target["url"], target["scrape_type"]), []
+                ).append(target)
+        return groups
+
+    def build_scrape(self, group: list[dict], url: str, scrape_type: str):
+        """
+        Uses the lookup tables to build a Scrape for a group of targets
+        sharing a page. The scrape is named after its targets and archives
+        its pages under their target ids.
+        """
+        names = list(dict.fromkeys(target["name"] for target in group))
+        scrape = Scrapers.lookup[scrape_type](
+            name=" / ".join(names),
+            notifier=self.notifier,
+            requester=Requesters.lookup[scrape_type](
+                notifier=self.notifier, identity_pool=self.identity_pool),
+            parser=Parsers.lookup[scrape_type](self.notifier),
+            alerter=self.alerter,
+            data_manager=self.data_manager,
+            url=url,
+            min_retry_time=config.MIN_TRY_TIME,
+            max_retry_time=config.MAX_TRY_TIME,
+            max_tries=config.MAX_TRIES,
+            discord_log=any(target["discord_log"] for target in group),
+            classifier=self.classifier
+        )
+        scrape.targets = [target_id(target) for target in group]
+        return scrape
+
+    def tag_items(self, items: list[Item] | None, name: str):
+        """
+        Returns the items tagged with a target's name, copying only the
+        items that were tagged for another target.
+        """
+        if not items:
+            return items
+        tagged = []
+        for item in items:
+            if item.search != name:
+                item = copy.copy(item)
+                item.search = name
+            tagged.append(item)
+        return tagged
+
+    def process_target(self,
+                       target: dict,
+                       items: list[Item] | None,
+                       fetch: dict):
+        """
+        Runs everything that happens per target once its page is scraped:
+        rule alerts, history, price/stock alerts, metrics and change events.
+        fetch holds the shared page's duration and request stats.
+        """
+        with self.profile(target["name"], "alert"):
+            self._process_target(target, items, fetch)
+
+    def _process_target(self,
+                        target: dict,
+                        items: list[Item] | None,
+                        fetch: dict):
+        name = target["name"]
+        key = target_id(target)
+        process_start = time.monotonic()
+        items = self.tag_items(items, name)
+
+        # Add items to current scrape list
+        self.current_scrape[key] = items
+        items = items or []
+        last_items = self.data_manager.last_items(key, name)
+
+        # Rule alerts, checked against the rollups before they update
+        if target.get("rules") and self.data_manager.history:
+            self.alerter.rule_alert(
+                name=key,
+                item_list=items,
+                rules=Rules.build(target["rules"]),
+                history=self.data_manager.history,
+                last_items=last_items
                 )
 
-        # Load last scrape for change alerts
-        self.last_scrape = self.data_manager.load_from_pickle(
-            file_name=config.LAST_SCRAPE_FILE
+        # Update indexed history and rollups
+        self.data_manager.save_to_history(key, items)
+        self.run_metrics["targets"][key] = {
+            "last_run": dt.datetime.now().isoformat(timespec="seconds"),
+            "items": len(items),
+            "ok": bool(items),
+            **fetch,
+        }
+
+        # Price stock alert
+        self.alerter.price_stock_alert(
+            name=name,
+            item_list=items,
+            threshold=target["price_threshold"],
+            in_stock=target["in_stock_alert"]
             )
 
-        # If there are items in the last scrape file, check and alert
-        if self.last_scrape:
-            self.alerter.compare_alert(
-                new_scrape=self.current_scrape,
-                last_scrape=self.last_scrape)
+        # Stream this target's changes to alerts and storage right away
+        changes = None
+        if items and last_items:
+            changes = list(diff(key, items, last_items))
+            self.change_feed.publish(key, changes)
+        if self.data_manager.snapshots is not None:
+            self.data_manager.snapshots.put(key, self.current_scrape[key])
+
+        # Reschedule from whether anything changed
+        if self.scheduler:
+            self.scheduler.observe(target, self.current_scrape[key], changes)
+        self.record_cost(target, fetch)
+
+        # Checkpoint so a crashed cycle doesn't redo this target
+        if self.data_manager.checkpoint:
+            self.data_manager.checkpoint.save(
+                key, name, self.current_scrape[key],
+                self.run_metrics["targets"][key]
+                )
+        self.publish_metrics()
+        self.version += 1
+        duration = time.monotonic() - process_start
+        logger.debug("[%s] processed in %.3f seconds", name, duration,
+                     extra={"target": name, "stage": "process",
+                            "duration": duration})
+
+    def apply_targets(self, targets: list[dict]) -> tuple[list, list, list]:
+        """
+        Swaps in a new validated target list without touching the notifier,
+        data manager or anything else the manager holds open. Only added,
+        removed and changed targets are reported, and metrics of removed
+        targets are dropped. Takes effect from the next cycle, a running
+        cycle keeps the targets it started with.
+
+        Returns lists of added, removed and changed target ids.
+        """
+        with self.targets_lock:
+            old = {target_id(target): target for target in self.targets}
+            new = {target_id(target): target for target in targets}
+
+            added = [key for key in new if key not in old]
+            removed = [key for key in old if key not in new]
+            changed = [key for key in new
+                       if key in old and new[key] != old[key]]
+
+            self.targets = list(targets)
+
+        # Runs on the watcher thread while a cycle may be updating
+        # run_metrics, so the published copy is replaced instead of
+        # copied again
+        with self.metrics_lock:
+            for key in removed:
+                self.run_metrics["targets"].pop(key, None)
+            self.metrics = dict(self.metrics, targets={
+                key: value for key, value in self.metrics["targets"].items()
+                if key not in removed})
+
+        if added:
+            self.adopt_history()
+        if added or removed or changed:
+            self.version += 1
+            logger.info("Targets reloaded: %d added, %d removed, %d changed",
+                        len(added), len(removed), len(changed))
+        return added, removed, changed
+
+    def adopt_history(self):
+        """
+        Moves history recorded under a target's name, from before history
+        was keyed by target id, over to its id. Only done for names used by
+        a single target, and only while the id has no history of its own.
+        """
+        history = self.data_manager.history
+        if history is None:
+            return
+        with self.targets_lock:
+            targets = list(self.targets)
+        names = [target["name"] for target in targets]
+        for target in targets:
+            key = target_id(target)
+            if key != target["name"] and names.count(target["name"]) == 1:
+                history.rename_search(target["name"], key)
+
+    def next_wait(self, interval: int) -> float:
+        """
+        Seconds to wait before the next cycle: interval, or sooner when the
+        scheduler has a target due before then.
+        """
+        if not self.scheduler:
+            return interval
+        with self.targets_lock:
+            targets = list(self.targets)
+        return min(interval, max(self.scheduler.next_due(targets), 1))
+
+    def run_forever(self, interval: int):
+        """
+        Keeps the process resident and runs a scrape cycle every interval
+        seconds, or sooner when a target is due, until stop() is called.
+        Errors in a cycle are logged and the next cycle runs as normal.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.run()
+            except Exception as e:
+                logger.exception("Scrape cycle failed: %s", e)
+            self.stop_event.wait(self.next_wait(interval))
 
-        # Save scrape as last scrape data
-        self.data_manager.save_to_pickle(items=self.current_scrape,
-                                         file_name=config.LAST_SCRAPE_FILE)
+    def stop(self):
+        self.stop_event.set()
@@ -1,8 +1,14 @@
-from .parser import Parser, Parsers, StandardParser, SeleniumParser
-from .requester import (Requester, Requesters, StandardRequester,
-                        SeleniumRequester)
+from .detect import PageClassifier
+from .identity import Identity, IdentityPool
+from .parser import (Parser, Parsers, StandardParser, SeleniumParser,
+                     JsonParser)
+from .requester import (Page, Requester, Requesters, StandardRequester,
+                        SeleniumRequester, JsonRequester)
 from .scrape import Scrape, StandardScrape, SeleniumScrape
 
-__all__ = ["Parser", "Parsers", "StandardParser", "SeleniumParser",
-           "Requester", "Requesters", "StandardRequester", "SeleniumRequester",
+__all__ = ["PageClassifier", "Identity", "IdentityPool",
+           "Parser", "Parsers", "StandardParser", "SeleniumParser",
+           "JsonParser",
+           "Page", "Requester", "Requesters", "StandardRequester",
+           "SeleniumRequester", "JsonRequester",
            "Scrape", "StandardScrape", "SeleniumScrape"]
@@ -0,0 +1,101 @@
+from collections import defaultdict
+import logging
+import threading
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+BLOCKED = "blocked"
+EMPTY = "empty"
+ERROR = "error"
+
+
+class PageClassifier:
+    """
+    Cheap pre-parse check of a Page so the retry loop can react before
+    spending a full parse on it. Only looks at the status code, body size
+    and a small window of the body for block page markers.
+
+    Markers are only searched in 503 responses and pages smaller than
+    max_block_size. Real product pages often load a captcha script in
+    their <head>, block and interstitial pages are small. JSON responses
+    are never empty for being small, an API may return one product.
+
+    Labels:
+    ok = looks like a real page, parse it
+    blocked = captcha, interstitial or rate limit page
+    empty = (almost) nothing came back
+    error = request failed or the server returned an error status
+
+    Attributes:
+    markers = lowercase byte strings that identify block pages
+    min_size = bodies smaller than this are empty, JSON excepted
+    window = bytes from the start of the body searched for markers
+    max_block_size = bodies from this size up are never block pages
+    counts = dict of host: dict of label: count
+
+    Methods:
+    classify() = labels a Page and counts it against its host
+    """
+
+    BLOCKED_STATUSES = (403, 429)
+
+    def __init__(self,
+                 markers: list[str],
+                 min_size: int,
+                 window: int,
+                 max_block_size: int = 16 * 1024):
+        self.markers = [marker.lower().encode() for marker in markers]
+        self.min_size = min_size
+        self.window = window
+        self.max_block_size = max_block_size
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return (f"PageClassifier(markers={len(self.markers)!r}, "
+                f"min_size={self.min_size!r}, window={self.window!r}, "
+                f"max_block_size={self.max_block_size!r})")
+
+    def classify(self, page) -> str:
+        label = self._label(page)
+        host = urlsplit(page.url).hostname or page.url
+        with self.lock:
+            self.counts[host][label] += 1
+        return label
+
+    def _label(self, page) -> str:
+        status = page.status
+        content = page.content
+        if isinstance(content, str):
+            content = content.encode("utf-8", errors="replace")
+
+        if status in self.BLOCKED_STATUSES:
+            return BLOCKED
+        if status is not None and status >= 400 and status != 503:
+            return ERROR
+        if not content or (len(content) < self.min_size
+                           and not self._is_json(page)):
+            return ERROR if status is None or status == 503 else EMPTY
+
+        if status == 503 or len(content) < self.max_block_size:
+            head = content[:self.window].lower()
+            if any(marker in head for marker in self.markers):
+                return BLOCKED
+        if status == 503:
+            return ERROR
+        return OK
+
+    @staticmethod
+    def _is_json(page) -> bool:
+        content_type = next((value for key, value in page.headers.items()
+                             if key.lower() == "content-type"), "")
+        return "json" in content_type.lower()
+
+    def report(self) -> dict:
+        """
+        Returns the counters as plain dicts.
+        """
+        with self.lock:
+            return {host: dict(labels) for host, labels in self.counts.items()}
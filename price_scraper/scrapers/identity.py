@@ -0,0 +1,163 @@
+import itertools
+import logging
+import random
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class Identity:
+    """
+    One way of showing up at a website: an egress proxy and a header
+    profile, with a warm requests session and running health stats.
+
+    Attributes:
+    proxy = proxy url e.g. "http://127.0.0.1:8888", None for direct
+    headers = header profile sent with requests
+    session = requests.Session routed through the proxy
+    score = moving average of request success, 1.0 = always succeeds
+    latency = moving average of request time in seconds
+    failures = consecutive failures
+    strikes = times quarantined, doubles the next quarantine
+    quarantined_until = time.monotonic() the identity is usable again
+    """
+
+    def __init__(self, proxy: str | None, headers: dict):
+        self.proxy = proxy
+        self.headers = headers
+        self.session = requests.Session()
+        if proxy:
+            self.session.proxies = {"http": proxy, "https": proxy}
+        self.score = 1.0
+        self.latency = 0.0
+        self.failures = 0
+        self.strikes = 0
+        self.quarantined_until = 0.0
+
+    def __repr__(self):
+        return (f"Identity(proxy={self.proxy!r}, "
+                f"user_agent={self.headers.get('User-Agent', '')[:30]!r}, "
+                f"score={self.score:.2f})")
+
+    @property
+    def quarantined(self) -> bool:
+        return time.monotonic() < self.quarantined_until
+
+    @property
+    def rank(self) -> float:
+        """
+        Higher is better. Favours reliable identities, then fast ones.
+        """
+        return self.score / (1 + self.latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "proxy": self.proxy,
+            "user_agent": self.headers.get("User-Agent"),
+            "score": round(self.score, 3),
+            "latency": round(self.latency, 3),
+            "failures": self.failures,
+            "quarantined": self.quarantined,
+        }
+
+
+class IdentityPool:
+    """
+    Pool of egress proxies and header profiles, scored on success rate and
+    latency. Requests are spread over healthy identities weighted by rank,
+    identities that keep failing are quarantined with a growing back-off.
+
+    Every proxy is paired with every header profile. A proxy of None means
+    a direct connection, so the default pool is a single direct identity
+    with config.HEADERS.
+
+    Attributes:
+    identities = list of Identity objects
+    failure_threshold = consecutive failures before quarantine
+    quarantine_time = base quarantine in seconds, doubled per strike
+    max_quarantine_time = quarantine cap in seconds
+    alpha = weight of the newest result in the moving averages
+
+    Methods:
+    acquire() = picks an identity for the next request
+    report() = records the outcome of a request made with an identity
+    status() = identity health as a list of dicts
+    """
+
+    def __init__(
+        self,
+        proxies: list[str | None],
+        header_profiles: list[dict],
+        failure_threshold: int = 3,
+        quarantine_time: float = 300,
+        max_quarantine_time: float = 3600,
+        alpha: float = 0.3
+    ):
+        self.identities = [
+            Identity(proxy, headers) for proxy, headers
+            in itertools.product(proxies or [None], header_profiles)
+        ]
+        self.failure_threshold = failure_threshold
+        self.quarantine_time = quarantine_time
+        self.max_quarantine_time = max_quarantine_time
+        self.alpha = alpha
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"IdentityPool(identities={len(self.identities)!r})"
+
+    def acquire(self, exclude: Identity | None = None) -> Identity:
+        """
+        Returns a healthy identity, chosen at random weighted by rank.
+        exclude skips an identity, e.g. one that was just blocked, when
+        there is another to use. If everything is quarantined the one
+        released soonest is used.
+        """
+        with self.lock:
+            healthy = [identity for identity in self.identities
+                       if not identity.quarantined]
+            if exclude is not None and len(healthy) > 1:
+                healthy = [identity for identity in healthy
+                           if identity is not exclude]
+            if not healthy:
+                return min(self.identities,
+                           key=lambda identity: identity.quarantined_until)
+            return random.choices(
+                healthy,
+                weights=[max(identity.rank, 0.01) for identity in healthy]
+                )[0]
+
+    def report(self,
+               identity: Identity,
+               ok: bool,
+               latency: float | None = None):
+        """
+        Updates an identity's score and latency and quarantines it after
+        failure_threshold consecutive failures.
+        """
+        with self.lock:
+            identity.score += self.alpha * (float(ok) - identity.score)
+            if latency is not None:
+                identity.latency += self.alpha * (latency - identity.latency)
+
+            if ok:
+                identity.failures = 0
+                identity.strikes = 0
+                return
+
+            identity.failures += 1
+            if identity.failures >= self.failure_threshold:
+                duration = min(self.quarantine_time * 2 ** identity.strikes,
+                               self.max_quarantine_time)
+                identity.quarantined_until = time.monotonic() + duration
+                identity.strikes += 1
+                identity.failures = 0
+                logger.warning(f"{identity!r} quarantined for "
+                               f"{duration:.0f} seconds")
+
+    def status(self) -> list[dict]:
+        with self.lock:
+            return [identity.as_dict() for identity in self.identities]
@@ -0,0 +1,259 @@
+"""
+Price and text normalization shared by the parsers.
+
+Prices are parsed straight from text into integer minor units (cents) with
+precompiled regexes, never through float, and results are cached since the
+same strings repeat across cards and scrapes.
+
+    >>> parse_price("$1,499.99")
+    Price(minor=149999, currency='USD', exponent=2)
+    >>> parse_price("1.299,00 €").major
+    1299
+    >>> parse_range("$10 - $20.50")
+    (Price(minor=1000, currency='USD', exponent=2), Price(minor=2050, currency='USD', exponent=2))
+    >>> parse_was_now("Was $1,599.99 Now $1,499.99").now.major
+    1500
+    >>> normalize_title("  RTX\\n  5090   16GB ")
+    'RTX 5090 16GB'
+"""
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import re
+from typing import NamedTuple
+
+CACHE_SIZE = 4096
+
+CURRENCY_SYMBOLS = {
+    "US$": "USD",
+    "C$": "CAD",
+    "CA$": "CAD",
+    "A$": "AUD",
+    "AU$": "AUD",
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "¥": "JPY",
+    "₹": "INR",
+}
+CURRENCY_CODES = ("USD", "CAD", "AUD", "EUR", "GBP", "JPY", "INR", "CHF",
+                  "SEK", "NOK", "DKK", "PLN", "NZD", "KRW")
+ZERO_DECIMAL_CURRENCIES = {"JPY", "KRW"}
+
+_CURRENCY = (
+    "|".join(re.escape(symbol) for symbol in CURRENCY_SYMBOLS)
+    + r"|\b(?:" + "|".join(CURRENCY_CODES) + r")\b"
+)
+# Thousands grouped with , . ' or spaces, or plain digits, then 1-2
+# decimals
+_AMOUNT = (r"(?P<whole>\d{1,3}(?:(?P<group>[,.'   ])\d{3})"
+           r"(?:(?P=group)\d{3})*|\d+)"
+           r"(?:(?P<decimal>[.,])(?P<fraction>\d{1,2}))?(?!\d)")
+# Only symbols that are written after the amount
+_SUFFIX_CURRENCY = r"[€£]|\b(?:" + "|".join(CURRENCY_CODES) + r")\b"
+
+PRICE_PATTERN = re.compile(
+    rf"(?P<pre>{_CURRENCY})?\s*(?<![\d.,]){_AMOUNT}"
+    rf"(?:\s*(?P<post>{_SUFFIX_CURRENCY}))?"
+)
+RANGE_SEPARATOR = re.compile(r"^\s*(?:-|–|—|to)\s*$", re.IGNORECASE)
+WAS_WORDS = re.compile(
+    r"\b(?:was|list(?:\s+price)?|reg(?:ular)?(?:\s+price)?|original(?:ly)?"
+    r"|msrp|compare\s+at)\s*:?\s*$", re.IGNORECASE)
+NOW_WORDS = re.compile(
+    r"\b(?:now|sale(?:\s+price)?|our\s+price|price)\s*:?\s*$", re.IGNORECASE)
+SAVE_WORDS = re.compile(r"\bsave\s*:?\s*$", re.IGNORECASE)
+OFF_WORDS = re.compile(r"\s*(?:%|off\b)", re.IGNORECASE)
+ZERO_WIDTH = re.compile("[\u200b-\u200d\ufeff]")
+
+
+class Price(NamedTuple):
+    """
+    A price in integer minor units.
+
+    Attributes:
+    minor = amount in minor units, e.g. cents
+    currency = ISO 4217 code, None if the text didn't say
+    exponent = minor units per major unit as a power of ten
+    """
+
+    minor: int
+    currency: str | None = None
+    exponent: int = 2
+
+    @property
+    def major(self) -> int:
+        """
+        Whole currency units rounded half up, as stored on Item.price.
+        """
+        unit = 10 ** self.exponent
+        return (self.minor + unit // 2) // unit
+
+    @property
+    def decimal(self) -> Decimal:
+        return Decimal(self.minor).scaleb(-self.exponent)
+
+    def __str__(self) -> str:
+        return f"{self.decimal:,} {self.currency or ''}".strip()
+
+    @classmethod
+    def from_number(cls,
+                    value: int | float | str,
+                    currency: str | None = None) -> "Price":
+        """
+        Builds a Price from a JSON number or numeric string.
+        """
+        exponent = 0 if currency in ZERO_DECIMAL_CURRENCIES else 2
+        try:
+            amount = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"Not a number: {value!r}") from None
+        return cls(int(amount.scaleb(exponent).to_integral_value()),
+                   currency, exponent)
+
+
+class WasNow(NamedTuple):
+    """
+    A listing's previous and current price. was is None when there is no
+    previous price.
+    """
+
+    was: Price | None
+    now: Price
+
+
+def _to_price(match: re.Match, default_currency: str | None) -> Price:
+    pre, whole, group, fraction, post = match.group(
+        "pre", "whole", "group", "fraction", "post")
+    if group:
+        whole = whole.replace(group, "")
+    currency = (CURRENCY_SYMBOLS.get(pre, pre) or
+                CURRENCY_SYMBOLS.get(post, post) or default_currency)
+    if currency in ZERO_DECIMAL_CURRENCIES:
+        return Price(int(whole) + (fraction is not None and fraction >= "5"),
+                     currency, 0)
+    if fraction is None:
+        return Price(int(whole) * 100, currency, 2)
+    return Price(int(whole) * 100 + int(fraction.ljust(2, "0")), currency, 2)
+
+
+def _matches(text: str) -> list[re.Match]:
+    """
+    Returns the price matches in the text. Percentages are dropped, and so
+    are bare numbers like "(2 offers)" when other amounts have a currency.
+    """
+    matches = [match for match in PRICE_PATTERN.finditer(text)
+               if not OFF_WORDS.match(text, match.end())]
+    if any(match["pre"] or match["post"] for match in matches):
+        return [match for match in matches if match["pre"] or match["post"]]
+    return matches
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_prices(text: str,
+                 default_currency: str | None = None) -> tuple[Price, ...]:
+    """
+    Returns every price in the text, in order.
+    """
+    return tuple(_to_price(match, default_currency)
+                 for match in _matches(text))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_price(text: str,
+                default_currency: str | None = None) -> Price | None:
+    """
+    Returns the first price in the text, or None if there isn't one.
+    """
+    match = PRICE_PATTERN.search(text)
+    if match is None:
+        return None
+    # Fast path, the common "$1,499.99" card text
+    if not (match["pre"] or match["post"]) or OFF_WORDS.match(
+            text, match.end()):
+        matches = _matches(text)
+        if not matches:
+            return None
+        match = matches[0]
+    return _to_price(match, default_currency)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_range(
+    text: str,
+    default_currency: str | None = None
+) -> tuple[Price, Price] | None:
+    """
+    Returns (low, high) for a price range like "$10 - $20" or "10 to 20",
+    a single price as (price, price), or None if there's no price. A
+    currency on either end applies to both.
+    """
+    matches = _matches(text)
+    if not matches:
+        return None
+    # Bare amounts count here, the low end of "10 - 20 €" has no currency
+    amounts = [match for match in PRICE_PATTERN.finditer(text)
+               if not OFF_WORDS.match(text, match.end())]
+    spans = {match.span() for match in matches}
+    pair = next(
+        ((first, second) for first, second in zip(amounts, amounts[1:])
+         if RANGE_SEPARATOR.match(text[first.end():second.start()])
+         and (first.span() in spans or second.span() in spans)),
+        None)
+    if pair is None:
+        low = _to_price(matches[0], default_currency)
+        return low, low
+    low = _to_price(pair[0], default_currency)
+    high = _to_price(pair[1], low.currency or default_currency)
+    if low.currency is None and high.currency is not None:
+        low = low._replace(currency=high.currency, exponent=high.exponent)
+    return low, high
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_was_now(text: str,
+                  default_currency: str | None = None) -> WasNow | None:
+    """
+    Splits text holding a previous and a current price, e.g.
+    "Was $20 Now $15" or "List Price: $20 Sale: $15". Amounts after "save"
+    or before "off"/"%" are discounts and ignored. Without keywords the lower
+    of two prices is taken as the current one.
+    """
+    was = now = None
+    prices = []
+    for match in _matches(text):
+        before = text[:match.start()]
+        if SAVE_WORDS.search(before) or OFF_WORDS.match(text, match.end()):
+            continue
+        price = _to_price(match, default_currency)
+        if WAS_WORDS.search(before):
+            was = was or price
+        elif NOW_WORDS.search(before):
+            now = now or price
+        prices.append(price)
+
+    if not prices:
+        return None
+    if now is None and was is None and len(prices) >= 2:
+        was, now = max(prices[:2]), min(prices[:2])
+    elif now is None:
+        now = next((price for price in prices if price is not was), was)
+        if now is was:
+            was = None
+    return WasNow(was, now)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_title(text: str) -> str:
+    """
+    Collapses runs of whitespace, including non-breaking spaces, strips
+    the ends and drops zero width characters.
+    """
+    if not text.isascii():
+        text = ZERO_WIDTH.sub("", text)
+    return " ".join(text.split())
+
+
+def clear_caches():
+    for function in (parse_prices, parse_price, parse_range, parse_was_now,
+                     normalize_title):
+        function.cache_clear()
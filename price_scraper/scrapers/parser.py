@@ -1,11 +1,21 @@
 from abc import abstractmethod
 import datetime as dt
+import json
 import logging
+import re
 
 from bs4 import BeautifulSoup
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional, the standard library works too
+    json_loads = json.loads
+
 from price_scraper.data.item import Item
 from price_scraper.notifications.notifier import Notifier
+from price_scraper.scrapers.normalize import (Price, normalize_title,
+                                              parse_price)
 
 logger = logging.getLogger(__name__)
 
@@ -14,24 +24,61 @@ class Parser:
     """
     Parses HTML into Item Objects
 
+    Parsers hold no per-call state: get_items() builds and returns a new
+    list every call, so one parser can be reused across retries and shared
+    between threads and processes.
+
     Attributes:
     notifier = Notifier object
-    soup = BeautifulSoup object
-    item_list = list of Item class objects
     """
 
     def __init__(self, notifier: Notifier):
         self.notifier = notifier
-        self.soup = None
-        self.item_list = []
 
     def __repr__(self):
         return f"Parser(notifier={Notifier!r})"
 
     @abstractmethod
-    def get_items(self, name: str, html: str) -> list[Item]:
+    def get_items(
+        self,
+        name: str,
+        html: str | bytes,
+        encoding: str | None = None
+    ) -> list[Item]:
         pass
 
+    def make_soup(
+        self,
+        html: str | bytes,
+        encoding: str | None = None
+    ) -> BeautifulSoup:
+        """
+        Builds a soup straight from raw bytes when the requester passes
+        them, decoding with the declared encoding (or sniffing it) instead
+        of decoding the page to a str first.
+        """
+        if isinstance(html, bytes):
+            return BeautifulSoup(html, "html.parser", from_encoding=encoding)
+        return BeautifulSoup(html, "html.parser")
+
+    def to_price(self, text: str) -> int:
+        """
+        Parses price text into the whole currency units stored on
+        Item.price, rounding cents half up.
+        """
+        if (price := parse_price(text)) is None:
+            raise ValueError(f"No price in {text!r}")
+        return price.major
+
+    def free_soup(self, soup: BeautifulSoup | None):
+        """
+        Breaks up the soup's reference cycles so the tree is freed straight
+        away instead of waiting for the cycle collector. Items only hold
+        plain strings, never tags, so this is safe once parsing is done.
+        """
+        if soup is not None:
+            soup.decompose()
+
 
 class StandardParser(Parser):
     """
@@ -39,8 +86,6 @@ class StandardParser(Parser):
 
     Attributes:
     notifier = Notifier object
-    soup = BeautifulSoup object
-    item_list = list of Item class objects
     """
 
     def __init__(self, notifier: Notifier):
@@ -49,20 +94,24 @@ class StandardParser(Parser):
     def __repr__(self):
         return f"StandardParser(notifier={Notifier!r})"
 
-    def get_items(self, name: str, html: str) -> list[Item]:
+    def get_items(
+        self,
+        name: str,
+        html: str | bytes,
+        encoding: str | None = None
+    ) -> list[Item]:
         """
         Takes raw html, parses with beautiful soup, and attempts to extract
         product information to build item objects. Returns a list of Items.
         """
 
         def _get_title(item):
-            title = item.find("a", class_="item-title").text
-            return title
+            return normalize_title(item.find("a", class_="item-title").text)
 
         def _get_price(item):
+            # "$1,499.99 (2 Offers)", the cents are in a <sup>
             block = item.find("li", class_="price-current")
-            price = int(block.find("strong").text.replace(",", ""))
-            return price
+            return self.to_price(block.get_text())
 
         def _get_stock(item):
             return False if item.find("p", class_="item-promo") else True
@@ -71,11 +120,12 @@ class StandardParser(Parser):
             return item.find("a").get("href")
 
         current_time = dt.datetime.now().isoformat(timespec="seconds")
+        item_list = []
 
         # Try to parse item_cards from soup
         try:
-            soup = BeautifulSoup(html, "html.parser")
-            item_cards = [item for item in soup.find_all("div", class_="item-cell")]
+            soup = self.make_soup(html, encoding)
+            item_cards = soup.find_all("div", class_="item-cell")
         except ValueError:
             logger.exception("No item cards were found")
             return []
@@ -89,7 +139,7 @@ class StandardParser(Parser):
                 link = _get_link(item)
 
                 # Add object to item list
-                self.item_list.append(
+                item_list.append(
                     Item(
                         name, current_time, title, price, in_stock, link
                     )  # type: ignore
@@ -97,11 +147,13 @@ class StandardParser(Parser):
             except Exception:
                 logger.exception(f"Error parsing [{name}]")
 
+        self.free_soup(soup)
         logger.info(
-            f"[{name}] Parsing complete: " f"{len(self.item_list)} items parsed"
+            "[%s] Parsing complete: %d items parsed", name, len(item_list),
+            extra={"target": name, "stage": "parse"}
         )
 
-        return self.item_list
+        return item_list
 
 
 class SeleniumParser(Parser):
@@ -110,8 +162,6 @@ class SeleniumParser(Parser):
 
     Attributes:
     notifier = Notifier object
-    soup = BeautifulSoup object
-    item_list = list of Item class objects
     """
 
     def __init__(self, notifier: Notifier):
@@ -123,29 +173,21 @@ class SeleniumParser(Parser):
     def get_items(
         self,
         name: str,
-        html: str,
+        html: str | bytes,
+        encoding: str | None = None
     ) -> list[Item]:
 
         current_time = dt.datetime.now().isoformat(timespec="seconds")
+        item_list = []
 
         def _get_title(item) -> str:
-            return item.find("h4", class_="sku-title").text
+            return normalize_title(item.find("h4", class_="sku-title").text)
 
         def _get_price(item) -> int:
             price_block = item.find("div", attrs={"data-testid": "customer-price"})
-            price_unfiltered = price_block.find(
+            return self.to_price(price_block.find(
                 "span", attrs={"aria-hidden": "true"}
-            ).text
-            price = round(
-                float(
-                    "".join(
-                        letter
-                        for letter in price_unfiltered
-                        if letter not in ["$", ","]
-                    )
-                )
-            )
-            return price
+            ).text)
 
         def _get_stock(item) -> bool:
             stock_tag = item.find("strong")
@@ -160,11 +202,10 @@ class SeleniumParser(Parser):
 
         # Try to parse item_cards from soup, if it fails return empty list
         try:
-            soup = BeautifulSoup(html, "html.parser")
-            item_cards = [
-                item for item in soup.find_all("div", class_="shop-sku-list-item")
-            ]
-            logger.info(f"[{name}] {len(item_cards)} item cards parsed")
+            soup = self.make_soup(html, encoding)
+            item_cards = soup.find_all("div", class_="shop-sku-list-item")
+            logger.info("[%s] %d item cards parsed", name, len(item_cards),
+                        extra={"target": name, "stage": "parse"})
         except ValueError:
             logger.exception(f"[{name}]No item cards were parsed")
             return []
@@ -177,22 +218,190 @@ class SeleniumParser(Parser):
                     stock = _get_stock(item)
                     link = _get_link(item)
 
-                    self.item_list.append(
+                    item_list.append(
                         Item(name, current_time, title, price, stock, link)
                     )
 
                 except Exception:
                     logger.exception(f"Error parsing [{name}]")
+                    self.free_soup(soup)
                     return []
 
+        self.free_soup(soup)
         logger.info(
-            f"[{name}] Parsing complete: " f"{len(self.item_list)} items parsed"
+            "[%s] Parsing complete: %d items parsed", name, len(item_list),
+            extra={"target": name, "stage": "parse"}
         )
 
-        if not self.item_list:
-            logger.info(f"Parsing [{name}] returned no results")
+        if not item_list:
+            logger.info("Parsing [%s] returned no results", name,
+                        extra={"target": name, "stage": "parse"})
+
+        return item_list
+
+
+class JsonParser(Parser):
+    """
+    Parses product data embedded as JSON instead of rendering the page.
+    Handles JSON API/XHR responses and HTML pages carrying their data in
+    <script type="application/json">, application/ld+json or __NEXT_DATA__
+    tags. Script tags are found with a regex on the raw bytes so the HTML
+    is never parsed into a tree.
+
+    Products are any JSON object with a title key and a price key (directly
+    or under "offers"). Override the key tuples or _find_products() for
+    other layouts.
+
+    Attributes:
+    notifier = Notifier object
+    base_url = prefix for relative product links
+    """
+
+    TITLE_KEYS = ("name", "title", "productName")
+    PRICE_KEYS = ("price", "currentPrice", "salePrice", "lowPrice")
+    STOCK_KEYS = ("availability", "inStock", "in_stock", "available")
+    LINK_KEYS = ("url", "link", "href")
+    OUT_OF_STOCK = ("outofstock", "soldout", "discontinued", "sold out",
+                    "out of stock")
+
+    SCRIPT_PATTERN = re.compile(
+        rb"<script[^>]*(?:type=[\"']application/(?:ld\+)?json[\"']"
+        rb"|id=[\"']__NEXT_DATA__[\"'])[^>]*>(.*?)</script>",
+        re.IGNORECASE | re.DOTALL,
+    )
 
-        return self.item_list
+    base_url = ""
+
+    def __init__(self, notifier: Notifier):
+        super().__init__(notifier)
+
+    def __repr__(self):
+        return f"JsonParser(notifier={Notifier!r})"
+
+    def get_items(
+        self,
+        name: str,
+        html: str | bytes,
+        encoding: str | None = None
+    ) -> list[Item]:
+
+        current_time = dt.datetime.now().isoformat(timespec="seconds")
+
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        elif encoding and encoding.lower().replace("-", "") != "utf8":
+            html = html.decode(encoding, errors="replace").encode("utf-8")
+
+        item_list = []
+        seen = set()
+        for document in self._documents(name, html):
+            for product in self._find_products(document):
+                try:
+                    item = Item(
+                        name,
+                        current_time,
+                        self._get_title(product),
+                        self._get_price(product),
+                        self._get_stock(product),
+                        self._get_link(product),
+                    )
+                except Exception:
+                    logger.exception(f"Error parsing [{name}]")
+                    continue
+                if (item.item, item.link) not in seen:
+                    seen.add((item.item, item.link))
+                    item_list.append(item)
+
+        logger.info(
+            "[%s] Parsing complete: %d items parsed", name, len(item_list),
+            extra={"target": name, "stage": "parse"}
+        )
+        return item_list
+
+    def _documents(self, name: str, html: bytes) -> list:
+        """
+        Returns the JSON documents in a response: the whole body for API
+        responses, otherwise every JSON script tag.
+        """
+        body = html.strip()
+        if body[:1] in (b"{", b"["):
+            try:
+                return [json_loads(body)]
+            except ValueError:
+                logger.warning(f"[{name}] Response looked like invalid JSON")
+
+        documents = []
+        for match in self.SCRIPT_PATTERN.finditer(html):
+            try:
+                documents.append(json_loads(match.group(1).strip()))
+            except ValueError:
+                logger.debug("[%s] Skipping unparsable JSON script", name)
+        return documents
+
+    def _find_products(self, document) -> list[dict]:
+        """
+        Walks a JSON document and returns every object that looks like a
+        product. Doesn't descend into products once found.
+        """
+        products = []
+        stack = [document]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if (self._first(node, self.TITLE_KEYS) is not None and
+                        self._offer_value(node, self.PRICE_KEYS) is not None):
+                    products.append(node)
+                    continue
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+        return products
+
+    def _first(self, node: dict, keys: tuple):
+        for key in keys:
+            if node.get(key) not in (None, ""):
+                return node[key]
+        return None
+
+    def _offer_value(self, product: dict, keys: tuple):
+        """
+        Looks for a key on the product, then on its first offer.
+        """
+        if (value := self._first(product, keys)) is not None:
+            return value
+        offers = product.get("offers")
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        if isinstance(offers, dict):
+            return self._first(offers, keys)
+        return None
+
+    def _get_title(self, product: dict) -> str:
+        return normalize_title(str(self._first(product, self.TITLE_KEYS)))
+
+    def _get_price(self, product: dict) -> int:
+        price = self._offer_value(product, self.PRICE_KEYS)
+        if isinstance(price, dict):
+            price = self._first(price, ("value", "amount", "current"))
+        if isinstance(price, str):
+            return self.to_price(price)
+        return Price.from_number(price).major
+
+    def _get_stock(self, product: dict) -> bool:
+        stock = self._offer_value(product, self.STOCK_KEYS)
+        if stock is None:
+            # Listings without availability are assumed in stock
+            return True
+        if isinstance(stock, str):
+            stock = stock.lower().rsplit("/", 1)[-1]
+            return not any(marker in stock for marker in self.OUT_OF_STOCK)
+        return bool(stock)
+
+    def _get_link(self, product: dict) -> str:
+        link = str(self._offer_value(product, self.LINK_KEYS) or "")
+        if link and "://" not in link:
+            link = self.base_url + link
+        return link
 
 
 class Parsers:
@@ -200,4 +409,8 @@ class Parsers:
     Lookup table for ScrapeManager to build scrapes
     """
 
-    lookup = {"standard": StandardParser, "selenium": SeleniumParser}
+    lookup = {
+        "standard": StandardParser,
+        "selenium": SeleniumParser,
+        "json": JsonParser,
+    }
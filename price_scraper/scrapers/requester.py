@@ -1,21 +1,87 @@
 from abc import abstractmethod
 import logging
 import time
+from urllib.parse import urlsplit
 
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.firefox.options import Options
 
 from price_scraper import config
+from price_scraper.deadline import Deadline
 from price_scraper.notifications.notifier import Notifier
+from price_scraper.scrapers.identity import Identity, IdentityPool
 
 logger = logging.getLogger(__name__)
 logging.getLogger("selenium").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
+class Page:
+    """
+    Raw response handed from a Requester to a Parser. Content is kept as
+    the undecoded body bytes where possible so parsers can decode it
+    themselves with the declared encoding.
+
+    Attributes:
+    url = requested url
+    content = body as bytes (or str for requesters that only have text)
+    encoding = charset declared by the server, None to let the parser sniff
+    status = HTTP status code, None if unknown
+    headers = response headers
+    wire_bytes = bytes received over the network before decompression
+    identity = Identity the request was made with, None without a pool
+    elapsed = seconds the request took
+    """
+
+    def __init__(
+        self,
+        url: str,
+        content: bytes | str,
+        encoding: str | None = None,
+        status: int | None = None,
+        headers: dict | None = None,
+        wire_bytes: int = 0,
+        identity: Identity | None = None,
+        elapsed: float = 0.0
+    ):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.status = status
+        self.headers = headers or {}
+        self.wire_bytes = wire_bytes
+        self.identity = identity
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"Page(url={self.url!r}, status={self.status!r}, "
+                f"encoding={self.encoding!r}, size={len(self.content)!r})")
+
+    @property
+    def text(self) -> str:
+        """
+        Returns the content decoded to a string.
+        """
+        if isinstance(self.content, str):
+            return self.content
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def declared_charset(content_type: str) -> str | None:
+    """
+    Returns the charset parameter of a Content-Type header, if any.
+    """
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset":
+            return value.strip("\"' ") or None
+    return None
+
+
 class Requester:
     """
     Responsible for requesting a website and returning raw html string.
@@ -23,16 +89,24 @@ class Requester:
     Attributes:
     notifier = instance of Notifier for discord messaging
     discord = Enable discord notifications. Not fully implimented.
+    identity_pool = IdentityPool to pick proxies/header profiles from,
+    None to always request directly with the given headers
+    resource = worker pool the requester's pages are scraped in, see
+    config.POOL_SIZES
     """
 
+    resource = "http"
+
     def __init__(
         self,
         notifier: Notifier,
-        discord: bool = True
+        discord: bool = True,
+        identity_pool: IdentityPool | None = None
     ):
 
         self.notifier = notifier
         self.discord = discord
+        self.identity_pool = identity_pool
 
     def __repr__(self):
         return (
@@ -48,26 +122,69 @@ class Requester:
     ) -> str:
         pass
 
+    def get_page(
+            self,
+            name,
+            url: str,
+            headers=config.HEADERS,
+            exclude: Identity | None = None,
+            deadline: Deadline | None = None
+    ) -> Page:
+        """
+        Returns the response as a Page. Wraps get_html() by default,
+        requesters that can return raw bytes override this. exclude is an
+        identity to avoid, for requesters that use the identity pool.
+        deadline caps how long the request may take.
+        """
+        return Page(url, self.get_html(name=name, url=url, headers=headers))
+
+    def acquire_identity(self, exclude: Identity | None = None):
+        """
+        Returns an Identity from the pool, or None without a pool.
+        """
+        if self.identity_pool is None:
+            return None
+        return self.identity_pool.acquire(exclude=exclude)
+
+    def report_identity(self,
+                        identity: Identity | None,
+                        ok: bool,
+                        latency: float | None = None):
+        """
+        Feeds a request outcome back to the pool.
+        """
+        if self.identity_pool is not None and identity is not None:
+            self.identity_pool.report(identity, ok, latency)
+
 
 class StandardRequester(Requester):
     """
-    Responsible for requesting a website and returning raw html string.
-    Uses requests library.
+    Responsible for requesting a website and returning raw html.
+    Uses requests library. Advertises every compression the installed
+    urllib3 can decode: gzip and deflate, br with brotli installed and zstd
+    with compression.zstd (Python 3.14+) or backports.zstd. Returns the
+    body as bytes with the declared charset, leaving decoding to the
+    parser.
 
     Attributes:
     notifier = instance of Notifier for discord messaging
     discord = Enable discord notifications. Not fully implimented.
+    identity_pool = IdentityPool to pick proxies/header profiles from
+    stats = dict of name: requests, wire_bytes and decoded_bytes totals
     """
 
     def __init__(
         self,
         notifier: Notifier,
-        discord: bool = True
+        discord: bool = True,
+        identity_pool: IdentityPool | None = None
     ):
         super().__init__(
             notifier,
-            discord
+            discord,
+            identity_pool
             )
+        self.stats = {}
 
     def __repr__(self):
         return (super().__repr__())
@@ -78,34 +195,125 @@ class StandardRequester(Requester):
         url: str,
         headers=config.HEADERS
     ) -> str:
+        return self.get_page(name=name, url=url, headers=headers).text
 
+    def get_page(
+        self,
+        name,
+        url: str,
+        headers=config.HEADERS,
+        exclude: Identity | None = None,
+        deadline: Deadline | None = None
+    ) -> Page:
+        """
+        Requests the url and returns the raw body as a Page. With an
+        identity pool the request goes out through a pooled identity's warm
+        session, proxy and header profile. exclude avoids an identity that
+        just failed. The connect and read timeouts are REQUEST_TIMEOUT,
+        capped to what is left of the deadline, and a body still arriving
+        when the deadline passes is dropped for an empty Page.
+        """
+        deadline = deadline or Deadline()
+        if deadline.expired():
+            return Page(url, b"")
+        identity = self.acquire_identity(exclude)
+        if identity is not None:
+            session = identity.session
+            headers = {**headers, **identity.headers}
+        else:
+            session = requests
+
+        start = time.monotonic()
+        response = None
         try:
-            page = requests.get(url, headers)
-            return page.text
+            response = session.get(
+                url,
+                headers={"Accept-Encoding": ACCEPT_ENCODING, **headers},
+                stream=True,
+                timeout=deadline.limit(config.REQUEST_TIMEOUT)
+                )
+            # The timeout only bounds each socket read, so a slow body is
+            # read one socket read at a time and given up on once the
+            # deadline passes
+            if hasattr(response.raw, "read1"):
+                reads = iter(lambda: response.raw.read1(
+                    64 * 1024, decode_content=True), b"")
+            else:  # urllib3 1.x, reads fill whole chunks
+                reads = response.iter_content(chunk_size=8 * 1024)
+            chunks = []
+            for chunk in reads:
+                if deadline.expired():
+                    logger.warning("[%s] out of time reading %s", name, url,
+                                   extra={"target": name, "stage": "fetch"})
+                    return Page(url, b"", identity=identity,
+                                elapsed=time.monotonic() - start)
+                chunks.append(chunk)
+            content = b"".join(chunks)
+            # Bytes pulled off the socket, before decompression
+            wire_bytes = response.raw.tell() or len(content)
 
         except Exception:
             logger.exception(f"[{name}] problem requesting URL {url}")
-            raise Exception
+            # An empty page with no status is classified as an error
+            return Page(url, b"", identity=identity,
+                        elapsed=time.monotonic() - start)
+        finally:
+            # A fully read body has already gone back to the pool, an
+            # abandoned one would otherwise hold its connection
+            if response is not None:
+                response.close()
+
+        stats = self.stats.setdefault(
+            name, {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0}
+            )
+        stats["requests"] += 1
+        stats["wire_bytes"] += wire_bytes
+        stats["decoded_bytes"] += len(content)
+        logger.debug(
+            "[%s] %d bytes over the wire, %d bytes decoded (%s)",
+            name, wire_bytes, len(content),
+            response.headers.get("Content-Encoding", "identity"),
+            extra={"target": name, "stage": "fetch"}
+            )
+
+        return Page(
+            url=url,
+            content=content,
+            encoding=declared_charset(
+                response.headers.get("Content-Type", "")),
+            status=response.status_code,
+            headers=dict(response.headers),
+            wire_bytes=wire_bytes,
+            identity=identity,
+            elapsed=time.monotonic() - start
+            )
 
 
 class SeleniumRequester(Requester):
     """
     Responsible for requesting a website and returning raw html string.
-    Uses selenium.
+    Uses selenium. With an identity pool, Firefox is started with the
+    identity's proxy and user agent. Pages are scraped in the browser pool
+    since each one runs its own Firefox.
 
     Attributes:
     notifier = instance of Notifier for discord messaging
     discord = Enable discord notifications. Not fully implimented.
+    identity_pool = IdentityPool to pick proxies/header profiles from
     """
 
+    resource = "browser"
+
     def __init__(
         self,
         notifier: Notifier,
-        discord: bool = True
+        discord: bool = True,
+        identity_pool: IdentityPool | None = None
     ):
         super().__init__(
             notifier,
-            discord)
+            discord,
+            identity_pool)
 
     def __repr__(self):
         return (
@@ -119,26 +327,70 @@ class SeleniumRequester(Requester):
         url: str,
         headers=config.HEADERS
     ) -> str:
+        return self.get_page(name=name, url=url, headers=headers).text
 
+    def get_page(
+        self,
+        name,
+        url: str,
+        headers=config.HEADERS,
+        exclude: Identity | None = None,
+        deadline: Deadline | None = None
+    ) -> Page:
         """
-        Uses selenium to open a firefox browser
+        Uses selenium to open a firefox browser. Page loads time out with
+        the deadline and the dwell is cut short by it.
         """
-
+        deadline = deadline or Deadline()
+        if deadline.expired():
+            return Page(url, "")
+        identity = self.acquire_identity(exclude)
+        start = time.monotonic()
+        html = self._render(name, url, identity, deadline)
+        elapsed = time.monotonic() - start
+        return Page(url, html, identity=identity, elapsed=elapsed)
+
+    def _browser_options(self, identity: Identity | None) -> Options:
         # Logging options so selenium doesnt flood the log...
         options = Options()
         options.log.level = "fatal"  # type: ignore
-        driver = webdriver.Firefox(options=options)
+
+        if identity is not None:
+            if user_agent := identity.headers.get("User-Agent"):
+                options.set_preference(
+                    "general.useragent.override", user_agent
+                    )
+            if identity.proxy:
+                proxy = urlsplit(identity.proxy)
+                options.set_preference("network.proxy.type", 1)
+                for scheme in ("http", "ssl"):
+                    options.set_preference(
+                        f"network.proxy.{scheme}", proxy.hostname
+                        )
+                    options.set_preference(
+                        f"network.proxy.{scheme}_port", proxy.port or 80
+                        )
+        return options
+
+    def _render(self,
+                name,
+                url: str,
+                identity: Identity | None,
+                deadline: Deadline) -> str:
+        driver = webdriver.Firefox(options=self._browser_options(identity))
 
         # Try to get the html...
         try:
-            # Open the page
+            # Open the page, giving up when the deadline passes
+            page_load = deadline.limit(config.SELENIUM_PAGE_LOAD_TIMEOUT)
+            driver.set_page_load_timeout(max(page_load, 1))
             driver.get(url)
 
             # Scroll down the page
             driver.find_element(By.TAG_NAME, 'body').send_keys(Keys.END)
 
-            # Wait while stuff loads
-            time.sleep(config.SELENIUM_DWELL_TIME)
+            # Wait while stuff loads, no longer than the deadline allows
+            deadline.sleep(config.SELENIUM_DWELL_TIME)
 
             # Save the html
             html = driver.page_source
@@ -155,8 +407,43 @@ class SeleniumRequester(Requester):
             driver.quit()
 
 
+class JsonRequester(StandardRequester):
+    """
+    Plain HTTP requester for sites whose product data is embedded as JSON
+    or served from an API endpoint. Same as StandardRequester but also
+    accepts JSON responses, so no browser is needed.
+
+    Attributes:
+    notifier = instance of Notifier for discord messaging
+    discord = Enable discord notifications. Not fully implimented.
+    identity_pool = IdentityPool to pick proxies/header profiles from
+    stats = dict of name: requests, wire_bytes and decoded_bytes totals
+    """
+
+    def __repr__(self):
+        return (super().__repr__())
+
+    def get_page(
+        self,
+        name,
+        url: str,
+        headers=config.HEADERS,
+        exclude: Identity | None = None,
+        deadline: Deadline | None = None
+    ) -> Page:
+        headers = {
+            "Accept": "application/json,text/html;q=0.9,*/*;q=0.8",
+            **headers
+            }
+        return super().get_page(
+            name=name, url=url, headers=headers, exclude=exclude,
+            deadline=deadline
+            )
+
+
 class Requesters:
     lookup = {
         "standard": StandardRequester,
-        "selenium": SeleniumRequester
+        "selenium": SeleniumRequester,
+        "json": JsonRequester
     }
@@ -1,11 +1,15 @@
 import datetime as dt
-from time import sleep
+from time import monotonic
 import logging
 from random import randint
 
+from price_scraper import config
+from price_scraper.deadline import Deadline
 from price_scraper.notifications.alerter import Alerter
 from price_scraper.data.datamanager import DataManager
 from price_scraper.notifications.notifier import Notifier
+from price_scraper.scrapers.detect import (BLOCKED, ERROR, OK,
+                                           PageClassifier)
 from price_scraper.scrapers.parser import Parser
 from price_scraper.scrapers.requester import Requester
 from price_scraper.data.item import Item
@@ -28,8 +32,15 @@ class Scrape:
     max_retry_time = Maximum time between retries in seconds
     max_tries = Maximum time the requester will try to grab the html
     discord_log = Flag for discord log notifications
+    classifier = PageClassifier run before parsing, None to always parse
     items = List of Item objects that have been parsed from the html
-    html = html in string format
+    targets = ids of the targets this scrape's items belong to, the
+              scrape's name when it runs on its own
+    save_csv = append successful scrapes to data.csv, off on distributed
+               workers where the coordinator writes it
+    page = Page returned by the requester on the last attempt
+    html = raw html of the last attempt, bytes or string
+    stale = True when the last scrape_items() ran out of its time budget
     """
 
     def __init__(
@@ -45,6 +56,7 @@ class Scrape:
         max_retry_time: int,
         max_tries: int,
         discord_log: bool,
+        classifier: PageClassifier | None = None,
     ):
 
         self.name = name
@@ -58,11 +70,16 @@ class Scrape:
         self.max_retry_time = max_retry_time
         self.max_tries = max_tries
         self.discord_log = discord_log
+        self.classifier = classifier
 
+        self.targets = [name]
+        self.save_csv = True
         self.running = False
         self.soup = None
         self.items = []
+        self.page = None
         self.html = ""
+        self.stale = False
 
     def __repr__(self):
         return (
@@ -83,54 +100,122 @@ class Scrape:
     def __str__(self):
         return f"[{self.name}] scrape"
 
-    def scrape_items(self):
+    def scrape_items(self, deadline: Deadline | None = None):
         """
         Orchestrates Requester getting html, Parser parsing html.
         Checks if Parser returns any items and repeats the request/parse
         if needed.
 
-        Returns list of Item objects.
+        deadline bounds the requests and retries. When it would pass
+        before the next try, the scrape gives up and sets stale.
+
+        Returns list of Item objects, None if the scrape failed.
         """
         # Start logging and timing
-        logger.info(f"[{self.name}] scrape started...")
+        logger.info("[%s] scrape started...", self.name,
+                    extra={"target": self.name, "stage": "start"})
         self.running = True
+        self.stale = False
         self.start_time = dt.datetime.now()
+        deadline = deadline or Deadline()
 
-        # Request page with retries
+        # Request page with retries, moving off identities that fail
+        exclude = None
         for tries in range(self.max_tries):
-            self.html = self.requester.get_html(name=self.name, url=self.url)
+            fields = {"target": self.name, "attempt": tries + 1}
+            self.page = self.requester.get_page(
+                name=self.name, url=self.url, exclude=exclude,
+                deadline=deadline
+                )
+            logger.debug("[%s] fetched %s in %.3f seconds", self.name,
+                         self.url, self.page.elapsed,
+                         extra=dict(fields, stage="fetch",
+                                    duration=self.page.elapsed))
+            self.html = self.page.content
+            self.data_manager.archive_page(
+                self.name, type(self.parser).__name__, self.page, self.targets
+                )
+
+            # Check the page is worth parsing before parsing it
+            label = self.classify(self.page)
 
             # Try to parse html into items
-            self.items = self.parser.get_items(name=self.name, html=self.html)
+            self.items = []
+            if label == OK:
+                parse_start = monotonic()
+                self.items = self.parser.get_items(
+                    name=self.name, html=self.html, encoding=self.page.encoding
+                    )
+                parse_time = monotonic() - parse_start
+                logger.debug("[%s] parsed %d items in %.3f seconds",
+                             self.name, len(self.items), parse_time,
+                             extra=dict(fields, stage="parse",
+                                        duration=parse_time))
+
+            self.requester.report_identity(
+                self.page.identity, ok=bool(self.items),
+                latency=self.page.elapsed
+                )
+            exclude = None if self.items else self.page.identity
 
             # If items were returned, scrape was successfull
             if self.items:
                 logger.info(
-                    f"[{self.name}] Scrape attempt: "
-                    f"{tries + 1}/{self.max_tries} successful!"
+                    "[%s] Scrape attempt: %d/%d successful!",
+                    self.name, tries + 1, self.max_tries,
+                    extra=dict(fields, stage="success")
                 )
                 # Parse items to dict for pandas to save
-                dict_list = self.items_to_dict(self.name, self.items)
+                if self.save_csv:
+                    dict_list = self.items_to_dict(self.name, self.items)
 
-                # Save data to csv
-                self.data_manager.save_to_csv(self.name, dict_list)
+                    # Save data to csv
+                    self.data_manager.save_to_csv(self.name, dict_list)
 
                 # Return the item list!
                 return self.items
 
-            # If list is empy, wait and retry
-            elif not self.items:
-                wait_time = randint(self.min_retry_time, self.max_retry_time)
-                logger.info(
-                    f"[{self.name}] Scrape attempt: "
-                    f"{tries + 1}/{self.max_tries}, no items scraped, "
-                    f"retry in {wait_time} seconds..."
+            # Retrying won't bring a missing page back
+            if label == ERROR and self.page.status in (404, 410):
+                logger.warning(
+                    "[%s] %s returned %s, giving up",
+                    self.name, self.url, self.page.status,
+                    extra=dict(fields, stage="give_up")
+                )
+                break
+
+            # No tries left, don't wait for one
+            if tries + 1 >= self.max_tries:
+                break
+
+            # If list is empy, wait and retry. Back off longer when blocked
+            wait_time = randint(self.min_retry_time, self.max_retry_time)
+            if label == BLOCKED:
+                wait_time *= config.BLOCKED_BACKOFF_FACTOR
+
+            # No point waiting for a try the budget leaves no time for
+            if wait_time >= deadline.remaining():
+                self.stale = True
+                logger.warning(
+                    "[%s] Time budget runs out before attempt %d, giving "
+                    "up with %.0f seconds left", self.name, tries + 2,
+                    deadline.remaining(),
+                    extra=dict(fields, stage="budget")
                 )
-                sleep(wait_time)
+                break
+            logger.info(
+                "[%s] Scrape attempt: %d/%d, no items scraped (%s), "
+                "retry in %d seconds...",
+                self.name, tries + 1, self.max_tries, label, wait_time,
+                extra=dict(fields, stage="retry")
+            )
+            deadline.sleep(wait_time)
 
         # Loop exits if scrape failed from max attemps
         logger.warning(
-            f"[{self.name}] Scrape Failed, {self.max_tries} " f"attemps reached..."
+            "[%s] Scrape Failed after %d attempt(s)...", self.name, tries + 1,
+            extra={"target": self.name, "attempt": tries + 1,
+                   "stage": "failed"}
         )
 
         # Stop logging and timing
@@ -138,9 +223,27 @@ class Scrape:
         self.end_time = dt.datetime.now()
         self.time_delta = self.end_time - self.start_time
         logger.info(
-            f"[{self.name}] scrape finished in " f"{self.time_delta.seconds} seconds"
+            "[%s] scrape finished in %d seconds",
+            self.name, self.time_delta.seconds,
+            extra={"target": self.name, "stage": "finish",
+                   "duration": self.time_delta.total_seconds()}
         )
 
+    def classify(self, page) -> str:
+        """
+        Labels the page ok/blocked/empty/error with the classifier. Without
+        a classifier every page is parsed.
+        """
+        if self.classifier is None:
+            return OK
+        label = self.classifier.classify(page)
+        if label != OK:
+            logger.info("[%s] %s looks %s (status %s, %d bytes)",
+                        self.name, page.url, label, page.status,
+                        len(page.content),
+                        extra={"target": self.name, "stage": "classify"})
+        return label
+
     def items_to_dict(self, name, items: list[Item]) -> list[dict]:
         """
         Helper function to return a list of dicts.
@@ -171,6 +274,7 @@ class StandardScrape(Scrape):
         max_retry_time: int,
         max_tries: int,
         discord_log: bool,
+        classifier: PageClassifier | None = None,
     ):
         super().__init__(
             name,
@@ -184,6 +288,7 @@ class StandardScrape(Scrape):
             max_retry_time,
             max_tries,
             discord_log,
+            classifier,
         )
 
     def __repr__(self):
@@ -222,6 +327,7 @@ class SeleniumScrape(Scrape):
         max_retry_time: int,
         max_tries: int,
         discord_log: bool,
+        classifier: PageClassifier | None = None,
     ):
         super().__init__(
             name,
@@ -235,6 +341,7 @@ class SeleniumScrape(Scrape):
             max_retry_time,
             max_tries,
             discord_log,
+            classifier,
         )
 
     def __repr__(self):
@@ -259,4 +366,8 @@ class Scrapers:
     Scraper lookup table
     """
 
-    lookup = {"standard": StandardScrape, "selenium": SeleniumScrape}
+    lookup = {
+        "standard": StandardScrape,
+        "selenium": SeleniumScrape,
+        "json": StandardScrape,  # The standard loop works for JSON pages
+    }
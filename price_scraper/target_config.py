@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+import tomllib
+
+from price_scraper.notifications.rules import Rules
+from price_scraper.scrapers.scrape import Scrapers
+
+try:
+    import yaml
+except ImportError:  # YAML target files are optional
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+# Field: (types, required, default)
+TARGET_SCHEMA = {
+    "id": (str, False, None),
+    "name": (str, True, None),
+    "scrape_type": (str, True, None),
+    "url": (str, True, None),
+    "discord_log": (bool, False, False),
+    "price_threshold": ((int, float), True, None),
+    "in_stock_alert": (bool, False, False),
+    "rules": (list, False, []),
+    "time_budget": ((int, float), False, None),
+}
+
+# Older keys that are accepted and renamed on load
+TARGET_ALIASES = {"price threshold": "price_threshold"}
+
+
+def target_id(target: dict) -> str:
+    """
+    Identity used to tell targets apart when a target file changes.
+    Uses an explicit "id" if the target has one.
+    """
+    return target.get("id") or f"{target['name']}|{target['scrape_type']}"
+
+
+def validate_target(target: dict) -> dict:
+    """
+    Checks a target against TARGET_SCHEMA and returns a normalized copy
+    with aliases renamed and defaults filled in for missing or null
+    optional fields. Raises ValueError.
+    """
+    if not isinstance(target, dict):
+        raise ValueError(f"Target must be a table/mapping, got {target!r}")
+
+    target = {TARGET_ALIASES.get(key, key): value
+              for key, value in target.items()}
+    name = target.get("name", "?")
+
+    unknown = set(target) - set(TARGET_SCHEMA)
+    if unknown:
+        raise ValueError(f"[{name}] unknown target field(s): "
+                         f"{', '.join(sorted(unknown))}")
+
+    for field, (types, required, default) in TARGET_SCHEMA.items():
+        value = target.get(field)
+        if value is None:
+            if required:
+                raise ValueError(f"[{name}] missing target field {field!r}")
+            # Missing and null optional fields both get the default
+            target[field] = (list(default) if isinstance(default, list)
+                             else default)
+            continue
+        if not isinstance(value, types) or (
+                types is not bool and isinstance(value, bool)):
+            raise ValueError(f"[{name}] target field {field!r} has invalid "
+                             f"value {value!r}")
+
+    if target["time_budget"] is not None and target["time_budget"] <= 0:
+        raise ValueError(f"[{name}] time_budget must be above zero, got "
+                         f"{target['time_budget']!r}")
+
+    if target["scrape_type"] not in Scrapers.lookup:
+        raise ValueError(f"[{name}] unknown scrape_type "
+                         f"{target['scrape_type']!r}")
+
+    for rule in target["rules"]:
+        if not isinstance(rule, dict) or rule.get("type") not in Rules.lookup:
+            raise ValueError(f"[{name}] invalid rule {rule!r}")
+        # Catch bad rule parameters on load rather than mid-cycle
+        try:
+            Rules.build([rule])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"[{name}] invalid rule {rule!r}: {e}") from e
+
+    return target
+
+
+def validate_targets(targets: list[dict]) -> list[dict]:
+    """
+    Validates a list of targets and checks target ids are unique.
+    """
+    if not isinstance(targets, list):
+        raise ValueError("Targets must be a list")
+
+    targets = [validate_target(target) for target in targets]
+    ids = [target_id(target) for target in targets]
+    if duplicates := {i for i in ids if ids.count(i) > 1}:
+        raise ValueError(f"Duplicate target id(s): {', '.join(duplicates)}. "
+                         f"Set a unique \"id\" on these targets.")
+    return targets
+
+
+def load_targets(path: str) -> list[dict]:
+    """
+    Loads and validates targets from a JSON, TOML or YAML file.
+    TOML files use an array of tables named "targets":
+        [[targets]]
+        name = "RTX 5080"
+        ...
+    JSON and YAML files may be a list or a mapping with a "targets" list.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".toml":
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+    elif extension == ".json":
+        with open(path, "rb") as file:
+            data = json.load(file)
+    elif extension in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError(f"PyYAML is required to load {path}")
+        with open(path, "rb") as file:
+            data = yaml.safe_load(file)
+    else:
+        raise ValueError(f"Unsupported target file type: {path}")
+
+    if isinstance(data, dict):
+        data = data.get("targets", [])
+
+    return validate_targets(data)
+
+
+class TargetWatcher:
+    """
+    Watches a target file and applies changes to a running ScrapeManager.
+    Polls the file's modification time on a daemon thread. Invalid files
+    are logged and ignored so the running targets are kept.
+
+    Attributes:
+    path = target file path
+    scrape_manager = ScrapeManager to apply changes to
+    poll_interval = seconds between checks
+    """
+
+    def __init__(self, path: str, scrape_manager, poll_interval: float):
+        self.path = path
+        self.scrape_manager = scrape_manager
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mtime = self._mtime()
+
+    def __repr__(self):
+        return (f"TargetWatcher(path={self.path!r}, "
+                f"poll_interval={self.poll_interval!r})")
+
+    def _mtime(self) -> float | None:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self._watch, name="target-watcher", daemon=True
+            )
+        self.thread.start()
+        logger.info(f"Watching {self.path} for target changes")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def check(self):
+        """
+        Reloads the file if it changed since the last check.
+        """
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return
+        self.mtime = mtime
+
+        try:
+            targets = load_targets(self.path)
+        except Exception as e:
+            logger.error(f"Not reloading {self.path}: {e}")
+            return
+
+        self.scrape_manager.apply_targets(targets)
+
+    def _watch(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.check()
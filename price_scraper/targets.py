@@ -1,18 +1,23 @@
 targets = [
     {
         "name": "RTX 5080",  # Name to tag this search
-        "scrape_type": "standard",        # Scraper class to use. Reference Scrapers/Requesters/Parsers classes for lookup tables.
+        "scrape_type": "standard",        # Scraper class to use: "standard", "selenium" or "json". Reference Scrapers/Requesters/Parsers classes for lookup tables.
         "url": "https://www.example.com/products.html",  # Example html
         "discord_log": True,        # Send log type messages to discord. Not implimented.
-        "price threshold": 1500,    # Price threshold for alerter
-        "in_stock_alert": False     # True = Alert only to in stock items
+        "price_threshold": 1500,    # Price threshold for alerter
+        "in_stock_alert": False,    # True = Alert only to in stock items
+        "rules": [                  # Optional history based alerts. Reference Rules class for lookup table.
+            {"type": "all_time_low"},
+            {"type": "below_median", "percent": 10, "days": 30},
+            {"type": "back_in_stock", "days": 7},
+        ],
     },
     {
         "name": "RTX 5080",
         "scrape_type": "selenium",
         "url": "https://www.example.com/products.html",  # Example html
         "discord_log": True,
-        "price threshold": 1500,
+        "price_threshold": 1500,
         "in_stock_alert": False
     },
 ]
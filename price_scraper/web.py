@@ -0,0 +1,319 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from price_scraper.target_config import target_id
+
+logger = logging.getLogger(__name__)
+
+CHART_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Price Scraper</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+svg { border: 1px solid #ccc; }
+</style>
+</head>
+<body>
+<h1>Price Scraper</h1>
+<select id="items"></select>
+<p id="summary"></p>
+<svg id="chart" width="800" height="300"></svg>
+<script>
+const select = document.getElementById("items");
+const chart = document.getElementById("chart");
+
+async function getJson(url) {
+    return (await fetch(url)).json();
+}
+
+async function loadItems() {
+    const data = await getJson("/api/items?per_page=1000");
+    for (const row of data.items) {
+        const option = document.createElement("option");
+        option.value = JSON.stringify([row.search, row.item]);
+        option.text = `[${row.search}] ${row.item}`;
+        select.appendChild(option);
+    }
+    if (data.items.length) { loadChart(); }
+}
+
+async function loadChart() {
+    const [search, item] = JSON.parse(select.value);
+    const query = new URLSearchParams(
+        {search: search, item: item, resolution: "daily", per_page: 1000});
+    const data = await getJson("/api/history?" + query);
+    const points = data.items;
+    const prices = points.map(p => p.close);
+    const low = Math.min(...prices), high = Math.max(...prices);
+    const x = i => 20 + i * 760 / Math.max(points.length - 1, 1);
+    const y = p => 280 - (p - low) * 260 / Math.max(high - low, 1);
+    chart.innerHTML = `<polyline fill="none" stroke="steelblue"
+        stroke-width="2" points="${
+        points.map((p, i) => `${x(i)},${y(p.close)}`).join(" ")}"/>`;
+    document.getElementById("summary").textContent = points.length
+        ? `${points[0].day} to ${points[points.length - 1].day}, ` +
+          `low $${low}, high $${high}`
+        : "No history";
+}
+
+select.addEventListener("change", loadChart);
+loadItems();
+</script>
+</body>
+</html>
+"""
+
+
+class BadRequest(ValueError):
+    """
+    Raised by a route for invalid query parameters, answered with 400.
+    """
+
+
+def int_param(params: dict, key: str, default: int,
+              minimum: int | None = None) -> int:
+    """
+    Reads an integer query parameter. Raises BadRequest if it isn't an
+    integer or is below minimum.
+    """
+    try:
+        value = int(params.get(key, default))
+    except ValueError:
+        raise BadRequest(f"{key} must be an integer") from None
+    if minimum is not None and value < minimum:
+        raise BadRequest(f"{key} must be {minimum} or more")
+    return value
+
+
+class WebServer:
+    """
+    Small async HTTP server run on a background thread inside the scraper
+    process. Serves JSON from the ScrapeManager's in-memory state and the
+    indexed PriceHistory, and a simple chart page.
+
+    Responses are cached per URL and tagged with an ETag derived from the
+    manager's data version, so repeat requests are answered from memory
+    (or with 304 Not Modified) until the next write.
+
+    Routes:
+    /                   chart page
+    /api/snapshot       latest scraped items, ?target= (a target id) to
+                        filter, with ?back=n for the target's scrape n
+                        cycles ago
+    /api/items          per-item rollups from the history, ?search= (a
+                        target id)
+    /api/history        price series, ?search=&item=&resolution=&start=&end=
+    /api/changes        newest listing/price/stock changes, ?search=
+    /api/targets        configured targets with their id and last run
+                        status
+    /api/metrics        run metrics
+    List responses are paged with ?page= and ?per_page=.
+
+    Attributes:
+    scrape_manager = ScrapeManager instance to read from
+    host, port = address to listen on
+    page_size = default number of rows per page
+    """
+
+    def __init__(self, scrape_manager, host: str, port: int, page_size: int):
+        self.scrape_manager = scrape_manager
+        self.host = host
+        self.port = port
+        self.page_size = page_size
+        self.cache = {}
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+        self.routes = {
+            "/": self._chart_page,
+            "/api/snapshot": self._snapshot,
+            "/api/items": self._items,
+            "/api/history": self._history,
+            "/api/changes": self._changes,
+            "/api/targets": self._targets,
+            "/api/metrics": self._metrics,
+        }
+
+    def __repr__(self):
+        return f"WebServer(host={self.host!r}, port={self.port!r})"
+
+    def start(self):
+        """
+        Starts the server on a daemon thread.
+        """
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(ready,), name="web-server", daemon=True
+            )
+        self.thread.start()
+        ready.wait()
+        logger.info("Web server listening on http://%s:%s", self.host,
+                    self.port)
+
+    def stop(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+            self.thread.join(timeout=5)
+
+    def _run(self, ready: threading.Event):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+            )
+        ready.set()
+        try:
+            self.loop.run_until_complete(self.server.serve_forever())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    async def _handle(self, reader, writer):
+        method = None
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                # Connection closed before sending a request
+                writer.close()
+                return
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n",
+                                                            b""):
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) == 3:
+                method, target, _ = parts
+                status, content_type, body, etag = await self._respond(
+                    method, target, headers.get("if-none-match")
+                    )
+            else:
+                status, content_type, body, etag = (
+                    "400 Bad Request", "text/plain", b"Bad request", None
+                    )
+        except Exception as e:
+            logger.exception("Web server error: %s", e)
+            status, content_type, body, etag = (
+                "500 Internal Server Error", "text/plain", b"Error", None
+                )
+
+        head = [f"HTTP/1.1 {status}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}",
+                "Cache-Control: no-cache",
+                "Connection: close"]
+        if etag:
+            head.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD" and not status.startswith("304"):
+            writer.write(body)
+        await writer.drain()
+        writer.close()
+
+    async def _respond(self, method, target, if_none_match):
+        if method not in ("GET", "HEAD"):
+            return "405 Method Not Allowed", "text/plain", b"", None
+
+        url = urlsplit(target)
+        if (route := self.routes.get(url.path)) is None:
+            return "404 Not Found", "text/plain", b"Not found", None
+
+        version = self.scrape_manager.version
+        cached = self.cache.get(target)
+        if cached is None or cached[0] != version:
+            params = {key: values[-1] for key, values
+                      in parse_qs(url.query).items()}
+            try:
+                content_type, body = await self.loop.run_in_executor(
+                    None, route, params
+                    )
+            except BadRequest as e:
+                return "400 Bad Request", "text/plain", str(e).encode(), None
+            etag = ('"' + hashlib.sha1(body).hexdigest()[:16] + '"')
+            cached = (version, content_type, body, etag)
+            if len(self.cache) > 1000:
+                self.cache.clear()
+            self.cache[target] = cached
+
+        _, content_type, body, etag = cached
+        if if_none_match == etag:
+            return "304 Not Modified", content_type, b"", etag
+        return "200 OK", content_type, body, etag
+
+    def _page(self, rows: list, params: dict) -> tuple[str, bytes]:
+        """
+        Slices rows into the requested page and encodes as JSON.
+        """
+        page = max(int_param(params, "page", 1), 1)
+        per_page = max(int_param(params, "per_page", self.page_size), 1)
+        start = (page - 1) * per_page
+        return self._json({
+            "page": page,
+            "per_page": per_page,
+            "total": len(rows),
+            "items": rows[start:start + per_page],
+        })
+
+    def _json(self, data) -> tuple[str, bytes]:
+        return "application/json", json.dumps(data).encode()
+
+    def _chart_page(self, params):
+        return "text/html; charset=utf-8", CHART_PAGE.encode()
+
+    def _snapshot(self, params):
+        snapshot = self.scrape_manager.snapshot
+        if target := params.get("target"):
+            back = int_param(params, "back", 0, minimum=0)
+            if back:
+                snapshot = {target: self.scrape_manager.data_manager
+                            .snapshot_items(target, back)}
+            else:
+                snapshot = {target: snapshot.get(target) or []}
+        rows = [dict(item.as_dict(), search=name)
+                for name, items in snapshot.items() for item in items or []]
+        return self._page(rows, params)
+
+    def _items(self, params):
+        history = self.scrape_manager.data_manager.history
+        rows = history.latest(params.get("search")) if history else []
+        return self._page(rows, params)
+
+    def _history(self, params):
+        history = self.scrape_manager.data_manager.history
+        if not history or "search" not in params or "item" not in params:
+            return self._page([], params)
+        rows = history.price_series(
+            params["search"],
+            params["item"],
+            start=params.get("start"),
+            end=params.get("end"),
+            resolution=params.get("resolution", "raw"),
+            )
+        return self._page(rows, params)
+
+    def _changes(self, params):
+        history = self.scrape_manager.data_manager.history
+        rows = history.recent_changes(
+            limit=int_param(params, "limit", 1000, minimum=0),
+            search=params.get("search")
+            ) if history else []
+        return self._page(rows, params)
+
+    def _targets(self, params):
+        status = self.scrape_manager.metrics["targets"]
+        rows = [dict(target, id=target_id(target),
+                     status=status.get(target_id(target)))
+                for target in self.scrape_manager.targets]
+        return self._page(rows, params)
+
+    def _metrics(self, params):
+        return self._json(self.scrape_manager.metrics)
@@ -0,0 +1,36 @@
+from price_scraper.data.archive import PageArchive
+from price_scraper.scrapers.requester import Page
+
+PAGE = (b'<html><script type="application/ld+json">'
+        b'{"name": "RTX 5080", "offers": {"price": "1499.99", '
+        b'"availability": "https://schema.org/InStock", '
+        b'"url": "https://shop.example/rtx-5080"}}'
+        b'</script></html>')
+
+
+def test_same_page_is_stored_once(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.start_run("run1")
+    page = Page("https://shop.example/gpus", PAGE, encoding="utf-8",
+                status=200)
+    first = archive.store("GPUs", "JsonParser", page, ["GPUs|json"])
+    second = archive.store("GPUs", "JsonParser", page, ["GPUs|json"])
+
+    assert first == second
+    assert archive.load(first) == PAGE
+    assert len(list((tmp_path / "objects").rglob(f"{first}.*"))) == 1
+    assert len(archive.entries("run1")) == 2
+
+
+def test_replay_parses_archived_pages(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    archive.start_run("run1")
+    archive.store("GPUs", "JsonParser",
+                  Page("https://shop.example/gpus", PAGE, encoding="utf-8",
+                       status=200),
+                  ["GPUs|json"])
+
+    [(entry, items)] = PageArchive(str(tmp_path)).replay(workers=1)
+    assert entry["targets"] == ["GPUs|json"]
+    assert [(item.item, item.price, item.stock, item.time)
+            for item in items] == [("RTX 5080", 1500, True, entry["time"])]
@@ -0,0 +1,52 @@
+from price_scraper.data.item import Item
+from price_scraper.notifications.changes import (ChangeFeed, ListingChange,
+                                                 PriceChange, StockChange,
+                                                 diff)
+
+
+def item(title: str, price: int, stock: bool = True) -> Item:
+    return Item("GPUs", "2024-01-02T00:00:00", title, price, stock,
+                f"https://shop.example/{title}")
+
+
+def test_diff_yields_listing_price_and_stock_changes():
+    last = [item("RTX 5070", 600), item("RTX 5080", 1500),
+            item("RTX 5090", 2200, stock=False)]
+    new = [item("RTX 5080", 1400), item("RTX 5090", 2200),
+           item("RTX 5060", 400)]
+
+    changes = {(type(change), change.item.item): change
+               for change in diff("GPUs|standard", new, last)}
+    assert set(changes) == {
+        (PriceChange, "RTX 5080"),
+        (StockChange, "RTX 5090"),
+        (ListingChange, "RTX 5060"),
+        (ListingChange, "RTX 5070"),
+    }
+    assert changes[(PriceChange, "RTX 5080")].delta == -100
+    assert changes[(StockChange, "RTX 5090")].in_stock
+    assert changes[(ListingChange, "RTX 5060")].added
+    assert not changes[(ListingChange, "RTX 5070")].added
+    assert changes[(PriceChange, "RTX 5080")].as_dict() == {
+        "time": "2024-01-02T00:00:00", "search": "GPUs|standard",
+        "item": "RTX 5080", "kind": "price", "old": 1500, "new": 1400}
+
+
+def test_no_changes_for_identical_scrapes():
+    items = [item("RTX 5080", 1500)]
+    assert list(diff("GPUs|standard", items, items)) == []
+
+
+def test_failing_subscriber_doesnt_stop_the_others():
+    received = []
+
+    def broken(changes):
+        raise RuntimeError("down")
+
+    feed = ChangeFeed()
+    feed.subscribe(broken)
+    feed.subscribe(received.append)
+    changes = list(diff("GPUs|standard", [item("RTX 5080", 1400)],
+                        [item("RTX 5080", 1500)]))
+    feed.publish("GPUs|standard", changes)
+    assert received == [changes]
@@ -0,0 +1,80 @@
+import datetime as dt
+import json
+
+from price_scraper.data.checkpoint import CycleCheckpoint
+from price_scraper.data.item import Item
+from price_scraper.target_config import target_id, validate_targets
+
+
+def test_resume_tells_same_named_targets_apart(tmp_path):
+    targets = validate_targets([
+        {"name": "RTX 5080", "scrape_type": "standard",
+         "url": "https://shop.example/gpus", "price_threshold": 1500},
+        {"name": "RTX 5080", "scrape_type": "selenium",
+         "url": "https://shop.example/gpus", "price_threshold": 1500},
+    ])
+    checkpoint = CycleCheckpoint(str(tmp_path))
+    cycle, done = checkpoint.begin()
+    assert done == {}
+    checkpoint.save(target_id(targets[0]), "RTX 5080", [], {"ok": True})
+
+    # A crashed run resumes with only the finished target done
+    resumed, done = CycleCheckpoint(str(tmp_path)).begin()
+    assert resumed == cycle
+    assert [target for target in targets
+            if target_id(target) not in done] == [targets[1]]
+
+
+def test_old_cycle_starts_over(tmp_path):
+    checkpoint = CycleCheckpoint(str(tmp_path), max_age=3600)
+    cycle, _ = checkpoint.begin()
+    checkpoint.save("a", "A", [], {"ok": True})
+
+    # Backdate the cycle past max_age
+    start = dt.datetime.now() - dt.timedelta(hours=2)
+    with open(checkpoint.cycle_file, "w") as file:
+        json.dump({"cycle": cycle,
+                   "start": start.isoformat(timespec="seconds")}, file)
+
+    resumed, done = CycleCheckpoint(str(tmp_path), max_age=3600).begin()
+    assert resumed != cycle
+    assert done == {}
+
+
+def test_resume_skips_targets_no_longer_configured(tmp_path):
+    checkpoint = CycleCheckpoint(str(tmp_path))
+    checkpoint.begin()
+    checkpoint.save("a", "A", [], {"ok": True})
+    checkpoint.save("b", "B", [], {"ok": True})
+
+    _, done = CycleCheckpoint(str(tmp_path)).begin({"a"})
+    assert list(done) == ["a"]
+
+
+def test_items_survive_a_resume(tmp_path):
+    items = [Item("RTX 5080|standard", "2024-01-01T00:00:00", "RTX 5080",
+                  1500, True, "https://shop.example/rtx-5080")]
+    checkpoint = CycleCheckpoint(str(tmp_path))
+    checkpoint.begin()
+    checkpoint.save("RTX 5080|standard", "RTX 5080", items, {"ok": True})
+    checkpoint.save("RTX 5090|standard", "RTX 5090", None, {"ok": False})
+
+    _, done = CycleCheckpoint(str(tmp_path)).begin()
+    restored = done["RTX 5080|standard"]["items"]
+    assert [item.as_dict() for item in restored] == [items[0].as_dict()]
+    assert restored[0].search == "RTX 5080|standard"
+    assert done["RTX 5090|standard"]["items"] is None
+
+
+def test_tampered_checkpoints_are_skipped(tmp_path):
+    checkpoint = CycleCheckpoint(str(tmp_path))
+    cycle, _ = checkpoint.begin()
+    checkpoint.save("a", "A", [], {"ok": True})
+    (tmp_path / "garbage.json").write_bytes(b"\x80\x04cos\nsystem\n.")
+    (tmp_path / "list.json").write_text("[1, 2, 3]")
+    (tmp_path / "bad_item.json").write_text(json.dumps(
+        {"cycle": cycle, "id": "b", "name": "B", "metrics": {},
+         "items": [{"item": "no price"}]}))
+
+    _, done = CycleCheckpoint(str(tmp_path)).begin()
+    assert list(done) == ["a"]
@@ -0,0 +1,63 @@
+from price_scraper import config
+from price_scraper.scrapers.detect import (BLOCKED, EMPTY, ERROR, OK,
+                                           PageClassifier)
+from price_scraper.scrapers.requester import Page
+
+
+def classifier() -> PageClassifier:
+    return PageClassifier(
+        markers=config.BLOCK_MARKERS,
+        min_size=config.MIN_PAGE_SIZE,
+        window=config.BLOCK_CHECK_WINDOW,
+        max_block_size=config.BLOCK_PAGE_MAX_SIZE
+        )
+
+
+def product_page() -> bytes:
+    cards = "".join(
+        f'<div class="item-cell"><a class="item-title">GPU {n}</a>'
+        f'<li class="price-current">$1,{n:03d}.99</li></div>'
+        for n in range(400)
+        )
+    return (
+        "<html><head><title>Graphics cards</title>"
+        '<script src="https://www.google.com/recaptcha/api.js"></script>'
+        '<script>window.captchaConfig = {"siteKey": "x"};</script>'
+        f"</head><body>{cards}</body></html>"
+        ).encode()
+
+
+def test_product_page_with_captcha_script_is_ok():
+    page = Page("https://shop.example/gpus", product_page(), status=200)
+    assert len(page.content) > config.BLOCK_PAGE_MAX_SIZE
+    assert classifier().classify(page) == OK
+
+
+def test_small_captcha_page_is_blocked():
+    body = ("<html><body><h1>Are you a robot?</h1>"
+            "<div class='g-recaptcha'></div>" + " " * 2000 +
+            "</body></html>").encode()
+    page = Page("https://shop.example/gpus", body, status=200)
+    assert classifier().classify(page) == BLOCKED
+
+
+def test_503_with_markers_is_blocked():
+    page = Page("https://shop.example/gpus", product_page(), status=503)
+    assert classifier().classify(page) == BLOCKED
+
+
+def test_small_json_response_is_ok():
+    body = b'{"name": "GPU", "price": "999.99", "inStock": true}'
+    page = Page("https://shop.example/api/item/1", body, status=200,
+                headers={"content-type": "application/json"})
+    assert classifier().classify(page) == OK
+
+
+def test_small_html_response_is_empty():
+    page = Page("https://shop.example/gpus", b"<html></html>", status=200,
+                headers={"Content-Type": "text/html"})
+    assert classifier().classify(page) == EMPTY
+
+
+def test_failed_request_is_error():
+    assert classifier().classify(Page("https://shop.example", b"")) == ERROR
@@ -0,0 +1,46 @@
+import pytest
+
+from price_scraper.distributed import (MemoryWorkQueue, SQLiteWorkQueue,
+                                       WorkQueues)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteWorkQueue(str(tmp_path / "queue.db"), lease_time=60)
+    return MemoryWorkQueue(lease_time=60)
+
+
+def test_cycle_round_trip_and_clear(queue):
+    queue.put("c1", {"a": {"url": "a"}, "b": {"url": "b"}})
+    task_id, payload = queue.lease("w1")
+    assert payload == {"url": "a"}
+    assert queue.complete(task_id, "w1", {"items": []})
+    task_id, _ = queue.lease("w1")
+    queue.fail(task_id, "w1", "boom")
+    assert queue.pending("c1") == 1
+
+    # Putting the same cycle again (a resumed cycle) keeps its tasks
+    queue.put("c1", {"a": {"url": "a"}, "b": {"url": "b"}})
+    assert queue.results("c1") == {"a": {"items": []}, "b": None}
+
+    queue.clear("c1")
+    assert queue.pending("c1") == 0
+    assert queue.results("c1") == {}
+
+
+def test_new_cycle_drops_an_abandoned_cycle(queue):
+    queue.put("dead", {"a": {"url": "a"}, "b": {"url": "b"}})
+    queue.lease("w1")
+    queue.put("current", {"c": {"url": "c"}})
+
+    assert queue.pending("dead") == 0
+    _, payload = queue.lease("w1")
+    assert payload == {"url": "c"}
+    assert queue.lease("w1") is None
+
+
+def test_only_shared_queues_are_offered_on_the_command_line():
+    shared = [name for name, queue in WorkQueues.lookup.items()
+              if queue.shared]
+    assert shared == ["sqlite"]
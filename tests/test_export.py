@@ -0,0 +1,106 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from price_scraper.data.export import _chart_name, downsample, export, plot
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.item import Item
+
+
+@pytest.fixture
+def history_file(tmp_path) -> str:
+    path = str(tmp_path / "history.db")
+    history = PriceHistory(path)
+    history.record("GPUs|standard", [
+        Item("GPUs|standard", time, title, price, stock,
+             f"https://shop.example/{price}")
+        for time, title, price, stock in (
+            ("2024-01-01T09:00:00", "RTX 5080", 1500, True),
+            ("2024-01-01T21:00:00", "RTX 5080", 1400, False),
+            ("2024-01-02T18:30:00", "RTX 5080", 1450, True),
+            ("2024-01-03T08:00:00", "RTX 5080", 1350, True),
+            ("2024-01-02T10:00:00", "RTX 5090", 2200, False),
+        )
+    ])
+    history.close()
+    return path
+
+
+def test_long_titles_sharing_a_prefix_get_their_own_chart():
+    prefix = "ASUS ROG Strix GeForce RTX 5080 OC Edition 16GB GDDR7 " * 2
+    first = _chart_name("rtx 5080", prefix + "White")
+    second = _chart_name("rtx 5080", prefix + "Black")
+
+    assert first != second
+    assert first.startswith("rtx_5080__ASUS_ROG_Strix")
+    assert _chart_name("rtx 5080", prefix + "White") == first
+
+
+def test_filters_and_date_only_end(history_file, tmp_path):
+    output = str(tmp_path / "out.csv")
+    rows = export(history_file, output, item="RTX 5080", start="2024-01-01",
+                  end="2024-01-02", chunksize=2)
+    frame = pd.read_csv(output)
+    assert rows == 3
+    assert list(frame["price"]) == [1500, 1400, 1450]
+    assert set(frame["item"]) == {"RTX 5080"}
+
+
+def test_downsample_to_daily_bars(history_file, tmp_path):
+    output = str(tmp_path / "out.jsonl")
+    export(history_file, output, search="GPUs|standard", item="RTX 5080",
+           resample="1D", chunksize=2)
+    with open(output, encoding="utf-8") as file:
+        days = [json.loads(line) for line in file]
+    assert [(day["time"][:10], day["open"], day["high"], day["low"],
+             day["close"], day["in_stock"], day["count"]) for day in days] == [
+        ("2024-01-01", 1500, 1500, 1400, 1400, True, 2),
+        ("2024-01-02", 1450, 1450, 1450, 1450, True, 1),
+        ("2024-01-03", 1350, 1350, 1350, 1350, True, 1),
+    ]
+
+
+def test_downsample_keeps_items_apart():
+    frame = pd.DataFrame({
+        "search": ["GPUs"] * 3,
+        "item": ["RTX 5080", "RTX 5080", "RTX 5090"],
+        "time": pd.to_datetime(["2024-01-01T01:00", "2024-01-01T02:00",
+                                "2024-01-01T03:00"]),
+        "price": [1500, 1401, 2200],
+        "stock": [False, False, True],
+    })
+    sampled = downsample(frame, "1D")
+    assert list(sampled["item"]) == ["RTX 5080", "RTX 5090"]
+    assert list(sampled["avg"]) == [1450.5, 2200.0]
+    assert list(sampled["in_stock"]) == [False, True]
+
+
+def test_empty_csv_export(history_file, tmp_path):
+    output = tmp_path / "out.csv"
+    assert export(history_file, str(output), item="Missing") == 0
+    assert output.exists()
+
+
+def test_parquet_export(history_file, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = str(tmp_path / "out.parquet")
+    assert export(history_file, output, chunksize=2) == 5
+    frame = pd.read_parquet(output)
+    assert len(frame) == 5
+    assert frame["stock"].dtype == bool
+
+
+def test_unknown_format_is_rejected(history_file, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export(history_file, str(tmp_path / "out.xlsx"))
+
+
+def test_plot_renders_a_chart_per_item(history_file, tmp_path):
+    pytest.importorskip("matplotlib")
+    paths = plot(history_file, str(tmp_path / "charts"), workers=1)
+    assert [os.path.basename(path) for path in paths] == [
+        _chart_name("GPUs|standard", "RTX 5080"),
+        _chart_name("GPUs|standard", "RTX 5090"),
+    ]
@@ -0,0 +1,27 @@
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.item import Item
+
+
+def item(time: str, price: int) -> Item:
+    return Item("GPUs", time, "RTX 5080", price, True, None)
+
+
+def test_date_only_end_includes_the_whole_day(tmp_path):
+    history = PriceHistory(str(tmp_path / "history.db"))
+    try:
+        history.record("GPUs", [item("2024-01-01T09:00:00", 1500),
+                                item("2024-01-02T18:30:00", 1450),
+                                item("2024-01-03T00:00:00", 1400)])
+
+        raw = history.price_series("GPUs", "RTX 5080", "2024-01-01",
+                                   "2024-01-02")
+        assert [row["price"] for row in raw] == [1500, 1450]
+        daily = history.price_series("GPUs", "RTX 5080", end="2024-01-02",
+                                     resolution="daily")
+        assert [row["day"] for row in daily] == ["2024-01-01", "2024-01-02"]
+        # A full time is still an inclusive bound
+        raw = history.price_series("GPUs", "RTX 5080",
+                                   end="2024-01-02T18:30:00")
+        assert [row["price"] for row in raw] == [1500, 1450]
+    finally:
+        history.close()
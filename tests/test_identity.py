@@ -0,0 +1,127 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+import requests
+
+from price_scraper.scrapers import identity as identity_module
+from price_scraper.scrapers.identity import IdentityPool
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for a forward proxy: answers for any absolute url itself,
+    with a 502 when the server was started as a failing proxy.
+    """
+
+    def do_GET(self):
+        self.send_response(502 if self.server.failing else 200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def start_proxy(failing: bool) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProxyHandler)
+    server.daemon_threads = True
+    server.failing = failing
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="module")
+def proxies():
+    servers = [start_proxy(failing=False), start_proxy(failing=True)]
+    yield [f"http://127.0.0.1:{server.server_address[1]}"
+           for server in servers]
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(identity_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def fetch(pool: IdentityPool, identity) -> bool:
+    try:
+        response = identity.session.get("http://shop.example/gpus",
+                                        headers=identity.headers, timeout=5)
+        ok = response.ok
+    except requests.RequestException:
+        ok = False
+    pool.report(identity, ok, latency=0.1)
+    return ok
+
+
+def make_pool(proxies) -> IdentityPool:
+    pool = IdentityPool(proxies, [{"User-Agent": "test"}],
+                        failure_threshold=2, quarantine_time=60,
+                        max_quarantine_time=100)
+    for identity in pool.identities:
+        identity.session.trust_env = False
+    return pool
+
+
+def test_failing_proxy_scores_lower(proxies, clock):
+    pool = make_pool(proxies)
+    good, bad = pool.identities
+
+    assert fetch(pool, good)
+    assert not fetch(pool, bad)
+    assert good.score == 1.0
+    assert bad.score == pytest.approx(0.7)
+    assert good.rank > bad.rank
+    assert bad.failures == 1 and not bad.quarantined
+
+
+def test_quarantine_and_release(proxies, clock):
+    pool = make_pool(proxies)
+    good, bad = pool.identities
+
+    for _ in range(2):
+        fetch(pool, bad)
+    assert bad.quarantined
+    assert all(pool.acquire() is good for _ in range(20))
+
+    # Released after quarantine_time, the next quarantine is doubled and
+    # capped at max_quarantine_time
+    clock[0] += 60
+    assert not bad.quarantined
+    for _ in range(2):
+        fetch(pool, bad)
+    assert bad.quarantined_until == clock[0] + 100
+
+    # A success resets the back-off
+    clock[0] += 100
+    pool.report(bad, True)
+    assert bad.strikes == 0 and bad.failures == 0
+
+
+def test_everything_quarantined_uses_the_soonest_released(proxies, clock):
+    pool = make_pool(proxies)
+    good, bad = pool.identities
+    for _ in range(2):
+        fetch(pool, bad)
+    clock[0] += 10
+    for _ in range(2):
+        pool.report(good, False)
+
+    assert good.quarantined and bad.quarantined
+    assert pool.acquire() is bad
+
+
+def test_exclude_skips_a_blocked_identity(proxies, clock):
+    pool = make_pool(proxies)
+    good, bad = pool.identities
+
+    assert all(pool.acquire(exclude=bad) is good for _ in range(20))
+    for _ in range(2):
+        fetch(pool, bad)
+    # Nothing else to use, so the excluded identity is still returned
+    assert pool.acquire(exclude=good) is good
@@ -0,0 +1,24 @@
+from price_scraper.load_balance import CostModel, lpt_schedule
+from price_scraper.target_config import target_id, validate_targets
+
+
+def test_lpt_schedule_balances_longest_first():
+    jobs = {"a": 7, "b": 5, "c": 4, "d": 3, "e": 2}
+    bins = lpt_schedule(jobs, 2)
+    assert [keys[0] for keys in bins] == ["a", "b"]
+    loads = sorted(sum(jobs[key] for key in keys) for keys in bins)
+    assert loads == [10, 11]
+
+
+def test_same_named_targets_keep_their_own_cost():
+    standard, selenium = validate_targets([
+        {"name": "RTX 5080", "scrape_type": "standard",
+         "url": "https://shop.example/gpus", "price_threshold": 1},
+        {"name": "RTX 5080", "scrape_type": "selenium",
+         "url": "https://shop.example/gpus", "price_threshold": 1},
+    ])
+    costs = CostModel(None)
+    costs.record(target_id(standard), "http", 0.2)
+    costs.record(target_id(selenium), "browser", 12.0)
+    assert costs.estimate([standard], "http") == 0.2
+    assert costs.estimate([selenium], "browser") == 12.0
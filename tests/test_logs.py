@@ -0,0 +1,41 @@
+import json
+import logging
+import queue
+
+from price_scraper.logs import JsonFormatter, RecordQueueHandler
+
+
+def record(msg: str, *args, exc_info=None, **extra) -> logging.LogRecord:
+    logger = logging.getLogger("price_scraper.test")
+    return logger.makeRecord(logger.name, logging.INFO, __file__, 1, msg,
+                             args, exc_info, extra=extra)
+
+
+def test_json_formatter_keeps_structured_fields():
+    line = JsonFormatter().format(record(
+        "[%s] parsed %d items", "GPUs", 3,
+        target="GPUs", attempt=2, stage="parse", duration=0.25, host="shop"))
+    data = json.loads(line)
+    assert data["level"] == "INFO"
+    assert data["logger"] == "price_scraper.test"
+    assert data["message"] == "[GPUs] parsed 3 items"
+    assert {key: data[key] for key in
+            ("target", "attempt", "stage", "duration", "host")} == {
+        "target": "GPUs", "attempt": 2, "stage": "parse", "duration": 0.25,
+        "host": "shop"}
+    assert "\n" not in line
+
+
+def test_queued_record_keeps_message_and_traceback():
+    try:
+        raise ValueError("bad page")
+    except ValueError as e:
+        exc_info = (type(e), e, e.__traceback__)
+    log_queue = queue.SimpleQueue()
+    RecordQueueHandler(log_queue).handle(
+        record("[%s] failed", "GPUs", exc_info=exc_info, target="GPUs"))
+
+    data = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert data["message"] == "[GPUs] failed"
+    assert data["target"] == "GPUs"
+    assert "ValueError: bad page" in data["exception"]
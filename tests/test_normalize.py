@@ -0,0 +1,48 @@
+import pytest
+
+from price_scraper.scrapers.normalize import Price, parse_price, parse_range
+
+
+@pytest.mark.parametrize("text, minor, currency", [
+    ("$1,299.99", 129999, "USD"),
+    ("1,234,567.89", 123456789, None),
+    ("CHF 1'299.50", 129950, "CHF"),
+    ("1 299,99 EUR", 129999, "EUR"),
+    ("$1.299", 129900, "USD"),
+])
+def test_thousands_separators(text, minor, currency):
+    assert parse_price(text) == Price(minor, currency)
+
+
+@pytest.mark.parametrize("text, minor", [
+    ("1.299,99 €", 129999),
+    ("49,99€", 4999),
+    ("€ 5,5", 550),
+])
+def test_european_decimal_commas(text, minor):
+    assert parse_price(text) == Price(minor, "EUR")
+
+
+def test_zero_decimal_currency_rounds_fraction():
+    assert parse_price("¥1,980.5") == Price(1981, "JPY", 0)
+
+
+def test_range():
+    low, high = parse_range("$1,299.99 - $1,499.99")
+    assert (low.minor, high.minor) == (129999, 149999)
+    # A currency on either end applies to both
+    assert parse_range("10 to 20 €") == (Price(1000, "EUR"),
+                                        Price(2000, "EUR"))
+    assert parse_range("$10 - 20") == (Price(1000, "USD"),
+                                      Price(2000, "USD"))
+
+
+def test_single_price_is_a_range_of_one():
+    price = Price(4999, "USD")
+    assert parse_range("$49.99 (2 offers)") == (price, price)
+
+
+@pytest.mark.parametrize("text", ["", "Sold out", "Save 20% off"])
+def test_missing_price(text):
+    assert parse_price(text) is None
+    assert parse_range(text) is None
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from price_scraper.notifications.backends import Backend, SmtpBackend
+from price_scraper.notifications.notifier import Notifier
+
+
+class SlowThreadBackend(Backend):
+    name = "slow"
+    blocking = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.sent = []
+
+    async def send(self, message: str):
+        await asyncio.to_thread(self._send, message)
+
+    def _send(self, message: str):
+        time.sleep(self.seconds)
+        self.sent.append(message)
+
+
+def test_slow_blocking_backend_is_not_sent_twice():
+    backend = SlowThreadBackend(0.5)
+    notifier = Notifier(backends=[backend], timeout=0.1, retries=3,
+                        retry_delay=0)
+    try:
+        notifier.send("alert")
+        assert notifier.flush(5)
+    finally:
+        notifier.close()
+    assert backend.sent == ["alert"]
+
+
+def test_smtp_timeout_defaults_to_notifier_timeout():
+    backend = SmtpBackend(["me@example.com"])
+    Notifier(backends=[backend], timeout=7)
+    assert backend.timeout == 7
@@ -0,0 +1,49 @@
+from price_scraper.scrapers.parser import JsonParser, StandardParser
+
+NEXT_DATA = b"""<html><head>
+<script id="__NEXT_DATA__" type="application/json">
+{"props": {"pageProps": {"products": [
+    {"title": "RTX 5080", "price": {"value": 1499.99},
+     "inStock": true, "url": "/p/rtx-5080"},
+    {"title": "RTX 5090", "currentPrice": "$2,199",
+     "inStock": false, "url": "/p/rtx-5090"}
+]}}}
+</script>
+<script>window.analytics = {"name": "not a product"};</script>
+</head></html>"""
+
+
+def test_json_parser_reads_embedded_script_tag():
+    parser = JsonParser(notifier=None)
+    parser.base_url = "https://shop.example"
+    items = parser.get_items("GPUs", NEXT_DATA, "utf-8")
+    assert [(item.search, item.item, item.price, item.stock, item.link)
+            for item in items] == [
+        ("GPUs", "RTX 5080", 1500, True, "https://shop.example/p/rtx-5080"),
+        ("GPUs", "RTX 5090", 2199, False, "https://shop.example/p/rtx-5090"),
+    ]
+
+
+def test_json_parser_reads_api_response():
+    items = JsonParser(notifier=None).get_items(
+        "GPUs", b'[{"name": "RTX 5080", "salePrice": 1399}]')
+    assert [(item.item, item.price, item.stock) for item in items] == [
+        ("RTX 5080", 1399, True)]
+
+
+STANDARD_PAGE = b"""<html><body>
+<div class="item-cell">
+  <a class="item-title" href="https://shop.example/rtx-5080">RTX 5080</a>
+  <li class="price-current">$1,499<sup>.99</sup> (2 Offers)</li>
+</div>
+</body></html>"""
+
+
+def test_parser_keeps_no_items_between_calls():
+    parser = StandardParser(notifier=None)
+    first = parser.get_items("GPUs", STANDARD_PAGE, "utf-8")
+    second = parser.get_items("GPUs", STANDARD_PAGE, "utf-8")
+    assert [(item.item, item.price, item.stock) for item in second] == [
+        ("RTX 5080", 1500, True)]
+    assert first is not second
+    assert len(first) == 1
@@ -0,0 +1,16 @@
+import os
+
+from price_scraper.profiling import Profiler
+
+
+def test_same_named_sections_keep_their_own_reports(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    for _ in range(2):
+        with profiler.section("RTX 5080", "scrape"):
+            sum(range(1000))
+
+    run_dir = profiler.write()
+    reports = sorted(name for name in os.listdir(run_dir)
+                     if name.endswith(".pstats"))
+    assert reports == ["000-RTX_5080.scrape.pstats",
+                       "001-RTX_5080.scrape.pstats"]
@@ -0,0 +1,128 @@
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+from urllib3.util.request import ACCEPT_ENCODING
+
+from price_scraper.deadline import Deadline
+from price_scraper.notifications.notifier import Notifier
+from price_scraper.scrapers.requester import StandardRequester
+
+
+BODY = b"<html>" + b"x" * 100000 + b"</html>"
+
+
+def compressor(encoding: str):
+    """
+    Returns a compress function for a Content-Encoding, skipping the test
+    when its module isn't installed.
+    """
+    if encoding == "gzip":
+        return gzip.compress
+    if encoding == "br":
+        return pytest.importorskip("brotli").compress
+    try:
+        from compression import zstd
+    except ImportError:
+        zstd = pytest.importorskip("backports.zstd")
+    return zstd.compress
+
+
+class DripHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/accept-encoding":
+            body = self.headers["Accept-Encoding"].encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path.startswith("/encoded/"):
+            encoding = self.path.rsplit("/", 1)[1]
+            body = self.server.compressors[encoding](BODY)
+            self.send_response(200)
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        chunks = 50 if self.path == "/slow" else 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(chunks * 1024))
+        self.end_headers()
+        try:
+            for _ in range(chunks):
+                self.wfile.write(b"x" * 1024)
+                self.wfile.flush()
+                if chunks > 1:
+                    time.sleep(0.1)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DripHandler)
+    server.daemon_threads = True
+    server.compressors = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def requester() -> StandardRequester:
+    return StandardRequester(notifier=Notifier(backends=[]))
+
+
+def test_page_within_deadline(base_url):
+    page = requester().get_page("test", f"{base_url}/fast",
+                                deadline=Deadline(5))
+    assert page.status == 200
+    assert len(page.content) == 1024
+
+
+def test_slow_body_stops_at_deadline(base_url):
+    start = time.monotonic()
+    page = requester().get_page("test", f"{base_url}/slow",
+                                deadline=Deadline(0.5))
+    assert time.monotonic() - start < 2
+    assert page.content == b""
+    assert page.status is None
+
+
+def test_advertises_what_urllib3_decodes(base_url):
+    page = requester().get_page("test", f"{base_url}/accept-encoding",
+                                deadline=Deadline(5))
+    assert page.content.decode() == ACCEPT_ENCODING
+    assert {"gzip", "deflate"} <= set(ACCEPT_ENCODING.split(","))
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_compressed_page_is_decoded(server, base_url, encoding):
+    server.compressors[encoding] = compressor(encoding)
+    if encoding not in ACCEPT_ENCODING.split(","):
+        pytest.skip(f"urllib3 can't decode {encoding} here")
+    page = requester().get_page("test", f"{base_url}/encoded/{encoding}",
+                                deadline=Deadline(5))
+    assert page.content == BODY
+    assert page.wire_bytes < 1000
+
+
+def test_body_is_raw_bytes_with_declared_charset(base_url):
+    standard = requester()
+    page = standard.get_page("test", f"{base_url}/fast", deadline=Deadline(5))
+    assert isinstance(page.content, bytes)
+    assert page.encoding == "utf-8"
+    assert standard.stats["test"] == {"requests": 1, "wire_bytes": 1024,
+                                      "decoded_bytes": 1024}
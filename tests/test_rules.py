@@ -0,0 +1,34 @@
+import datetime as dt
+
+from price_scraper.data.history import PriceHistory
+from price_scraper.data.item import Item
+from price_scraper.notifications.rules import BelowMedianRule
+
+
+def item(price: int, days_ago: int = 0) -> Item:
+    time = dt.datetime.now() - dt.timedelta(days=days_ago)
+    return Item("GPUs", time.isoformat(timespec="seconds"), "RTX 5080",
+                price, True, None)
+
+
+def check(rule: BelowMedianRule, history: PriceHistory, new: Item) -> str:
+    reason = rule.check(new, history.item_stats("GPUs", "RTX 5080"),
+                        history)
+    history.record("GPUs", [new])
+    return reason
+
+
+def test_below_median_alerts_once_per_drop(tmp_path):
+    history = PriceHistory(str(tmp_path / "history.db"))
+    for days_ago, price in ((3, 1000), (2, 1100), (1, 1000)):
+        history.record("GPUs", [item(price, days_ago)])
+    rule = BelowMedianRule(percent=10, days=30)
+
+    assert check(rule, history, item(950)) is None
+    assert "below the 30 day median of $1000" in check(rule, history,
+                                                       item(850))
+    # Still below the median, no repeat alert
+    assert check(rule, history, item(840)) is None
+    assert check(rule, history, item(990)) is None
+    # Dropped below again after recovering
+    assert check(rule, history, item(800)) is not None
@@ -0,0 +1,19 @@
+from price_scraper.scheduler import AdaptiveScheduler
+from price_scraper.target_config import validate_targets
+
+
+def test_same_named_targets_keep_their_own_schedule():
+    standard, selenium = validate_targets([
+        {"name": "RTX 5080", "scrape_type": "standard",
+         "url": "https://shop.example/gpus", "price_threshold": 1},
+        {"name": "RTX 5080", "scrape_type": "selenium",
+         "url": "https://shop.example/gpus", "price_threshold": 1},
+    ])
+    scheduler = AdaptiveScheduler(None, min_interval=60, max_interval=3600)
+    scheduler.observe(standard, [], [], now=0)
+    scheduler.observe(selenium, None, None, now=0)
+
+    # The failed selenium scrape retries soon, the quiet standard one
+    # backs off, neither overwrites the other
+    assert len(scheduler.state) == 2
+    assert scheduler.due([standard, selenium], now=60) == [selenium]
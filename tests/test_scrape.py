@@ -0,0 +1,35 @@
+import time
+from types import SimpleNamespace
+
+from price_scraper.deadline import Deadline
+from price_scraper.scrapers.requester import Page
+from price_scraper.scrapers.scrape import Scrape
+
+
+def failing_scrape(max_tries: int) -> Scrape:
+    requester = SimpleNamespace(
+        get_page=lambda **kwargs: Page(kwargs["url"], b"", status=200),
+        report_identity=lambda *args, **kwargs: None,
+        )
+    parser = SimpleNamespace(get_items=lambda **kwargs: [])
+    data_manager = SimpleNamespace(
+        archive_page=lambda *args: None,
+        save_to_csv=lambda *args: None,
+        )
+    return Scrape("GPUs", None, requester, parser, None, data_manager,
+                  "https://shop.example/gpus", min_retry_time=30,
+                  max_retry_time=30, max_tries=max_tries, discord_log=False)
+
+
+def test_no_wait_after_the_last_try():
+    start = time.monotonic()
+    assert failing_scrape(max_tries=1).scrape_items() is None
+    assert time.monotonic() - start < 5
+
+
+def test_retry_wait_never_outlives_the_deadline():
+    scrape = failing_scrape(max_tries=3)
+    start = time.monotonic()
+    assert scrape.scrape_items(Deadline(1)) is None
+    assert scrape.stale
+    assert time.monotonic() - start < 5
@@ -0,0 +1,107 @@
+import pytest
+
+from price_scraper import config
+from price_scraper.data.item import Item
+from price_scraper.scrape_manager import ScrapeManager
+from price_scraper.target_config import target_id
+
+URL = "https://shop.example/gpus"
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "NOTIFIERS", [])
+    manager = ScrapeManager([
+        {"name": "Cheap GPUs", "scrape_type": "standard", "url": URL,
+         "price_threshold": 500},
+        {"name": "Any GPU", "scrape_type": "standard", "url": URL,
+         "price_threshold": 2000},
+    ])
+    manager.begin_cycle()
+    yield manager
+    manager.notifier.close()
+
+
+def page_items() -> list[Item]:
+    return [Item("Cheap GPUs / Any GPU", "2024-01-01T00:00:00", title, price,
+                 True, f"https://shop.example/{price}")
+            for title, price in (("RTX 5060", 400), ("RTX 5080", 1500))]
+
+
+def test_targets_on_one_url_share_a_fetch(manager):
+    groups = manager.group_targets(manager.targets)
+    assert list(groups) == [(URL, "standard")]
+
+    group = groups[(URL, "standard")]
+    items = page_items()
+    manager.finish_group(group, items, {"duration": 1.0}, stale=False)
+
+    for target in group:
+        fanned_out = manager.current_scrape[target_id(target)]
+        assert [item.item for item in fanned_out] == ["RTX 5060", "RTX 5080"]
+        assert {item.search for item in fanned_out} == {target["name"]}
+    # The fetched items aren't retagged in place
+    assert {item.search for item in items} == {"Cheap GPUs / Any GPU"}
+
+
+def test_failing_target_is_marked_stale(manager, monkeypatch, caplog):
+    group = manager.group_targets(manager.targets)[(URL, "standard")]
+    process_target = manager.process_target
+
+    def fail_first(target, items, fetch):
+        if target["name"] == "Cheap GPUs":
+            raise RuntimeError("alert backend down")
+        process_target(target, items, fetch)
+
+    monkeypatch.setattr(manager, "process_target", fail_first)
+    manager.finish_group(group, page_items(), {"duration": 1.0}, stale=False)
+
+    assert manager.stale == ["Cheap GPUs"]
+    assert len(manager.current_scrape[target_id(group[1])]) == 2
+    failed = manager.metrics["targets"][target_id(group[0])]
+    assert (failed["reason"], failed["error"]) == (
+        "error", "RuntimeError('alert backend down')")
+    assert [(record.target, record.stage) for record in caplog.records
+            if record.levelname in ("ERROR", "WARNING")] == [
+        ("Cheap GPUs", "process"), ("Cheap GPUs", "stale")]
+
+
+def test_timed_out_group_is_marked_stale(manager):
+    group = manager.group_targets(manager.targets)[(URL, "standard")]
+    manager.finish_group(group, None, {"duration": 5.0}, stale=True)
+
+    assert manager.stale == ["Cheap GPUs", "Any GPU"]
+    for target in group:
+        metrics = manager.metrics["targets"][target_id(target)]
+        assert metrics["reason"] == "timeout"
+        assert "error" not in metrics
+
+
+def test_same_named_targets_dont_diff_against_each_other(tmp_path,
+                                                         monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "NOTIFIERS", [])
+    manager = ScrapeManager([
+        {"name": "RTX 5080", "scrape_type": "standard", "url": URL,
+         "price_threshold": 1500},
+        {"name": "RTX 5080", "scrape_type": "selenium", "url": URL,
+         "price_threshold": 1500},
+    ])
+    try:
+        published = []
+        manager.change_feed.subscribe(published.extend)
+        manager.begin_cycle()
+        standard, selenium = manager.targets
+        manager.finish_group([standard], page_items()[:1], {}, stale=False)
+        manager.finish_group([selenium], page_items()[1:], {}, stale=False)
+
+        # Nothing to compare against on the first cycle
+        assert published == []
+        assert set(manager.current_scrape) == {target_id(standard),
+                                               target_id(selenium)}
+        history = manager.data_manager.history
+        assert [row["item"] for row in history.latest(target_id(standard))
+                ] == ["RTX 5060"]
+    finally:
+        manager.notifier.close()
@@ -0,0 +1,48 @@
+from price_scraper.data.datamanager import DataManager
+from price_scraper.data.item import Item
+from price_scraper.data.snapshot_cache import SnapshotCache
+from price_scraper.data.snapshot_file import write_snapshot
+
+
+def item(search: str, price: int) -> Item:
+    return Item(search, "2024-01-01T00:00:00", "RTX 5080", price, True,
+                "https://shop.example/rtx-5080")
+
+
+def test_same_named_targets_keep_their_own_snapshots(tmp_path):
+    manager = DataManager(None, str(tmp_path / "data.csv"),
+                          str(tmp_path / "last_scrape.snap"),
+                          snapshot_cache_bytes=1024 * 1024)
+    manager.snapshots.put("RTX 5080|standard", [item("RTX 5080", 1200)])
+    manager.snapshots.put("RTX 5080|selenium", [item("RTX 5080", 1300)])
+
+    assert manager.last_items("RTX 5080|standard")[0].price == 1200
+    assert manager.last_items("RTX 5080|selenium")[0].price == 1300
+
+
+def test_last_scrape_keyed_by_name_is_read_by_id(tmp_path):
+    last_scrape = str(tmp_path / "last_scrape.snap")
+    write_snapshot(last_scrape, {"RTX 5080": [item("RTX 5080", 1200)]})
+    manager = DataManager(None, str(tmp_path / "data.csv"), last_scrape,
+                          snapshot_cache_bytes=1024 * 1024)
+
+    items = manager.last_items("RTX 5080|standard", "RTX 5080")
+    assert items[0].price == 1200
+    # Cached under the id from then on
+    assert manager.snapshots.get("RTX 5080|standard")[0].price == 1200
+
+
+def test_listings_sharing_a_title_are_all_kept():
+    cache = SnapshotCache(max_bytes=1024 * 1024)
+    listings = [item("RTX 5080|standard", 1200),
+                Item("RTX 5080|standard", "2024-01-01T00:00:00", "RTX 5080",
+                     1250, False, "https://shop.example/rtx-5080-oc")]
+    cache.put("RTX 5080|standard", listings)
+
+    cached = cache.get("RTX 5080|standard")
+    assert [(entry.price, entry.link) for entry in cached] == [
+        (1200, "https://shop.example/rtx-5080"),
+        (1250, "https://shop.example/rtx-5080-oc")]
+    # Changing the caller's list doesn't change the snapshot
+    listings.clear()
+    assert len(cache.get("RTX 5080|standard")) == 2
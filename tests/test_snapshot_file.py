@@ -0,0 +1,51 @@
+import pytest
+
+from price_scraper.data.item import Item
+from price_scraper.data.snapshot_file import (MAGIC, PREAMBLE, VERSION,
+                                              encode_snapshot, read_snapshot,
+                                              write_snapshot)
+
+
+def snapshot() -> dict:
+    return {
+        "RTX 5080|standard": [
+            Item("RTX 5080", "2024-01-01T00:00:00", "RTX 5080 Ventus",
+                 1500, True, "https://shop.example/ventus"),
+            Item("RTX 5080", "2024-01-01T00:00:00", "RTX 5080 Gaming OC ü",
+                 1699, False, None),
+        ],
+        "RTX 5080|selenium": [],
+        "RTX 5090|standard": None,
+    }
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "last_scrape.snap")
+    write_snapshot(path, snapshot())
+
+    loaded = read_snapshot(path)
+    assert list(loaded) == list(snapshot())
+    assert loaded["RTX 5080|selenium"] == []
+    assert loaded["RTX 5090|standard"] is None
+    assert ([item.as_dict() for item in loaded["RTX 5080|standard"]] ==
+            [item.as_dict() for item in snapshot()["RTX 5080|standard"]])
+    # Item.search isn't stored, items come back tagged with their key
+    assert {item.search for item in loaded["RTX 5080|standard"]} == {
+        "RTX 5080|standard"}
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = tmp_path / "last_scrape.snap"
+    path.write_bytes(b"\x80\x04" + encode_snapshot(snapshot())[2:])
+    with pytest.raises(ValueError, match="not a snapshot file"):
+        read_snapshot(str(path))
+
+
+def test_newer_version_is_rejected(tmp_path):
+    data = encode_snapshot(snapshot())
+    _, _, header_size = PREAMBLE.unpack_from(data)
+    path = tmp_path / "last_scrape.snap"
+    path.write_bytes(PREAMBLE.pack(MAGIC, VERSION + 1, header_size)
+                     + data[PREAMBLE.size:])
+    with pytest.raises(ValueError, match="format version"):
+        read_snapshot(str(path))
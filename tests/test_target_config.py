@@ -0,0 +1,59 @@
+import pytest
+
+from price_scraper.target_config import validate_target
+
+
+def target(**fields) -> dict:
+    return {"name": "RTX 5080", "scrape_type": "standard",
+            "url": "https://shop.example/gpus", "price_threshold": 1500,
+            **fields}
+
+
+def test_null_optional_fields_get_their_default():
+    validated = validate_target(target(rules=None, discord_log=None,
+                                       time_budget=None))
+    assert validated["rules"] == []
+    assert validated["discord_log"] is False
+    assert validated["time_budget"] is None
+
+
+def test_null_required_field_is_rejected():
+    with pytest.raises(ValueError, match="price_threshold"):
+        validate_target(target(price_threshold=None))
+
+
+def test_invalid_rule_is_rejected():
+    with pytest.raises(ValueError, match="invalid rule"):
+        validate_target(target(rules=[{"type": "nope"}]))
+
+
+def test_invalid_rule_parameter_is_rejected():
+    with pytest.raises(ValueError, match="invalid rule"):
+        validate_target(target(rules=[{"type": "below_median", "pct": 5}]))
+
+
+@pytest.mark.parametrize("rule", [
+    {"type": "below_median", "percent": "ten"},
+    {"type": "below_median", "percent": 0},
+    {"type": "below_median", "days": -3},
+    {"type": "back_in_stock", "days": True},
+    {"type": "all_time_low", "in_stock": "yes"},
+])
+def test_rule_parameter_of_wrong_type_or_range_is_rejected(rule):
+    with pytest.raises(ValueError, match="invalid rule"):
+        validate_target(target(rules=[rule]))
+
+
+@pytest.mark.parametrize("budget", [0, -5])
+def test_time_budget_must_be_positive(budget):
+    with pytest.raises(ValueError, match="time_budget"):
+        validate_target(target(time_budget=budget))
+
+
+def test_valid_rules_and_budget_load():
+    validated = validate_target(target(time_budget=30, rules=[
+        {"type": "below_median", "percent": 7.5, "days": 14},
+        {"type": "back_in_stock", "days": 7},
+        {"type": "all_time_low", "in_stock": True},
+    ]))
+    assert validated["time_budget"] == 30
@@ -0,0 +1,57 @@
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from price_scraper.web import WebServer
+
+
+@pytest.fixture
+def server():
+    manager = SimpleNamespace(version=0, snapshot={}, metrics={},
+                              targets=[], data_manager=None)
+    server = WebServer(manager, "127.0.0.1", 0, page_size=100)
+    server.start()
+    yield server
+    server.stop()
+
+
+def request(server: WebServer, data: bytes) -> bytes:
+    port = server.server.sockets[0].getsockname()[1]
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as conn:
+        conn.sendall(data)
+        conn.shutdown(socket.SHUT_WR)
+        response = b""
+        while chunk := conn.recv(65536):
+            response += chunk
+    return response
+
+
+def test_get(server):
+    response = request(server, b"GET /api/metrics HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 200 OK")
+
+
+def test_malformed_request_line_is_400(server):
+    response = request(server, b"garbage\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_empty_connection_is_closed(server):
+    assert request(server, b"") == b""
+    response = request(server, b"GET /api/metrics HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 200 OK")
+
+
+@pytest.mark.parametrize("query", ["back=x", "back=-1", "back=1.5",
+                                   "page=x"])
+def test_invalid_int_params_are_400(server, query):
+    response = request(server, f"GET /api/snapshot?target=A&{query} "
+                               "HTTP/1.1\r\n\r\n".encode())
+    assert response.startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_back_zero_reads_the_snapshot(server):
+    response = request(server, b"GET /api/snapshot?target=A&back=0 "
+                               b"HTTP/1.1\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 200 OK")